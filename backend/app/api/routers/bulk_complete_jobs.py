@@ -0,0 +1,18 @@
+from fastapi import APIRouter, HTTPException, Depends
+
+from app.schemas.requests import BulkJobIds
+from app.services.database_service import complete_jobs
+from app.core.auth import get_current_user_id
+
+router = APIRouter(prefix="/api", tags=['Frontend'])
+
+@router.post("/bulk_complete_jobs")
+def bulk_complete_jobs(
+    body: BulkJobIds,
+    user_id: str = Depends(get_current_user_id)
+) -> dict:
+    try:
+        completed = complete_jobs(user_id, body.job_ids)
+        return {"detail": "Statistics updated successfully", "count": completed}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail="Database error: " + str(e))
@@ -0,0 +1,18 @@
+from fastapi import APIRouter, HTTPException, Depends
+
+from app.schemas.requests import BulkJobIds
+from app.services.database_service import delete_jobs
+from app.core.auth import get_current_user_id
+
+router = APIRouter(prefix="/api", tags=['Frontend'])
+
+@router.post("/bulk_delete_jobs")
+def bulk_delete_jobs(
+    body: BulkJobIds,
+    user_id: str = Depends(get_current_user_id)
+) -> dict:
+    try:
+        deleted = delete_jobs(user_id, body.job_ids)
+        return {"detail": "Jobs deleted successfully", "count": deleted}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail="Database error: " + str(e))
@@ -0,0 +1,18 @@
+from fastapi import APIRouter, HTTPException, Depends
+
+from app.schemas.requests import BulkJobPriority
+from app.services.database_service import set_jobs_priority
+from app.core.auth import get_current_user_id
+
+router = APIRouter(prefix="/api", tags=['Frontend'])
+
+@router.put("/bulk_set_job_priority")
+def bulk_set_job_priority(
+    body: BulkJobPriority,
+    user_id: str = Depends(get_current_user_id)
+) -> dict:
+    try:
+        changed = set_jobs_priority(user_id, body.job_ids, body.priority)
+        return {"detail": "Job priorities updated successfully", "count": changed}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail="Database error: " + str(e))
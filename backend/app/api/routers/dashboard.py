@@ -0,0 +1,30 @@
+import asyncio
+from fastapi import APIRouter, HTTPException, Depends
+from fastapi.concurrency import run_in_threadpool
+
+from app.schemas.database_tables import Dashboard, Statistics, Preference
+from app.services.database_service import get_jobs, get_user_statistics, get_preferences
+from app.core.auth import get_current_user_id
+
+router = APIRouter(prefix="/api", tags=['Frontend'])
+
+@router.get("/dashboard", response_model=Dashboard)
+async def dashboard(user_id: str = Depends(get_current_user_id)) -> Dashboard:
+    # One token check, then the three Supabase queries at once - each blocks a threadpool thread
+    try:
+        jobs, statistics, preferences = await asyncio.gather(
+            run_in_threadpool(get_jobs, user_id),
+            run_in_threadpool(get_user_statistics, user_id),
+            run_in_threadpool(get_preferences, user_id),
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail="Database error: " + str(e))
+
+    jobs = jobs or []
+
+    return Dashboard(
+        jobs=jobs,
+        priority_job_ids=[job.id for job in jobs if job.priority],
+        statistics=statistics or Statistics(),
+        preferences=preferences or Preference(),
+    )
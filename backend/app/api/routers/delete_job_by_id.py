@@ -6,7 +6,7 @@ from app.core.auth import get_current_user_id
 router = APIRouter(prefix="/api", tags=['Frontend'])
 
 @router.delete("/delete_job_by_id/{job_id}")
-async def delete_job_by_id(
+def delete_job_by_id(
     job_id: int,
     user_id: str = Depends(get_current_user_id)
 ) -> dict:
@@ -7,7 +7,7 @@ from app.core.auth import get_current_user_id
 router = APIRouter(prefix="/api", tags=['Frontend'])
 
 @router.get("/get_job_by_id/{job_id}", response_model=Job)
-async def get_job_by_id_endpoint(
+def get_job_by_id_endpoint(
     job_id: int,
     user_id: str = Depends(get_current_user_id)
 ) -> Job:
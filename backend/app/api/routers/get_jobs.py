@@ -7,7 +7,7 @@ from app.core.auth import get_current_user_id
 router = APIRouter(prefix="/api", tags=['Frontend'])
 
 @router.get("/get_jobs", response_model=list[Job])
-async def get_jobs(user_id: str = Depends(get_current_user_id)) -> list[Job]:
+def get_jobs(user_id: str = Depends(get_current_user_id)) -> list[Job]:
     try:
         jobs = get_jobs_from_db(user_id)
     except Exception as e:
@@ -7,7 +7,7 @@ from app.core.auth import get_current_user_id
 router = APIRouter(prefix="/api", tags=['Frontend'])
 
 @router.get("/get_preferences", response_model=Preference)
-async def get_preferences_endpoint(user_id: str = Depends(get_current_user_id)) -> Preference:
+def get_preferences_endpoint(user_id: str = Depends(get_current_user_id)) -> Preference:
     try:
         preferences = get_preferences(user_id)
     except Exception as e:
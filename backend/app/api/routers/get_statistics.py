@@ -7,7 +7,7 @@ from app.core.auth import get_current_user_id
 router = APIRouter(prefix="/api", tags=['Frontend'])
 
 @router.get("/get_statistics", response_model=Statistics)
-async def get_statistics(user_id: str = Depends(get_current_user_id)) -> Statistics:
+def get_statistics(user_id: str = Depends(get_current_user_id)) -> Statistics:
     try:
         statistics = get_user_statistics(user_id)
     except Exception as e:
@@ -0,0 +1,15 @@
+from fastapi import APIRouter, HTTPException, Response
+
+from app.core.telemetry import render_metrics
+
+router = APIRouter(tags=["Monitoring"])
+
+@router.get("/metrics", include_in_schema=False)
+def get_metrics() -> Response:
+    # Prometheus scrape target - stage timings from every API worker
+    metrics = render_metrics()
+    if metrics is None:
+        raise HTTPException(status_code=501, detail="prometheus_client is not installed")
+
+    body, content_type = metrics
+    return Response(content=body, media_type=content_type)
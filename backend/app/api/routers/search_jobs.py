@@ -7,7 +7,7 @@ from app.core.auth import get_current_user_id
 router = APIRouter(prefix="/api", tags=['Frontend'])
 
 @router.get("/search_jobs", response_model=list[Job])
-async def search_jobs_endpoint(
+def search_jobs_endpoint(
     q: str = Query(..., description="Search query"),
     user_id: str = Depends(get_current_user_id)
 ) -> list[Job]:
@@ -6,7 +6,7 @@ from app.core.auth import get_current_user_id
 router = APIRouter(prefix="/api", tags=['Frontend'])
 
 @router.put("/toggle_job_priority/{job_id}")
-async def toggle_job_priority_endpoint(
+def toggle_job_priority_endpoint(
     job_id: int,
     user_id: str = Depends(get_current_user_id)
 ) -> dict:
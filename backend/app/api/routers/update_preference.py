@@ -7,7 +7,7 @@ from app.core.auth import get_current_user_id
 router = APIRouter(prefix="/api", tags=['Frontend'])
 
 @router.put("/update_preferences")
-async def update_preferences(
+def update_preferences(
     preference: Preference,
     user_id: str = Depends(get_current_user_id)
 ) -> dict:
@@ -20,10 +20,10 @@ async def scrape_websocket(
         while True:
             await websocket.receive_text()
     except WebSocketDisconnect:
-        websocket_manager.disconnect(user_id)
+        websocket_manager.disconnect(user_id, websocket)
     except WebSocketException as e:
         print(f"WebSocket exception: {e}")
-        websocket_manager.disconnect(user_id)
+        websocket_manager.disconnect(user_id, websocket)
     except Exception as e:
         print(f"Unexpected error: {e}")
-        websocket_manager.disconnect(user_id)
\ No newline at end of file
+        websocket_manager.disconnect(user_id, websocket)
\ No newline at end of file
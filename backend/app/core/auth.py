@@ -16,10 +16,10 @@ security = HTTPBearer()
 @lru_cache(maxsize=1)
 def get_jwks():
     """
-    Fetch JSON Web Key Set (JWKS) from Supabase
+    Fetch JSON Web Key Set (JWKS) from Supabase, or settings.jwks_url when set
     Cached to avoid repeated requests
     """
-    jwks_url = f"{settings.supabase_url}/auth/v1/.well-known/jwks.json"
+    jwks_url = settings.jwks_url or f"{settings.supabase_url}/auth/v1/.well-known/jwks.json"
 
     try:
         response = requests.get(jwks_url, timeout=5)
@@ -122,21 +122,23 @@ def verify_token(credentials: HTTPAuthorizationCredentials = Security(security))
             detail="Token verification failed"
         )
 
-async def get_current_user_id(
+def get_current_user_id(
     credentials: HTTPAuthorizationCredentials = Security(security)
 ) -> str:
     """
     FastAPI dependency to get current authenticated user ID
+    Sync on purpose: FastAPI runs it in the threadpool, so a JWKS fetch
+    never blocks the event loop
 
     Usage in route:
         @router.get("/endpoint")
-        async def endpoint(user_id: str = Depends(get_current_user_id)):
+        def endpoint(user_id: str = Depends(get_current_user_id)):
             # user_id is now available
     """
     user_info = verify_token(credentials)
     return user_info["user_id"]
 
-async def get_websocket_user_id(token: str) -> str:
+def get_websocket_user_id(token: str) -> str:
     """
     FastAPI dependency for WebSocket authentication
     Accepts token from query parameter since WebSocket can't send headers
@@ -0,0 +1,49 @@
+"""
+Lightweight Celery client for the API
+Dispatches tasks to the worker by name, so the API process never imports
+worker.celery_app and its scraper, email and browser dependencies
+"""
+
+import time
+from functools import lru_cache
+
+from app.core.config import settings
+
+# Task names registered by worker/celery_app.py
+RUN_SCRAPE_TASK = "worker.celery_app.run_scrape"
+RUN_CRAWL_PLAN_TASK = "worker.celery_app.run_crawl_plan"
+QUEUE_MANUAL_SCRAPE_TASK = "worker.celery_app.queue_manual_scrape"
+FLUSH_MANUAL_SCRAPES_TASK = "worker.celery_app.flush_manual_scrapes"
+FLUSH_EMAIL_OUTBOX_TASK = "worker.celery_app.flush_email_outbox"
+FLUSH_EMAIL_DIGESTS_TASK = "worker.celery_app.flush_email_digests"
+SCHEDULE_SCRAPES_TASK = "worker.celery_app.schedule_scrapes"
+
+# Long browser scrapes and short emails get their own queues, so an email is
+# never stuck behind a 10 minute crawl on a worker that only consumes scrapes
+SCRAPE_QUEUE = "scrapes"
+EMAIL_QUEUE = "emails"
+
+# Shared by the API and the worker - routing happens on the producer side
+TASK_ROUTES = {
+    RUN_SCRAPE_TASK: {'queue': SCRAPE_QUEUE},
+    RUN_CRAWL_PLAN_TASK: {'queue': SCRAPE_QUEUE},
+    FLUSH_EMAIL_OUTBOX_TASK: {'queue': EMAIL_QUEUE},
+    FLUSH_EMAIL_DIGESTS_TASK: {'queue': EMAIL_QUEUE},
+    # Short bookkeeping task - kept off the scrape queue so it never waits behind a crawl
+    SCHEDULE_SCRAPES_TASK: {'queue': EMAIL_QUEUE},
+    QUEUE_MANUAL_SCRAPE_TASK: {'queue': EMAIL_QUEUE},
+    FLUSH_MANUAL_SCRAPES_TASK: {'queue': EMAIL_QUEUE},
+}
+
+@lru_cache(maxsize=1)
+def get_celery_client():
+    """Producer-only Celery app, created on first dispatch rather than at startup"""
+    from celery import Celery
+    client = Celery('jobflow', broker=settings.redis_url, backend=settings.redis_url)
+    client.conf.task_routes = TASK_ROUTES
+    return client
+
+def send_task(name: str, *args):
+    """Queue a worker task by name"""
+    # enqueued_at lets the worker report how long the task waited in the queue
+    return get_celery_client().send_task(name, args=args, headers={'enqueued_at': time.time()})
@@ -24,13 +24,52 @@ class Settings(BaseSettings):
     upstash_redis_rest_url: str
     upstash_redis_rest_token: str
     scrape_update_channel: str = "scrape_update"
+    # API workers tell each other about WebSocket reconnects here
+    ws_control_channel: str = "ws_control"
     
+    # Scraping - the spider subprocess is killed after this many seconds,
+    # Celery time limits are derived from it
+    scrape_timeout: int = 600
+    # Seconds the spider gets to exit once every user has a final update
+    scrape_shutdown_grace: int = 30
+    # Crawl without writing jobs or scrape runs (benchmarks against scripts/mock_indeed_server.py)
+    scraper_dry_run: bool = False
+
+    # Telemetry (app/core/telemetry.py) - console, otlp or none
+    trace_exporter: str = "none"
+    # Worker /metrics port, 0 to disable; the API serves /metrics itself
+    metrics_port: int = 0
+
+    # Scheduled scrapes (celery beat): each user's saved search every interval
+    scheduled_scrapes_enabled: bool = False
+    scrape_schedule_interval: int = 86400  # Seconds between a user's runs
+    scheduler_tick: int = 60  # Seconds between scheduler passes
+    scheduled_scrape_rate: float = 0.05  # Dispatches per second, shared by all ticks
+    scheduled_scrape_burst: int = 3
+    scheduled_scrape_jitter: int = 30  # Max seconds a dispatched start is delayed
+    scheduled_scrape_max_backlog: int = 4  # Hold off while this many scrapes are queued
+    scheduled_scrape_batch: int = 200  # Due users collected per tick - one crawl serves all users of a search
+    # Manual scrapes wait this many seconds for others with the same search to share their crawl
+    manual_scrape_window: int = 5
+
     # Database
     supabase_url: str
     supabase_key: str
+    # supabase, or memory for the offline stand-in in app/core/memory_db.py (load tests)
+    database_backend: str = "supabase"
+    memory_db_seed: str = ""  # "jobs per user:users,..." e.g. "10:50,10000:2"
+    memory_db_latency: float = 0.0  # Seconds added to every memory query
+    # JWT signing keys - Supabase's JWKS endpoint when empty
+    jwks_url: str = ""
     
     # Email
     email_password: str
+    # Redis list the scrape tasks append notifications to, sent in batches
+    email_outbox_key: str = "email_outbox"
+    # Digest mode: hold scrape outcomes and send one email per user per window
+    email_digest_enabled: bool = False
+    email_digest_window: int = 3600  # Seconds
+    email_digest_key: str = "email_digest"
     
     # Proxies
     proxy_str: str
@@ -0,0 +1,219 @@
+"""
+Logging for JobFlow
+One pipeline for the spider subprocess and the Celery worker: callers only put
+records on an in-memory queue (QueueHandler), a background thread
+(QueueListener) formats and writes them, so a slow stdout never stalls a crawl
+
+    {"ts": ..., "level": "INFO", "logger": "indeed", "message": ...,
+     "service": "jobflow-spider", "run_id": ..., "user_id": ...}
+
+run_id and user_id come from context variables (see log_context), so every
+record made inside a scrape carries them without callers passing them along.
+Like telemetry.py, nothing here reads app settings - the spider imports it
+without them. Environment:
+
+    LOG_LEVEL            Root level (INFO)
+    LOG_FORMAT           json (default) or text
+    LOG_MODULE_LEVELS    Per-logger levels, e.g. "scrapy=WARNING,indeed_scraper.matching=DEBUG"
+    LOG_DEBUG_SAMPLE     Keep 1 in N DEBUG records per call site after the first few (1 keeps all)
+"""
+
+import os
+import sys
+import copy
+import json
+import queue
+import atexit
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+run_id_var = ContextVar('run_id', default=None)
+user_id_var = ContextVar('user_id', default=None)
+
+TEXT_FORMAT = '%(asctime)s [%(name)s] %(levelname)s: %(message)s'
+
+# DEBUG records every call site may log before sampling starts
+DEBUG_SAMPLE_BURST = 5
+
+# Set by setup_logging, rebuilt in forked children
+_config = None
+_listener = None
+
+@contextmanager
+def log_context(run_id: str = None, user_id: str = None):
+    """Tag every record made inside the block with run_id and/or user_id"""
+    tokens = []
+    if run_id is not None:
+        tokens.append((run_id_var, run_id_var.set(run_id)))
+    if user_id is not None:
+        tokens.append((user_id_var, user_id_var.set(user_id)))
+    try:
+        yield
+    finally:
+        for var, token in reversed(tokens):
+            var.reset(token)
+
+class ContextFilter(logging.Filter):
+    """Copies the run context onto the record - runs in the logging thread, before the queue"""
+
+    def __init__(self, service: str):
+        super().__init__()
+        self.service = service
+
+    def filter(self, record):
+        record.service = self.service
+        record.run_id = run_id_var.get()
+        record.user_id = user_id_var.get()
+        return True
+
+class LevelFilter(logging.Filter):
+    """
+    Applies the root level to every logger but those given one in module_levels
+    Loggers can carry levels of their own (Scrapy sets 'scrapy' to DEBUG), and
+    the root level alone does not stop their records
+    """
+
+    def __init__(self, level: str, module_levels: dict):
+        super().__init__()
+        self.level = logging.getLevelName(level)
+        self.module_levels = {name: logging.getLevelName(value) for name, value in module_levels.items()}
+        self.thresholds = {}  # Logger name -> level, resolved once
+
+    def threshold(self, name):
+        # Most specific configured ancestor: a.b.c, then a.b, then a
+        parts = name.split('.')
+        for i in range(len(parts), 0, -1):
+            level = self.module_levels.get('.'.join(parts[:i]))
+            if level is not None:
+                return level
+        return self.level
+
+    def filter(self, record):
+        threshold = self.thresholds.get(record.name)
+        if threshold is None:
+            threshold = self.thresholds[record.name] = self.threshold(record.name)
+        return record.levelno >= threshold
+
+class SamplingFilter(logging.Filter):
+    """Keeps the first few DEBUG records of each call site, then 1 in rate"""
+
+    def __init__(self, rate: int, burst: int = DEBUG_SAMPLE_BURST):
+        super().__init__()
+        self.rate = rate
+        self.burst = burst
+        self.counts = {}
+
+    def filter(self, record):
+        if record.levelno > logging.DEBUG or self.rate <= 1:
+            return True
+        site = (record.pathname, record.lineno)
+        count = self.counts.get(site, 0) + 1
+        self.counts[site] = count
+        return count <= self.burst or count % self.rate == 0
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line"""
+
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'service': getattr(record, 'service', None),
+        }
+        for field in ('run_id', 'user_id'):
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = value
+        if record.exc_text:
+            entry['exc'] = record.exc_text
+        return json.dumps(entry, default=str)
+
+class _QueueHandler(QueueHandler):
+    def prepare(self, record):
+        # Render the message and traceback here: args and exc_info may reference
+        # objects that change (or go away) before the listener thread gets to them
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+def parse_module_levels(spec: str) -> dict:
+    """"scrapy=WARNING,asyncio=ERROR" -> {"scrapy": "WARNING", "asyncio": "ERROR"}"""
+    levels = {}
+    for item in (spec or '').split(','):
+        name, _, level = item.partition('=')
+        if name.strip() and level.strip():
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+def setup_logging(service_name: str, level: str = None, module_levels: dict = None):
+    """
+    Route every logger through the queued pipeline for this process
+
+    Args:
+        service_name: Reported as service on every record
+        level: Root level - LOG_LEVEL, then INFO, by default
+        module_levels: {logger name: level} defaults, LOG_MODULE_LEVELS entries win
+    """
+    global _config
+    _config = {
+        'service': service_name,
+        'level': (os.environ.get('LOG_LEVEL') or level or 'INFO').upper(),
+        'module_levels': {**(module_levels or {}), **parse_module_levels(os.environ.get('LOG_MODULE_LEVELS'))},
+        'json': os.environ.get('LOG_FORMAT', 'json').lower() != 'text',
+        'sample_rate': int(os.environ.get('LOG_DEBUG_SAMPLE') or 10),
+        # Kept for forked children - Celery swaps sys.stdout for a logger proxy after setup
+        'stream': sys.stdout,
+    }
+    _install()
+
+def _install():
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+
+    output = logging.StreamHandler(_config['stream'])
+    output.setFormatter(JsonFormatter() if _config['json'] else logging.Formatter(TEXT_FORMAT))
+
+    records = queue.SimpleQueue()
+    handler = _QueueHandler(records)
+    handler.addFilter(LevelFilter(_config['level'], _config['module_levels']))
+    handler.addFilter(SamplingFilter(_config['sample_rate']))
+    handler.addFilter(ContextFilter(_config['service']))
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(_config['level'])
+    for name, module_level in _config['module_levels'].items():
+        logging.getLogger(name).setLevel(module_level)
+
+    _listener = QueueListener(records, output, respect_handler_level=True)
+    _listener.start()
+
+def _restart_after_fork():
+    # The listener thread does not survive fork - without a new one a child's records pile up unwritten
+    global _listener
+    if _config is not None:
+        _listener = None
+        _install()
+
+def flush_logging():
+    """Write out everything queued - the listener stops, so call it only at exit"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+atexit.register(flush_logging)
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_restart_after_fork)
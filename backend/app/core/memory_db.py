@@ -0,0 +1,370 @@
+"""
+In-memory stand-in for the Supabase client
+Implements the part of supabase-py's PostgREST query builder that
+database_service.py uses (select/insert/update/upsert/delete, eq/gt/in_/or_
+filters, order/limit/range, count="exact"), rpc() for the functions in
+migrations/ and auth.admin.get_user_by_id, so
+the API can be run and load tested offline (DATABASE_BACKEND=memory)
+
+Data lives in the process - every API worker has its own copy. Seeded from
+MEMORY_DB_SEED, synthetic users holding a given number of jobs each:
+
+    MEMORY_DB_SEED="10:50,100:50,1000:10,10000:2"    # jobs per user : users
+
+MEMORY_DB_LATENCY adds a fixed delay per query, a stand-in for the Supabase
+round trip, so changes that save queries show up in load tests
+"""
+
+import re
+import time
+import uuid
+import random
+import threading
+from types import SimpleNamespace
+from datetime import datetime, timezone
+
+# Generated user ids are stable across processes, so load tests can derive them too
+SEED_NAMESPACE = uuid.UUID('6f1c1b52-4a3e-4d7e-9a53-2b1f0c8e7d10')
+
+TITLES = ['Python Developer', 'Backend Engineer', 'Data Analyst', 'Software Engineer', 'DevOps Engineer',
+          'Frontend Developer', 'Machine Learning Engineer', 'QA Analyst', 'Product Manager', 'Site Reliability Engineer']
+COMPANIES = ['Shopify', 'Wealthsimple', 'RBC', 'TD Bank', 'Lightspeed', 'Cohere', 'Ubisoft', 'Telus', 'Kinaxis', 'Clio']
+LOCATIONS = ['Toronto, ON', 'Vancouver, BC', 'Montreal, QC', 'Ottawa, ON', 'Calgary, AB', 'Remote']
+JOB_TYPES = ['Full-time', 'Part-time', 'Contract', 'Internship']
+BENEFITS = ['Dental care', 'Paid time off', 'RRSP match', 'Work from home', 'Stock options']
+# Shared, so 10k-job users cost row overhead only but responses still carry realistic descriptions
+DESCRIPTIONS = ['Synthetic listing for load tests. ' * repeat for repeat in (5, 20, 60)]
+
+class MemoryTable:
+    """Rows by id, plus an index on user_id - every per-user query starts from it"""
+
+    def __init__(self):
+        self.rows = {}
+        self.by_user = {}
+        self.next_id = 1
+
+    def add(self, row):
+        row = dict(row)
+        if row.get('id') is None:
+            row['id'] = self.next_id
+        self.next_id = max(self.next_id, row['id'] + 1)
+        self.rows[row['id']] = row
+        self.by_user.setdefault(row.get('user_id'), {})[row['id']] = row
+        return row
+
+    def remove(self, row):
+        del self.rows[row['id']]
+        self.by_user.get(row.get('user_id'), {}).pop(row['id'], None)
+
+    def candidates(self, filters):
+        # A user_id equality filter narrows the scan to that user's rows
+        for op, column, value in filters:
+            if op == 'eq' and column == 'user_id':
+                return list(self.by_user.get(value, {}).values())
+        return list(self.rows.values())
+
+def ilike_pattern(pattern):
+    """SQL ILIKE pattern (% and _ wildcards) as a compiled regex"""
+    parts = (('.*' if c == '%' else '.' if c == '_' else re.escape(c)) for c in pattern)
+    return re.compile(''.join(parts) + r'\Z', re.IGNORECASE | re.DOTALL)
+
+def matches(row, op, column, value):
+    actual = row.get(column)
+    if op == 'eq':
+        return actual == value
+    if op == 'neq':
+        return actual != value
+    if op == 'in':
+        return actual in value
+    if op == 'ilike':
+        return actual is not None and value.match(str(actual)) is not None
+    if op == 'or':
+        return any(matches(row, *condition) for condition in value)
+    if actual is None:
+        return False
+    if op == 'gt':
+        return actual > value
+    if op == 'gte':
+        return actual >= value
+    if op == 'lt':
+        return actual < value
+    if op == 'lte':
+        return actual <= value
+    raise ValueError(f"Unsupported filter: {op}")
+
+def parse_or(spec):
+    """PostgREST or filter - "title.ilike.%x%,company_name.eq.y" - as (op, column, value) conditions"""
+    conditions = []
+    for condition in spec.split(','):
+        column, op, value = condition.split('.', 2)
+        conditions.append((op, column, ilike_pattern(value) if op == 'ilike' else value))
+    return conditions
+
+class MemoryQuery:
+    """One table query, built up like supabase-py's and run by execute()"""
+
+    def __init__(self, database, table):
+        self.database = database
+        self.table = table
+        self.action = 'select'
+        self.payload = None
+        self.columns = '*'
+        self.count = None
+        self.filters = []
+        self.orders = []
+        self.offset = 0
+        self.row_limit = None
+        self.on_conflict = None
+        self.ignore_duplicates = False
+
+    # Actions
+    def select(self, columns='*', count=None):
+        self.columns = columns
+        self.count = count
+        return self
+
+    def insert(self, rows):
+        self.action, self.payload = 'insert', rows
+        return self
+
+    def upsert(self, rows, on_conflict=None, ignore_duplicates=False):
+        self.action, self.payload = 'upsert', rows
+        self.on_conflict = on_conflict
+        self.ignore_duplicates = ignore_duplicates
+        return self
+
+    def update(self, values):
+        self.action, self.payload = 'update', values
+        return self
+
+    def delete(self):
+        self.action = 'delete'
+        return self
+
+    # Filters
+    def eq(self, column, value):
+        self.filters.append(('eq', column, value))
+        return self
+
+    def neq(self, column, value):
+        self.filters.append(('neq', column, value))
+        return self
+
+    def gt(self, column, value):
+        self.filters.append(('gt', column, value))
+        return self
+
+    def gte(self, column, value):
+        self.filters.append(('gte', column, value))
+        return self
+
+    def lt(self, column, value):
+        self.filters.append(('lt', column, value))
+        return self
+
+    def lte(self, column, value):
+        self.filters.append(('lte', column, value))
+        return self
+
+    def in_(self, column, values):
+        self.filters.append(('in', column, list(values)))
+        return self
+
+    def ilike(self, column, pattern):
+        self.filters.append(('ilike', column, ilike_pattern(pattern)))
+        return self
+
+    def or_(self, spec):
+        self.filters.append(('or', None, parse_or(spec)))
+        return self
+
+    # Modifiers
+    def order(self, column, desc=False):
+        self.orders.append((column, desc))
+        return self
+
+    def limit(self, count):
+        self.row_limit = count
+        return self
+
+    def range(self, start, end):
+        self.offset = start
+        self.row_limit = end - start + 1
+        return self
+
+    def execute(self):
+        self.database.round_trip()
+        with self.database.lock:
+            return getattr(self, f'run_{self.action}')(self.database.table_rows(self.table))
+
+    def matching(self, table):
+        return [row for row in table.candidates(self.filters)
+                if all(matches(row, *condition) for condition in self.filters)]
+
+    def run_select(self, table):
+        rows = self.matching(table)
+        # Stable sorts, last key first, give multi-column ordering; NULLs last ascending, first descending (as Postgres)
+        for column, desc in reversed(self.orders):
+            rows.sort(key=lambda row: (row.get(column) is None, row.get(column)), reverse=desc)
+        total = len(rows)
+        end = None if self.row_limit is None else self.offset + self.row_limit
+        rows = rows[self.offset:end]
+
+        if self.columns.strip() == '*':
+            data = [dict(row) for row in rows]
+        else:
+            columns = [column.strip() for column in self.columns.split(',')]
+            data = [{column: row.get(column) for column in columns} for row in rows]
+        return SimpleNamespace(data=data, count=total if self.count else None)
+
+    def run_insert(self, table):
+        rows = self.payload if isinstance(self.payload, list) else [self.payload]
+        return SimpleNamespace(data=[dict(table.add(row)) for row in rows], count=None)
+
+    def run_upsert(self, table):
+        rows = self.payload if isinstance(self.payload, list) else [self.payload]
+        keys = [key.strip() for key in (self.on_conflict or 'id').split(',')]
+        saved = []
+        for row in rows:
+            # Conflict keys that include user_id only need that user's rows
+            pool = table.by_user.get(row.get('user_id'), {}) if 'user_id' in keys else table.rows
+            key = tuple(row.get(column) for column in keys)
+            current = next((other for other in pool.values()
+                            if tuple(other.get(column) for column in keys) == key), None)
+            if current is None:
+                saved.append(dict(table.add(row)))
+            elif not self.ignore_duplicates:
+                current.update({column: value for column, value in row.items() if column != 'id'})
+                saved.append(dict(current))
+        return SimpleNamespace(data=saved, count=None)
+
+    def run_update(self, table):
+        rows = self.matching(table)
+        for row in rows:
+            row.update({column: value for column, value in self.payload.items() if column != 'id'})
+        return SimpleNamespace(data=[dict(row) for row in rows], count=None)
+
+    def run_delete(self, table):
+        rows = self.matching(table)
+        for row in rows:
+            table.remove(row)
+        return SimpleNamespace(data=[dict(row) for row in rows], count=None)
+
+def increment_user_statistics(database, p_user_id, p_latest_scrape=None, **deltas):
+    # migrations/001_increment_user_statistics.sql
+    rows = list(database.table_rows('user_statistics').by_user.get(p_user_id, {}).values())
+    for row in rows:
+        for parameter, delta in deltas.items():
+            column = parameter[len('p_'):]
+            row[column] = (row.get(column) or 0) + delta
+        if p_latest_scrape is not None:
+            row['latest_scrape'] = p_latest_scrape
+    return [dict(row) for row in rows]
+
+# Postgres functions callable through rpc(), by name
+FUNCTIONS = {
+    'increment_user_statistics': increment_user_statistics,
+}
+
+class MemoryCall:
+    """supabase.rpc(name, params) - runs the function's Python twin on execute()"""
+
+    def __init__(self, database, name, params):
+        self.database = database
+        self.function = FUNCTIONS[name]
+        self.params = params or {}
+
+    def execute(self):
+        self.database.round_trip()
+        with self.database.lock:
+            return SimpleNamespace(data=self.function(self.database, **self.params), count=None)
+
+class MemoryAdmin:
+    def __init__(self, database):
+        self.database = database
+
+    def get_user_by_id(self, user_id):
+        self.database.round_trip()
+        email = self.database.users.get(user_id)
+        return SimpleNamespace(user=SimpleNamespace(id=user_id, email=email) if email else None)
+
+class MemoryDatabase:
+    """Drop-in for supabase.Client in database_service.py"""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.tables = {}
+        self.users = {}  # user_id -> email, for auth.admin
+        self.lock = threading.Lock()
+        self.auth = SimpleNamespace(admin=MemoryAdmin(self))
+
+    def round_trip(self):
+        if self.latency:
+            time.sleep(self.latency)
+
+    def table_rows(self, name):
+        table = self.tables.get(name)
+        if table is None:
+            table = self.tables[name] = MemoryTable()
+        return table
+
+    def table(self, name):
+        return MemoryQuery(self, name)
+
+    def rpc(self, name, params=None):
+        return MemoryCall(self, name, params)
+
+def parse_seed(spec: str) -> list[tuple[int, int]]:
+    """"10:50,1000:2" -> [(10, 50), (1000, 2)] - (jobs per user, users)"""
+    tiers = []
+    for item in (spec or '').split(','):
+        jobs, _, users = item.partition(':')
+        if jobs.strip():
+            tiers.append((int(jobs), int(users or 1)))
+    return tiers
+
+def seed_user_ids(spec: str) -> dict[int, list[str]]:
+    """The user ids a seed creates, by jobs per user - same in every process"""
+    return {
+        jobs: [str(uuid.uuid5(SEED_NAMESPACE, f'{jobs}-{i}')) for i in range(users)]
+        for jobs, users in parse_seed(spec)
+    }
+
+def synthetic_job(rng, user_id):
+    return {
+        'user_id': user_id,
+        'title': rng.choice(TITLES),
+        'company_name': rng.choice(COMPANIES),
+        'location': rng.choice(LOCATIONS),
+        'job_type': rng.choice(JOB_TYPES),
+        'salary': f'${rng.randrange(50, 180)},000 a year' if rng.random() < 0.6 else None,
+        'url': f'https://ca.indeed.com/viewjob?jk={rng.getrandbits(64):016x}',
+        'description': rng.choice(DESCRIPTIONS),
+        'benefits': ', '.join(rng.sample(BENEFITS, rng.randrange(0, 4))) or None,
+        'priority': rng.random() < 0.1,
+    }
+
+def seed(database: MemoryDatabase, spec: str):
+    """Synthetic users with their jobs, preferences and statistics"""
+    now = datetime.now(timezone.utc).isoformat()
+    for jobs, user_ids in seed_user_ids(spec).items():
+        for user_id in user_ids:
+            rng = random.Random(user_id)
+            database.users[user_id] = f'{user_id}@loadtest.local'
+
+            listings = [database.table_rows('jobs').add(synthetic_job(rng, user_id)) for _ in range(jobs)]
+            database.table_rows('preferences').add({
+                'user_id': user_id, 'title': 'python, developer', 'location': 'toronto',
+                'scrape_length': 25,
+            })
+            database.table_rows('user_statistics').add({
+                'user_id': user_id, 'total_jobs': jobs, 'current_jobs': jobs,
+                'saved_jobs': sum(1 for listing in listings if listing['priority']),
+                'completed_jobs': 0, 'total_scrapes': 1, 'latest_scrape': now,
+            })
+
+def create_memory_client(seed_spec: str = '', latency: float = 0.0) -> MemoryDatabase:
+    database = MemoryDatabase(latency)
+    if seed_spec:
+        seed(database, seed_spec)
+    return database
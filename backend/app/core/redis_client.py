@@ -1,7 +1,7 @@
 import asyncio
 import json
 from redis.asyncio import Redis
-from typing import Callable, Awaitable
+from typing import Callable, Awaitable, Dict
 
 from app.core.config import settings
 
@@ -23,6 +23,8 @@ class RedisClient:
         self.redis = None
         self.pubsub = None
         self.subscriber_task = None
+        # {channel: handler} - one pubsub connection serves every channel
+        self.handlers: Dict[str, MessageHandler] = {}
 
     async def connect(self):
         try:
@@ -53,12 +55,29 @@ class RedisClient:
             await self.redis.close()
             
     async def subscribe(self, channel: str, handler: MessageHandler):
-        self.pubsub = self.redis.pubsub()
+        """
+        Register a handler for a channel
+        Every API worker process subscribes on its own, so each one receives
+        every message and decides for itself whether it holds the recipient
+
+        Args:
+            channel: Redis pub/sub channel
+            handler: Awaited with the decoded JSON dict of each message
+        """
+        if self.pubsub is None:
+            self.pubsub = self.redis.pubsub()
+        self.handlers[channel] = handler
         await self.pubsub.subscribe(channel)
+
         # Create new async task to prevent liste loop from blocking program flow
-        self.subscriber_task = asyncio.create_task(self._listener(handler))
-        
-    async def _listener(self, handler: MessageHandler):
+        if self.subscriber_task is None:
+            self.subscriber_task = asyncio.create_task(self._listener())
+
+    async def publish(self, channel: str, message: dict):
+        """Publish a JSON message, e.g. to the other API workers"""
+        await self.redis.publish(channel, json.dumps(message))
+
+    async def _listener(self):
         try: 
             while True:
                 message = await self.pubsub.get_message(
@@ -66,9 +85,17 @@ class RedisClient:
                     timeout=1.0 # System will wait for one second to attempt to read
                     )
                 if message and message['type'] == 'message':
+                    channel = message['channel'].decode("utf-8")
+                    handler = self.handlers.get(channel)
+                    if handler is None:
+                        continue
                     data = message['data'].decode("utf-8")
                     parsed = json.loads(data)
-                    await handler(parsed) # Sends dict data to validation in main               
+                    try:
+                        await handler(parsed) # Sends dict data to validation in main
+                    except Exception as e:
+                        # One bad message must not kill the listener for every channel
+                        print(f"Error handling message on {channel}: {e}")
         except asyncio.CancelledError:
             raise # Propogates to disconnect
 
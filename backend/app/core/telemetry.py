@@ -0,0 +1,192 @@
+"""
+Telemetry for JobFlow
+Stage timings as Prometheus histograms and OpenTelemetry spans, shared by the
+API, the Celery worker and the spider subprocess:
+
+    jobflow_stage_duration_seconds{stage, outcome}    outcome is ok or error
+
+Both libraries are optional - without them every helper here is a no-op, so
+callers never check. Nothing in this module reads app settings, because the
+spider subprocess imports it without them
+
+Metrics: the API serves /metrics, the worker serves its own on METRICS_PORT.
+Processes on one host (gunicorn workers, Celery pool children, spiders)
+aggregate through PROMETHEUS_MULTIPROC_DIR when it is set
+Tracing: TRACE_EXPORTER=console prints spans locally, otlp sends them to
+OTEL_EXPORTER_OTLP_ENDPOINT, none (default) records nothing
+"""
+
+import os
+import time
+import inspect
+import functools
+from contextlib import contextmanager, nullcontext
+
+try:
+    import prometheus_client
+except ImportError:
+    prometheus_client = None
+
+try:
+    from opentelemetry import trace, propagate, context as otel_context
+except ImportError:
+    trace = None
+
+# Stages run from milliseconds (a parse, a DB call) to minutes (a whole scrape)
+STAGE_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+
+STAGE_DURATION = None
+if prometheus_client is not None:
+    STAGE_DURATION = prometheus_client.Histogram(
+        'jobflow_stage_duration_seconds',
+        'Time spent per stage of the API, worker and spider',
+        ['stage', 'outcome'],
+        buckets=STAGE_BUCKETS,
+    )
+
+# Set by setup_tracing - spans are only recorded once a provider is installed
+_tracer = None
+
+def setup_tracing(service_name: str, exporter: str = None):
+    """
+    Install a tracer provider for this process
+
+    Args:
+        service_name: Reported as service.name on every span
+        exporter: console, otlp or none - TRACE_EXPORTER by default
+    """
+    global _tracer
+    exporter = (exporter or os.environ.get('TRACE_EXPORTER') or 'none').lower()
+    if trace is None or exporter == 'none':
+        return
+
+    try:
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+
+        if exporter == 'otlp':
+            from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+            span_exporter = OTLPSpanExporter()
+        else:
+            span_exporter = ConsoleSpanExporter()
+    except ImportError as e:
+        print(f"Tracing disabled: {e}")
+        return
+
+    # The provider flushes queued spans at exit
+    provider = TracerProvider(resource=Resource.create({'service.name': service_name}))
+    provider.add_span_processor(BatchSpanProcessor(span_exporter))
+    trace.set_tracer_provider(provider)
+    _tracer = trace.get_tracer('jobflow')
+
+def observe(stage_name: str, seconds: float, outcome: str = 'ok'):
+    """Record a duration measured elsewhere (queue wait, page download)"""
+    if STAGE_DURATION is not None and seconds is not None:
+        STAGE_DURATION.labels(stage_name, outcome).observe(max(0.0, seconds))
+
+@contextmanager
+def stage(stage_name: str, current: bool = True, **attributes):
+    """
+    Time a block as one stage, inside a span of the same name
+
+    Args:
+        current: Make the span the parent of spans started inside the block.
+            Off for generators, which suspend mid-block while others run
+    """
+    span = None
+    if _tracer is not None:
+        if current:
+            span_context = _tracer.start_as_current_span(stage_name, attributes=attributes)
+        else:
+            span = _tracer.start_span(stage_name, attributes=attributes)
+            span_context = nullcontext()
+    else:
+        span_context = nullcontext()
+
+    start = time.perf_counter()
+    outcome = 'ok'
+    try:
+        with span_context:
+            yield
+    except Exception:
+        outcome = 'error'
+        raise
+    finally:
+        observe(stage_name, time.perf_counter() - start, outcome)
+        if span is not None:
+            span.end()
+
+def traced(stage_name: str = None):
+    """
+    Decorator - time every call as a stage (module.function by default)
+    Works on plain and async functions, generators and async generators
+    """
+    def decorator(fn):
+        name = stage_name or f"{fn.__module__.rsplit('.', 1)[-1]}.{fn.__qualname__}"
+
+        if inspect.isasyncgenfunction(fn):
+            async def wrapper(*args, **kwargs):
+                with stage(name, current=False):
+                    async for item in fn(*args, **kwargs):
+                        yield item
+        elif inspect.iscoroutinefunction(fn):
+            async def wrapper(*args, **kwargs):
+                with stage(name):
+                    return await fn(*args, **kwargs)
+        elif inspect.isgeneratorfunction(fn):
+            def wrapper(*args, **kwargs):
+                with stage(name, current=False):
+                    yield from fn(*args, **kwargs)
+        else:
+            def wrapper(*args, **kwargs):
+                with stage(name):
+                    return fn(*args, **kwargs)
+
+        return functools.wraps(fn)(wrapper)
+    return decorator
+
+def trace_carrier() -> dict:
+    """Current trace context as W3C headers, e.g. to hand to a subprocess through its environment"""
+    carrier = {}
+    if trace is not None:
+        propagate.inject(carrier)
+    return carrier
+
+@contextmanager
+def continue_trace(carrier: dict):
+    """Run the block inside the trace described by carrier (see trace_carrier)"""
+    if trace is None:
+        yield
+        return
+    token = otel_context.attach(propagate.extract(carrier))
+    try:
+        yield
+    finally:
+        otel_context.detach(token)
+
+def metrics_registry():
+    """Registry to export - all processes' samples in multiprocess mode, this process's otherwise"""
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import CollectorRegistry, multiprocess
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    return prometheus_client.REGISTRY
+
+def render_metrics():
+    """
+    Prometheus text exposition of every metric
+
+    Returns:
+        (body, content type), or None when prometheus_client is not installed
+    """
+    if prometheus_client is None:
+        return None
+    return prometheus_client.generate_latest(metrics_registry()), prometheus_client.CONTENT_TYPE_LATEST
+
+def start_metrics_server(port: int):
+    """Serve /metrics from a background thread (processes without an HTTP server, e.g. the worker)"""
+    if prometheus_client is None or not port:
+        return
+    prometheus_client.start_http_server(port, registry=metrics_registry())
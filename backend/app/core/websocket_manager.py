@@ -1,21 +1,33 @@
 """
 Simplified WebSocket connection manager
-Stores ONE connection per user in-memory (single server only)
+Stores ONE connection per user in-memory, per API worker process
+
+With several workers a user's socket lives in exactly one of them. Scrape
+updates reach every worker through Redis pub/sub and only the worker holding
+the socket delivers them. Reconnects are announced on the ws control channel
+so the worker holding the stale socket closes it
 """
 
-from fastapi import WebSocket
-from typing import Dict
+import uuid
+from fastapi import WebSocket, status
+from typing import Dict, Optional
+
+from app.core.config import settings
+from app.core.redis_client import redis_client
+from app.core.telemetry import traced
 
 class WebSocketManager:
     def __init__(self):
         # Simple dictionary: {user_id: websocket}
         # Only ONE connection per user
         self.connections: Dict[str, WebSocket] = {}
+        # Identifies this worker process on the control channel
+        self.instance_id = uuid.uuid4().hex
 
     async def connect(self, websocket: WebSocket, user_id: str):
         """
         Accept and store ONE WebSocket connection per user
-        If user already has a connection, disconnect the old one
+        If user already has a connection, here or in another worker, close the old one
 
         Args:
             websocket: The WebSocket connection
@@ -23,10 +35,7 @@ class WebSocketManager:
         """
         # If user already connected, close old connection
         if user_id in self.connections:
-            try:
-                self.disconnect(user_id)
-            except:
-                pass  # Old connection already closed
+            await self.close(user_id)
             print(f"User {user_id} reconnected. Closed old connection.")
 
         # Accept new connection
@@ -35,19 +44,71 @@ class WebSocketManager:
         # Store connection
         self.connections[user_id] = websocket
 
+        # Other workers close their copy, if they have one
+        try:
+            await redis_client.publish(settings.ws_control_channel, {
+                'type': 'connected',
+                'user_id': user_id,
+                'instance_id': self.instance_id,
+            })
+        except Exception as e:
+            print(f'Failed to announce WebSocket connection for user {user_id}: {e}')
+
         print(f'WebSocket connected for user {user_id}. Total connections: {len(self.connections)}')
 
-    def disconnect(self, user_id: str):
+    def disconnect(self, user_id: str, websocket: Optional[WebSocket] = None):
         """
         Remove a WebSocket connection for a specific user
 
         Args:
             user_id: The user's ID
+            websocket: Only remove the entry if it is still this socket, so a
+                replaced connection closing late doesn't drop its replacement
         """
-        if user_id in self.connections:
-            del self.connections[user_id]
-            print(f'WebSocket disconnected for user {user_id}. Remaining: {len(self.connections)}')
+        if user_id not in self.connections:
+            return
+        if websocket is not None and self.connections[user_id] is not websocket:
+            return
+
+        del self.connections[user_id]
+        print(f'WebSocket disconnected for user {user_id}. Remaining: {len(self.connections)}')
+
+    async def close(self, user_id: str, code: int = status.WS_1000_NORMAL_CLOSURE):
+        """
+        Close and remove a user's connection
+
+        Args:
+            user_id: The user's ID
+            code: WebSocket close code sent to the client
+        """
+        websocket = self.connections.pop(user_id, None)
+        if websocket is None:
+            return
+
+        try:
+            await websocket.close(code=code)
+        except Exception:
+            pass  # Old connection already closed
+
+    async def close_all(self, code: int = status.WS_1001_GOING_AWAY):
+        """
+        Close every connection in this worker - called on shutdown so clients
+        see 1001 Going Away and reconnect to a live worker
+        """
+        for user_id in list(self.connections):
+            await self.close(user_id, code)
+
+    async def handle_control(self, message: dict):
+        """Control channel handler: drop our socket when the user reconnected elsewhere"""
+        if message.get('instance_id') == self.instance_id:
+            return
+
+        user_id = message.get('user_id')
+        if message.get('type') == 'connected' and user_id in self.connections:
+            await self.close(user_id)
+            print(f"User {user_id} reconnected on another worker. Closed old connection.")
 
+    @traced('ws.send_to_user')
     async def send_to_user(self, user_id: str, message: dict):
         """
         Send a message to a specific user's connection
@@ -57,7 +118,7 @@ class WebSocketManager:
             message: The message dictionary to send
         """
         if user_id not in self.connections:
-            print(f"User {user_id} is not connected")
+            # Normal with several workers - the user's socket is in another one
             return
 
         websocket = self.connections[user_id]
@@ -67,7 +128,7 @@ class WebSocketManager:
         except Exception as e:
             print(f'Error sending to user {user_id}: {e}')
             # Connection failed, clean up
-            self.disconnect(user_id)
+            self.disconnect(user_id, websocket)
 
     def debug_connections(self):
         """Print current connection status for debugging"""
@@ -4,15 +4,18 @@ from contextlib import asynccontextmanager
 from pydantic import ValidationError
 
 from app.core.config import settings
-from app.api.routers import (health, scrape, delete_job_by_id, get_job_by_id, \
+from app.api.routers import (health, metrics, scrape, delete_job_by_id, get_job_by_id, \
     get_jobs, get_preferences, get_priority_jobs, get_statistics, job_complete, \
-        search_jobs, toggle_job_priority, update_preference)        
+        search_jobs, toggle_job_priority, update_preference, bulk_complete_jobs, \
+            bulk_delete_jobs, bulk_set_job_priority, dashboard)        
     
 from app.api import websocket
 from app.schemas.messages import ScrapeUpdateMessage
 from app.core.redis_client import redis_client
 from app.core.websocket_manager import websocket_manager
+from app.core.telemetry import setup_tracing, traced
 
+@traced('ws.dispatch')
 async def handle_scrape_update(message: dict):
     # Validate message recieved from Celery with schema, then forward to websocket
     print(f"📨 Received scrape update: {message}")  # Debug log
@@ -35,10 +38,12 @@ async def handle_scrape_update(message: dict):
 async def lifespan(app: FastAPI):
     # STARTUP
     print("\nStart API\n")
+    setup_tracing('jobflow-api', settings.trace_exporter)
 
     try:
         await redis_client.connect()
         await redis_client.subscribe(settings.scrape_update_channel, handle_scrape_update)
+        await redis_client.subscribe(settings.ws_control_channel, websocket_manager.handle_control)
         print("Redis pub/sub initialized successfully\n")
     except ConnectionError as e:
         print(f"\n⚠️  CRITICAL: Redis connection failed during startup")
@@ -49,6 +54,8 @@ async def lifespan(app: FastAPI):
     yield
 
     # SHUTDOWN
+    # Close any sockets still open so clients get 1001 and reconnect to a live worker
+    await websocket_manager.close_all()
     await redis_client.disconnect()
     print("\nShutdown API\n")
 
@@ -70,6 +77,7 @@ app.add_middleware(
 
 # Endpoints here
 app.include_router(health.router)
+app.include_router(metrics.router)
 app.include_router(scrape.router)
 app.include_router(websocket.router)
 
@@ -82,4 +90,8 @@ app.include_router(get_statistics.router)
 app.include_router(job_complete.router)
 app.include_router(search_jobs.router)
 app.include_router(toggle_job_priority.router)
-app.include_router(update_preference.router)
\ No newline at end of file
+app.include_router(update_preference.router)
+app.include_router(bulk_complete_jobs.router)
+app.include_router(bulk_delete_jobs.router)
+app.include_router(bulk_set_job_priority.router)
+app.include_router(dashboard.router)
\ No newline at end of file
@@ -19,6 +19,8 @@ class Job(BaseModel):
     description: Optional[str] = None
     benefits: Optional[str] = None
     priority: Optional[bool] = False
+    external_id: Optional[str] = None  # Indeed job key
+    posted_date: Optional[str] = None  # ISO date, when Indeed gives one
 
 class Preference(BaseModel):
     title: Optional[str] = None
@@ -37,4 +39,11 @@ class Statistics(BaseModel):
     saved_jobs: int = 0
     completed_jobs: int = 0
     total_scrapes: int = 0
-    latest_scrape: Optional[str] = None
\ No newline at end of file
+    latest_scrape: Optional[str] = None
+
+class Dashboard(BaseModel):
+    """Everything the dashboard shows on load, in one response"""
+    jobs: list[Job] = []  # Priority first, then title - same order as get_jobs
+    priority_job_ids: list[int] = []  # The saved jobs list, taken from jobs rather than queried again
+    statistics: Statistics = Statistics()
+    preferences: Preference = Preference()
@@ -8,6 +8,43 @@ class Status(str, Enum):
     COMPLETED = "completed"
     FAILED = "failed"
     
+class ScrapeMetrics(BaseModel):
+    """
+    Where one scrape's time and resources went, persisted per run to scrape_runs
+    The spider fills the crawl fields, scraper_service.py the queue, subprocess and total ones
+    Timings are in seconds, None when the stage never ran
+    """
+    # Timings
+    queue_wait_seconds: Optional[float] = None  # Dispatch to a worker starting the task
+    startup_seconds: Optional[float] = None  # Subprocess launch to first request (interpreter, Scrapy, reactor)
+    crawl_seconds: Optional[float] = None  # First request to spider close
+    http_wait_seconds: Optional[float] = None  # Plain HTTP page downloads, summed over parallel pages
+    browser_wait_seconds: Optional[float] = None  # Playwright page loads incl. Chromium launch, summed
+    parse_seconds: Optional[float] = None  # Card extraction
+    db_seconds: Optional[float] = None  # Supabase dedup checks, inserts and stats updates
+    subprocess_seconds: Optional[float] = None  # Spider subprocess wall time
+    total_seconds: Optional[float] = None  # Task start to final status
+
+    # Pages
+    pages_fetched: int = 0  # Page loads - escalated pages count twice
+    http_pages: int = 0
+    browser_pages: int = 0
+    escalations: int = 0
+    pages_lost: int = 0
+    retries: int = 0  # Ban retries on a fresh proxy plus Scrapy's own retries
+
+    # Cards
+    cards_seen: int = 0
+    cards_deduped: int = 0  # Already seen on another page or query of this crawl
+    cards_filtered: int = 0  # New cards no subscriber's filters accepted
+    cards_existing: int = 0  # Accepted but already in the subscriber's jobs
+    jobs_saved: int = 0  # Across all subscribers of the crawl
+
+    # Resources
+    bytes_transferred: int = 0  # Plain HTTP bodies plus everything rendered pages pulled
+    peak_rss_mb: Optional[float] = None  # Spider process
+    peak_browser_rss_mb: Optional[float] = None  # Playwright driver and Chromium
+
 class ScrapeUpdateMessage(BaseModel):
     """
     Message published to Redis when scrape task status changes.
@@ -18,4 +55,8 @@ class ScrapeUpdateMessage(BaseModel):
     jobs_found: int = 0
     error_message: Optional[str] = None
     spider_finished: Optional[bool] = None
-    page_completed: Optional[int] = None
\ No newline at end of file
+    # Set only on the update the spider sends from closed() - the run's outcome
+    final: Optional[bool] = None
+    page_completed: Optional[int] = None
+    # Final messages only - the spider sends the crawl's share, scraper_service completes it
+    metrics: Optional[ScrapeMetrics] = None
@@ -0,0 +1,11 @@
+from pydantic import BaseModel, Field
+
+# Ids one bulk request may carry - in_() filters travel in the PostgREST URL
+MAX_BULK_JOB_IDS = 500
+
+class BulkJobIds(BaseModel):
+    """Body of the bulk job endpoints (multi-select on the dashboard)"""
+    job_ids: list[int] = Field(min_length=1, max_length=MAX_BULK_JOB_IDS)
+
+class BulkJobPriority(BulkJobIds):
+    priority: bool  # Set, not toggled - a selection can mix both states
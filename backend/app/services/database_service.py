@@ -1,15 +1,22 @@
-from supabase import create_client, Client
 from typing import Optional
 
 from app.core.config import settings
+from app.core.telemetry import traced
 from app.schemas.database_tables import Job, Preference, Statistics
+from app.schemas.messages import ScrapeUpdateMessage
 
-supabase: Client = create_client(settings.supabase_url, settings.supabase_key)
+if settings.database_backend == 'memory':
+    from app.core.memory_db import create_memory_client
+    supabase = create_memory_client(settings.memory_db_seed, settings.memory_db_latency)
+else:
+    from supabase import create_client
+    supabase = create_client(settings.supabase_url, settings.supabase_key)
 
 # ============================================================
 # JOBS
 # ============================================================
 
+@traced('db.get_jobs')
 def get_jobs(user_id: str) -> Optional[list[Job]]:
     # Returns all jobs from a user, priority first then title ascending
     # Used by frontend for displaying all jobs
@@ -35,6 +42,7 @@ def get_jobs(user_id: str) -> Optional[list[Job]]:
             print(f"Result: {result}")
         raise
 
+@traced('db.get_job_by_id')
 def get_job_by_id(user_id: str, job_id: int) -> Job:
     # Gets one job listing from a user by id
     # Used by frontend for seeing job details
@@ -50,18 +58,23 @@ def get_job_by_id(user_id: str, job_id: int) -> Job:
 
     return Job(**result.data[0])
             
+@traced('db.delete_job_by_id')
 def delete_job_by_id(user_id: str, job_id: int):
-    # Deletes one job listing from a user by id
+    # Deletes one job listing from a user by id, and takes it off current_jobs (and saved_jobs if a priority)
     # Used by frontend for removing jobs
 
-    supabase.table("jobs") \
+    deleted = supabase.table("jobs") \
         .delete() \
             .eq("user_id",user_id) \
                 .eq("id",job_id) \
                     .execute()
 
+    if deleted.data:
+        increment_user_statistics(user_id, current_jobs=-1, saved_jobs=-1 if deleted.data[0].get('priority') else 0)
+
+@traced('db.toggle_job_priority')
 def toggle_job_priority(user_id: str, job_id: int) -> bool:
-    # Toggles the priority status of a job (True <-> False)
+    # Toggles the priority status of a job (True <-> False) and counts it in saved_jobs
     # Used by frontend for marking jobs as priority
 
     # First get current priority status
@@ -78,15 +91,58 @@ def toggle_job_priority(user_id: str, job_id: int) -> bool:
     current_priority = result.data[0].get("priority")
     new_priority = not current_priority
 
-    # Update the job with new priority
-    supabase.table("jobs") \
+    # Update only if nobody toggled it in between, so saved_jobs moves once per change
+    updated = supabase.table("jobs") \
         .update({"priority": new_priority}) \
             .eq("user_id", user_id) \
                 .eq("id", job_id) \
+                .eq("priority", bool(current_priority)) \
                     .execute()
 
+    if updated.data:
+        increment_user_statistics(user_id, saved_jobs=1 if new_priority else -1)
+
     return True
 
+@traced('db.delete_jobs')
+def delete_jobs(user_id: str, job_ids: list[int]) -> int:
+    # Deletes a batch of a user's jobs in one statement with one statistics update, returns how many there were
+    # Used by frontend multi-select delete
+
+    result = supabase.table("jobs") \
+        .delete() \
+            .eq("user_id", user_id) \
+                .in_("id", job_ids) \
+                    .execute()
+
+    # Same accounting as delete_job_by_id: off current_jobs, and off saved_jobs for priority ones
+    deleted = len(result.data)
+    if deleted:
+        saved = sum(1 for listing in result.data if listing.get('priority'))
+        increment_user_statistics(user_id, current_jobs=-deleted, saved_jobs=-saved)
+
+    return deleted
+
+@traced('db.set_jobs_priority')
+def set_jobs_priority(user_id: str, job_ids: list[int], priority: bool) -> int:
+    # Sets priority on a batch of a user's jobs in one statement and counts the changes in saved_jobs
+    # Used by frontend multi-select prioritize / unprioritize
+
+    # Only rows that actually change come back, so saved_jobs moves once per job
+    result = supabase.table("jobs") \
+        .update({"priority": priority}) \
+            .eq("user_id", user_id) \
+                .in_("id", job_ids) \
+                .neq("priority", priority) \
+                    .execute()
+
+    changed = len(result.data)
+    if changed:
+        increment_user_statistics(user_id, saved_jobs=changed if priority else -changed)
+
+    return changed
+
+@traced('db.get_priority_jobs')
 def get_priority_jobs(user_id: str) -> Optional[list[Job]]:
     # Returns only priority jobs from a user, title ascending
     # Used by frontend for displaying priority jobs only
@@ -105,6 +161,7 @@ def get_priority_jobs(user_id: str) -> Optional[list[Job]]:
 
     return job_listings
 
+@traced('db.search_jobs')
 def search_jobs(user_id: str, query: str) -> Optional[list[Job]]:
     # Search jobs by title, company_name, location, job_type, salary, or benefits
     # Used by frontend search bar
@@ -129,10 +186,43 @@ def search_jobs(user_id: str, query: str) -> Optional[list[Job]]:
 
     return job_listings
 
+@traced('db.get_last_job_id')
+def get_last_job_id(user_id: str, before: str) -> int:
+    # Returns the highest id among the user's jobs created before the ISO timestamp, or 0
+    # Used to seed the digest marker the first time a user gets a digest
+
+    result = supabase.table("jobs") \
+        .select("id") \
+            .eq("user_id", user_id) \
+            .lt("created_at", before) \
+                .order("id", desc=True) \
+                .limit(1) \
+                    .execute()
+
+    return result.data[0]['id'] if result.data else 0
+
+@traced('db.get_jobs_since')
+def get_jobs_since(user_id: str, after_id: int, limit: int) -> tuple[list[Job], int]:
+    # Returns the newest jobs with id above after_id (ids are serial) and how many there are in total
+    # Used by digest emails to list jobs saved since the previous digest
+
+    result = supabase.table("jobs") \
+        .select("*", count="exact") \
+            .eq("user_id", user_id) \
+            .gt("id", after_id) \
+                .order("id", desc=True) \
+                .limit(limit) \
+                    .execute()
+
+    job_listings = [Job(**listing) for listing in result.data or []]
+
+    return job_listings, result.count or len(job_listings)
+
 # ============================================================
 # Preferences
 # ============================================================
 
+@traced('db.get_preferences')
 def get_preferences(user_id: str) -> Optional[Preference]:
     # Gets user preferences
     # Used by frontend when displaying preferences
@@ -143,8 +233,48 @@ def get_preferences(user_id: str) -> Optional[Preference]:
     if not result.data:
         return None
 
-    return Preference(**result.data[0]) 
+    return Preference(**result.data[0])
 
+@traced('db.get_all_preferences')
+def get_all_preferences(page_size: int = 1000) -> list[tuple[str, Preference]]:
+    # Gets every user's preferences that can be scraped (title and location set)
+    # Used by the scrape scheduler; paged because PostgREST caps rows per request
+
+    preferences = []
+    start = 0
+    while True:
+        result = supabase.table('preferences') \
+            .select('*') \
+                .order('user_id') \
+                .range(start, start + page_size - 1) \
+                    .execute()
+
+        for row in result.data:
+            if row.get('title') and row.get('location'):
+                preferences.append((row['user_id'], Preference(**row)))
+
+        if len(result.data) < page_size:
+            return preferences
+        start += page_size
+
+@traced('db.get_preferences_for_users')
+def get_preferences_for_users(user_ids: list[str]) -> dict[str, Preference]:
+    # Gets scrapeable preferences (title and location set) for a batch of users in one query
+    # Used by the scrape scheduler for the users due this tick
+
+    if not user_ids:
+        return {}
+
+    result = supabase.table('preferences') \
+        .select('*').in_('user_id', user_ids).execute()
+
+    return {
+        row['user_id']: Preference(**row)
+        for row in result.data
+        if row.get('title') and row.get('location')
+    }
+
+@traced('db.update_preference')
 def update_preference(user_id: str, update: Preference):
     # Updates user preferences
     # Used by frontend when altering preferences
@@ -158,6 +288,7 @@ def update_preference(user_id: str, update: Preference):
 # User Data
 # ============================================================
 
+@traced('db.get_user_email')
 def get_user_email(user_id: str) -> Optional[str]:
     # Gets user's email from supabase
     # Used by backend once scrape completes
@@ -169,26 +300,59 @@ def get_user_email(user_id: str) -> Optional[str]:
         print(f'Failed to get user email: {e}')
         return None
     
+@traced('db.update_completed')
 def update_completed(user_id: str, job_id: int):
-    # Increments user's completed jobs by one then deletes the listing
+    # Deletes the listing then counts it as completed (and no longer saved, if it was a priority)
     # Used by frontend to mark complete
-    
-    current = supabase.table('user_statistics').select('*').eq('user_id', user_id).execute()
-    if current.data:
-        stats = current.data[0]
-        stats['current_jobs'] -= 1
-        stats['completed_jobs'] += 1
-
-        listing = get_job_by_id(user_id, job_id)
-        if listing.priority:
-            stats['saved_jobs'] -= 1
-
-        delete_job_by_id(user_id, job_id)
-        supabase.table('user_statistics').update(stats).eq('user_id', user_id).execute()
-    else:
-        # No user statistics found, still delete the job but can't update stats
-        delete_job_by_id(user_id, job_id)
-    
+
+    # The deleted row comes back, so a job completed twice at once is only counted once
+    deleted = supabase.table('jobs') \
+        .delete() \
+            .eq('user_id', user_id) \
+                .eq('id', job_id) \
+                    .execute()
+
+    if not deleted.data:
+        raise ValueError(f"Job with id {job_id} not found for user {user_id}")
+
+    increment_user_statistics(user_id, current_jobs=-1, completed_jobs=1,
+                              saved_jobs=-1 if deleted.data[0].get('priority') else 0)
+
+@traced('db.complete_jobs')
+def complete_jobs(user_id: str, job_ids: list[int]) -> int:
+    # Deletes a batch of listings and counts them as completed with one statistics update, returns how many
+    # Used by frontend multi-select complete
+
+    deleted = supabase.table('jobs') \
+        .delete() \
+            .eq('user_id', user_id) \
+                .in_('id', job_ids) \
+                    .execute()
+
+    completed = len(deleted.data)
+    if completed:
+        saved = sum(1 for listing in deleted.data if listing.get('priority'))
+        increment_user_statistics(user_id, current_jobs=-completed, completed_jobs=completed, saved_jobs=-saved)
+
+    return completed
+
+@traced('db.increment_user_statistics')
+def increment_user_statistics(user_id: str, total_jobs: int = 0, current_jobs: int = 0, saved_jobs: int = 0,
+                              completed_jobs: int = 0, total_scrapes: int = 0, latest_scrape: Optional[str] = None):
+    # Adds to a user's counters in one atomic UPDATE (migrations/001_increment_user_statistics.sql)
+    # Used by job completion and priority toggles; the spider calls the same function for saves and scrapes
+
+    supabase.rpc('increment_user_statistics', {
+        'p_user_id': user_id,
+        'p_total_jobs': total_jobs,
+        'p_current_jobs': current_jobs,
+        'p_saved_jobs': saved_jobs,
+        'p_completed_jobs': completed_jobs,
+        'p_total_scrapes': total_scrapes,
+        'p_latest_scrape': latest_scrape,
+    }).execute()
+
+@traced('db.get_user_statistics')
 def get_user_statistics(user_id: str) -> Optional[Statistics]:
     # Gets user statistics
     # Used by frontend to display dashboard
@@ -199,4 +363,27 @@ def get_user_statistics(user_id: str) -> Optional[Statistics]:
     if not result.data:
         return None
 
-    return Statistics(**result.data[0]) 
\ No newline at end of file
+    return Statistics(**result.data[0]) 
+
+# ============================================================
+# Scrape Runs
+# ============================================================
+
+@traced('db.create_scrape_runs')
+def create_scrape_runs(run_id: str, runs: list[ScrapeUpdateMessage]):
+    # Records each user's finished scrape with its ScrapeMetrics (one row per user per run)
+    # Used by the scraper service once a scrape or planned crawl ends, for per-run bottlenecks and trends
+
+    if not runs:
+        return
+
+    supabase.table('scrape_runs') \
+        .insert([{
+            'run_id': run_id,
+            'user_id': run.user_id,
+            'status': run.status.value,
+            'jobs_found': run.jobs_found,
+            'error_message': run.error_message,
+            'metrics': run.metrics.model_dump(mode='json') if run.metrics else None,
+        } for run in runs]) \
+            .execute()
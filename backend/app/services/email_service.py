@@ -1,12 +1,17 @@
-from fastapi_mail import FastMail, MessageSchema,ConnectionConfig
-from starlette.requests import Request
-from starlette.responses import JSONResponse
-from jinja2 import Template
+import os
+import json
+import time
+from datetime import datetime, timedelta, timezone
+import tempfile
+from email.message import EmailMessage
+from typing import Optional
+from jinja2 import Environment, DictLoader, FileSystemBytecodeCache, Template
 
 from app.core.config import settings
-from app.schemas.messages import ScrapeUpdateMessage
+from app.schemas.messages import ScrapeUpdateMessage, Status
 from app.schemas.database_tables import Preference
-from app.services.database_service import get_user_email
+from app.services.database_service import get_user_email, get_jobs_since, get_last_job_id
+from app.services.mailer import get_mailer
 
 EMAIL_SUCCESS_TEMPLATE = """
 <!DOCTYPE html>
@@ -168,61 +173,356 @@ EMAIL_FAILURE_TEMPLATE = """
 </html>
 """
 
-conf = ConnectionConfig(
-   MAIL_USERNAME="jobflow.vercel.app@gmail.com",
-   MAIL_PASSWORD=settings.email_password,
-   MAIL_FROM="jobflow.vercel.app@gmail.com",
-   MAIL_PORT=587,
-   MAIL_SERVER="smtp.gmail.com",
-   MAIL_STARTTLS=True,
-   MAIL_SSL_TLS=False,
-)
-
-async def send_scrape_complete_email(user_id: str, jobs_found: int, preferences: Preference):
-    template = Template(EMAIL_SUCCESS_TEMPLATE)
-    html_content = template.render(
+EMAIL_DIGEST_TEMPLATE = """
+<!DOCTYPE html>
+<html lang="en">
+<head>
+  <meta charset="UTF-8">
+  <meta name="viewport" content="width=device-width, initial-scale=1.0">
+  <title>Your Job Digest - JobFlow</title>
+</head>
+<body style="margin: 0; padding: 0; font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, 'Helvetica Neue', Arial, sans-serif; background-color: #f3f6f9; color: #1a1a1a;">
+  <table width="100%" cellpadding="0" cellspacing="0" style="background-color: #f3f6f9; padding: 40px 20px;">
+    <tr>
+      <td align="center">
+        <table width="600" cellpadding="0" cellspacing="0" style="background-color: #ffffff; border-radius: 12px; box-shadow: 0 2px 8px rgba(0,0,0,0.08); overflow: hidden;">
+          <!-- Header -->
+          <tr>
+            <td style="padding: 40px 40px 20px 40px; text-align: center;">
+              <div style="display: inline-block; padding: 12px 24px; border-width: 0px; margin-bottom: 24px;">
+                <h1 style="margin: 0; color: #0a66c2; font-size: 50px; font-weight: 700; letter-spacing: 0.5px;">JobFlow</h1>
+              </div>
+              <h2 style="margin: 0 0 16px 0; color: #0077b5; font-size: 28px; font-weight: 600;">Your Job Digest</h2>
+              <p style="margin: 0; color: #1a1a1a; font-size: 20px; font-weight: 500;">{{ scrapes }} scrape{{ 's' if scrapes != 1 }} found <span style="color: #0077b5; font-weight: 700;">{{ jobs_found }} jobs</span> matching your preferences</p>
+            </td>
+          </tr>
+          {% if jobs %}
+          <!-- New Jobs -->
+          <tr>
+            <td style="padding: 20px 40px;">
+              <div style="background-color: #f8f9fb; border-radius: 8px; padding: 24px; border-left: 4px solid #0a66c2;">
+                <h3 style="margin: 0 0 16px 0; color: #1a1a1a; font-size: 18px; font-weight: 600;">New Jobs</h3>
+                <table width="100%" cellpadding="0" cellspacing="0">
+                  {% for job in jobs %}
+                  <tr>
+                    <td style="padding: 8px 0; border-bottom: 1px solid #e5e9f0;">
+                      <a href="{{ job.url }}" style="color: #0077b5; font-size: 15px; font-weight: 600; text-decoration: none;">{{ job.title }}</a>
+                      <div style="color: #5e6d82; font-size: 13px; margin-top: 4px;">{{ job.company_name }} &middot; {{ job.location }}{% if job.salary %} &middot; {{ job.salary }}{% endif %}</div>
+                    </td>
+                  </tr>
+                  {% endfor %}
+                </table>
+                {% if more_jobs %}
+                <p style="margin: 16px 0 0 0; color: #5e6d82; font-size: 14px;">and {{ more_jobs }} more on your dashboard</p>
+                {% endif %}
+              </div>
+            </td>
+          </tr>
+          {% endif %}
+          {% if failures %}
+          <!-- Failed Scrapes -->
+          <tr>
+            <td style="padding: 0 40px 20px 40px;">
+              <div style="background-color: #fff5f5; border-radius: 8px; padding: 24px; border-left: 4px solid #dc3545;">
+                <h3 style="margin: 0 0 12px 0; color: #dc3545; font-size: 18px; font-weight: 600;">{{ failures|length }} scrape{{ 's' if failures|length != 1 }} failed</h3>
+                {% for failure in failures %}
+                <p style="margin: 0 0 8px 0; color: #5e6d82; font-size: 14px; line-height: 1.6;">{{ failure }}</p>
+                {% endfor %}
+              </div>
+            </td>
+          </tr>
+          {% endif %}
+          <!-- CTA Section -->
+          <tr>
+            <td style="padding: 20px 40px 40px 40px; text-align: center;">
+              <p style="margin: 0 0 24px 0; color: #1a1a1a; font-size: 16px; font-weight: 500;">Click the link below to view all your job matches</p>
+              <a href="{{ dashboard_url }}" style="display: inline-block; background: #0077b5; color: #ffffff; text-decoration: none; padding: 14px 40px; border-radius: 8px; font-size: 16px; font-weight: 600; box-shadow: 0 4px 12px rgba(10, 102, 194, 0.3);">View Dashboard</a>
+            </td>
+          </tr>
+
+          <!-- Footer -->
+          <tr>
+            <td style="padding: 24px 40px; background-color: #f8f9fb; border-top: 1px solid #e5e9f0; text-align: center;">
+              <p style="margin: 0; color: #5e6d82; font-size: 12px;">Copyright © 2026 JobFlow. All rights reserved.</p>
+            </td>
+          </tr>
+        </table>
+      </td>
+    </tr>
+  </table>
+</body>
+</html>
+"""
+
+MAIL_FROM = "jobflow.vercel.app@gmail.com"
+MAIL_SERVER = "smtp.gmail.com"
+MAIL_PORT = 587  # STARTTLS
+
+# Seconds a user_id -> email lookup is reused; emails rarely change and the
+# admin lookup is a blocking round trip to Supabase
+EMAIL_CACHE_TTL = 3600
+_email_cache = {}  # {user_id: (email, expires_at)}
+
+def lookup_user_email(user_id: str) -> Optional[str]:
+    """get_user_email with a per-process TTL cache (misses are not cached)"""
+    cached = _email_cache.get(user_id)
+    if cached and cached[1] > time.monotonic():
+        return cached[0]
+
+    email = get_user_email(user_id)
+    if email:
+        _email_cache[user_id] = (email, time.monotonic() + EMAIL_CACHE_TTL)
+    return email
+
+# ============================================================
+# TEMPLATES
+# ============================================================
+
+SUCCESS_TEMPLATE_NAME = "scrape_complete.html"
+FAILURE_TEMPLATE_NAME = "scrape_failed.html"
+DIGEST_TEMPLATE_NAME = "scrape_digest.html"
+
+EMAIL_TEMPLATES = {
+    SUCCESS_TEMPLATE_NAME: EMAIL_SUCCESS_TEMPLATE,
+    FAILURE_TEMPLATE_NAME: EMAIL_FAILURE_TEMPLATE,
+    DIGEST_TEMPLATE_NAME: EMAIL_DIGEST_TEMPLATE,
+}
+
+# Compiled templates are cached on disk too, so a freshly forked or recycled
+# worker child loads bytecode instead of re-parsing the HTML
+TEMPLATE_CACHE_DIR = os.path.join(tempfile.gettempdir(), "jobflow-email-templates")
+
+def create_template_environment(bytecode_cache: bool = True) -> Environment:
+    """
+    Jinja environment holding every email template
+    autoescape stays off so the rendered HTML is identical to what
+    Template(...) produced before
+    """
+    cache = None
+    if bytecode_cache:
+        os.makedirs(TEMPLATE_CACHE_DIR, exist_ok=True)
+        cache = FileSystemBytecodeCache(TEMPLATE_CACHE_DIR)
+
+    environment = Environment(
+        loader=DictLoader(EMAIL_TEMPLATES),
+        bytecode_cache=cache,
+        auto_reload=False,  # Sources are module constants, never changed at runtime
+        autoescape=False,
+    )
+    # Same value for every email - set once instead of passed on every render
+    environment.globals['dashboard_url'] = settings.allowed_origins
+    return environment
+
+_environment = None
+
+def get_email_template(name: str) -> Template:
+    """Compiled template from the shared environment, compiled on first use"""
+    global _environment
+    if _environment is None:
+        _environment = create_template_environment()
+    return _environment.get_template(name)
+
+def render_scrape_complete_email(jobs_found: int, preferences: Preference) -> str:
+    return get_email_template(SUCCESS_TEMPLATE_NAME).render(
         jobs_found=jobs_found,
         preferences=preferences,
-        dashboard_url=settings.allowed_origins
     )
-      
-    try:
-        to_email = get_user_email(user_id)
-
-        message = MessageSchema(
-          subject="Your scrape is complete!",
-          recipients=[to_email],
-          body=html_content,
-          subtype="html"
-        )
-
-        fm = FastMail(conf)
-        await fm.send_message(message)
-    
-    except Exception as e:
-        print(f'Email failed: {e}')
-        
-async def send_scrape_failed_email(user_id: str, update: ScrapeUpdateMessage, preferences: dict):
-    template = Template(EMAIL_FAILURE_TEMPLATE)
-    html_content = template.render(
+
+def render_scrape_failed_email(update: ScrapeUpdateMessage, preferences: dict) -> str:
+    return get_email_template(FAILURE_TEMPLATE_NAME).render(
         update=update,
         preferences=preferences,
-        dashboard_url=settings.allowed_origins
     )
-    
-    try:
-        to_email = get_user_email(user_id)
 
-        message = MessageSchema(
-          subject="Your scrape has failed",
-          recipients=[to_email],
-          body=html_content,
-          subtype="html"
-        )
+def build_scrape_email(user_id: str, update: ScrapeUpdateMessage, preferences: dict) -> Optional[EmailMessage]:
+    """
+    Render the notification for a finished scrape
+
+    Returns:
+        EmailMessage, or None if the user has no email address
+    """
+    to_email = lookup_user_email(user_id)
+    if not to_email:
+        print(f'Email skipped: no address for user {user_id}')
+        return None
+
+    message = EmailMessage()
+    message['From'] = MAIL_FROM
+    message['To'] = to_email
+    if update.status == Status.COMPLETED:
+        message['Subject'] = "Your scrape is complete!"
+        message.set_content(render_scrape_complete_email(update.jobs_found, preferences), subtype='html')
+    else:
+        message['Subject'] = "Your scrape has failed"
+        message.set_content(render_scrape_failed_email(update, preferences), subtype='html')
+    return message
+
+def send_scrape_emails(notifications: list[dict]) -> int:
+    """
+    Send a batch of scrape notifications over the pooled SMTP connections
+    Called from the email worker; blocks until the batch is sent
+
+    Args:
+        notifications: Dicts with user_id, update (ScrapeUpdateMessage dict) and preferences
 
-        fm = FastMail(conf)
-        await fm.send_message(message)
+    Returns:
+        Number of emails sent
+    """
+    messages = []
+    for notification in notifications:
+        try:
+            update = ScrapeUpdateMessage.model_validate(notification['update'])
+            message = build_scrape_email(notification['user_id'], update, notification['preferences'])
+        except Exception as e:
+            print(f'Email failed: {e}')
+            continue
+        if message is not None:
+            messages.append(message)
 
+    if not messages:
+        return 0
+
+    mailer = get_mailer(MAIL_SERVER, MAIL_PORT, MAIL_FROM, settings.email_password)
+    errors = mailer.send_many(messages)
+    for message, error in zip(messages, errors):
+        if error is not None:
+            print(f"Email failed for {message['To']}: {error}")
+
+    return sum(error is None for error in errors)
+
+# ============================================================
+# DIGESTS
+# ============================================================
+
+# Jobs listed in a digest; the rest are summarized as "and N more"
+DIGEST_MAX_JOBS = 20
+
+def digest_key(user_id: str) -> str:
+    return f"{settings.email_digest_key}:{user_id}"
+
+def digest_pending_key() -> str:
+    # Users with at least one outcome waiting for the next flush
+    return f"{settings.email_digest_key}:pending"
+
+def digest_last_job_key() -> str:
+    # Hash {user_id: highest job id already sent in a digest}
+    return f"{settings.email_digest_key}:last_job_id"
+
+def add_to_digest(r, notification: dict):
+    """
+    Hold a scrape outcome for the user's next digest instead of emailing now
+
+    Args:
+        r: Sync Redis client
+        notification: Dict with user_id, update and preferences (as queued by the worker)
+    """
+    pipe = r.pipeline()
+    pipe.rpush(digest_key(notification['user_id']), json.dumps(notification))
+    pipe.sadd(digest_pending_key(), notification['user_id'])
+    pipe.execute()
+
+def take_digest(r, user_id: str) -> list[dict]:
+    """Atomically read and clear one user's pending outcomes"""
+    pipe = r.pipeline()  # MULTI/EXEC - nothing pushed in between is lost
+    pipe.lrange(digest_key(user_id), 0, -1)
+    pipe.delete(digest_key(user_id))
+    pipe.srem(digest_pending_key(), user_id)
+    entries, _, _ = pipe.execute()
+    return [json.loads(entry) for entry in entries]
+
+def restore_digest(r, user_id: str, notifications: list[dict]):
+    """Put back outcomes taken for a digest that was not sent, ahead of any added since"""
+    if not notifications:
+        return
+    pipe = r.pipeline()
+    pipe.lpush(digest_key(user_id), *(json.dumps(n) for n in reversed(notifications)))
+    pipe.sadd(digest_pending_key(), user_id)
+    pipe.execute()
+
+def build_digest_email(r, user_id: str, notifications: list[dict]) -> tuple[Optional[EmailMessage], int]:
+    """
+    One email summarizing every scrape outcome in the window, listing the
+    jobs saved since the user's previous digest
+
+    Returns:
+        (EmailMessage, or None if the user has no email address; the job id to
+        store as the user's marker once the email has been sent)
+    """
+    # Job ids are serial, so "new since last digest" is everything above the marker.
+    # A user's first digest starts from the jobs they had when the window opened
+    last_job_id = r.hget(digest_last_job_key(), user_id)
+    if last_job_id is None:
+        window_start = datetime.now(timezone.utc) - timedelta(seconds=settings.email_digest_window)
+        last_job_id = get_last_job_id(user_id, window_start.isoformat())
+    last_job_id = int(last_job_id)
+
+    to_email = lookup_user_email(user_id)
+    if not to_email:
+        print(f'Digest skipped: no address for user {user_id}')
+        return None, last_job_id
+
+    updates = [ScrapeUpdateMessage.model_validate(n['update']) for n in notifications]
+    failures = [u.error_message or 'Unknown error' for u in updates if u.status != Status.COMPLETED]
+
+    jobs, total_new = get_jobs_since(user_id, last_job_id, DIGEST_MAX_JOBS)
+
+    html_content = get_email_template(DIGEST_TEMPLATE_NAME).render(
+        scrapes=len(updates),
+        jobs_found=sum(u.jobs_found for u in updates),
+        jobs=jobs,
+        more_jobs=max(0, total_new - len(jobs)),
+        failures=failures,
+    )
+
+    message = EmailMessage()
+    message['From'] = MAIL_FROM
+    message['To'] = to_email
+    message['Subject'] = f"Your JobFlow digest: {total_new} new job{'s' if total_new != 1 else ''}"
+    message.set_content(html_content, subtype='html')
+    return message, max([job.id for job in jobs], default=last_job_id)
+
+def send_digest_emails(r) -> int:
+    """
+    Flush every pending digest - one email per user, sent over the pooled mailer
+    Called by the periodic digest task in the email worker
+
+    Args:
+        r: Sync Redis client
+
+    Returns:
+        Number of emails sent
+    """
+    messages, taken = [], []
+    for user_id in r.smembers(digest_pending_key()):
+        user_id = user_id.decode('utf-8') if isinstance(user_id, bytes) else user_id
+        notifications = []
+        try:
+            notifications = take_digest(r, user_id)
+            if not notifications:
+                continue
+            message, last_job_id = build_digest_email(r, user_id, notifications)
+        except Exception as e:
+            print(f'Digest failed for user {user_id}: {e}')
+            restore_digest(r, user_id, notifications)
+            continue
+        if message is not None:
+            messages.append(message)
+            taken.append((user_id, notifications, last_job_id))
+
+    if not messages:
+        return 0
+
+    mailer = get_mailer(MAIL_SERVER, MAIL_PORT, MAIL_FROM, settings.email_password)
+    try:
+        errors = mailer.send_many(messages)
     except Exception as e:
-        print(f'Email failed: {e}')
-           
+        errors = [e] * len(messages)
+    for message, (user_id, notifications, last_job_id), error in zip(messages, taken, errors):
+        if error is not None:
+            # Held for the next flush, and the marker stays, so it lists the same jobs
+            print(f"Digest failed for {message['To']}: {error}")
+            restore_digest(r, user_id, notifications)
+        else:
+            r.hset(digest_last_job_key(), user_id, last_job_id)
+
+    return sum(error is None for error in errors)
@@ -0,0 +1,161 @@
+"""
+Pooled async SMTP mailer for the email worker
+Keeps authenticated SMTP connections open between Celery tasks on one
+long-lived event loop, so a notification costs one SMTP transaction instead
+of a new loop, TCP connect, STARTTLS and login
+"""
+
+import time
+import atexit
+import asyncio
+import threading
+import aiosmtplib
+from email.message import EmailMessage
+from typing import Optional
+
+class SMTPPool:
+    """
+    Small pool of logged-in SMTP connections
+
+    Args:
+        hostname: SMTP server
+        port: SMTP port (587 uses STARTTLS)
+        username: Login user
+        password: Login password
+        size: Maximum open connections
+        idle_timeout: Seconds idle after which a connection is checked with NOOP
+            before reuse (Gmail drops idle sessions after a few minutes)
+    """
+
+    def __init__(self, hostname: str, port: int, username: str, password: str,
+                 size: int = 2, idle_timeout: float = 60):
+        self.hostname = hostname
+        self.port = port
+        self.username = username
+        self.password = password
+        self.size = size
+        self.idle_timeout = idle_timeout
+
+        self.idle = []  # [(client, last_used)]
+        self.open = 0
+        self.available = None  # Semaphore, created on the pool's loop
+
+    async def _connect(self) -> aiosmtplib.SMTP:
+        client = aiosmtplib.SMTP(hostname=self.hostname, port=self.port, start_tls=True, timeout=30)
+        await client.connect()
+        await client.login(self.username, self.password)
+        return client
+
+    async def acquire(self) -> aiosmtplib.SMTP:
+        if self.available is None:
+            self.available = asyncio.Semaphore(self.size)
+        await self.available.acquire()
+
+        try:
+            while self.idle:
+                client, last_used = self.idle.pop()
+                if not client.is_connected:
+                    self.open -= 1
+                    continue
+                if time.monotonic() - last_used > self.idle_timeout:
+                    try:
+                        await client.noop()
+                    except aiosmtplib.SMTPException:
+                        await self._discard(client)
+                        continue
+                return client
+
+            client = await self._connect()
+            self.open += 1
+            return client
+        except Exception:
+            self.available.release()
+            raise
+
+    async def release(self, client: aiosmtplib.SMTP, healthy: bool = True):
+        if healthy and client.is_connected:
+            self.idle.append((client, time.monotonic()))
+        else:
+            await self._discard(client)
+        self.available.release()
+
+    async def _discard(self, client: aiosmtplib.SMTP):
+        self.open -= 1
+        try:
+            client.close()
+        except Exception:
+            pass
+
+    async def send(self, message: EmailMessage):
+        """Send one message, retrying once on a fresh connection if the pooled one went stale"""
+        for attempt in range(2):
+            client = await self.acquire()
+            try:
+                await client.send_message(message)
+            except aiosmtplib.SMTPServerDisconnected:
+                await self.release(client, healthy=False)
+                if attempt:
+                    raise
+                continue
+            except Exception:
+                await self.release(client, healthy=False)
+                raise
+            await self.release(client)
+            return
+
+    async def send_many(self, messages: list[EmailMessage]) -> list[Optional[Exception]]:
+        """Send a batch over the pool; returns None or the exception for each message"""
+        results = await asyncio.gather(*(self.send(m) for m in messages), return_exceptions=True)
+        return [r if isinstance(r, Exception) else None for r in results]
+
+    async def close(self):
+        while self.idle:
+            client, _ = self.idle.pop()
+            self.open -= 1
+            try:
+                await client.quit()
+            except Exception:
+                client.close()
+
+class Mailer:
+    """
+    SMTPPool running on a background event loop thread
+    Celery tasks are sync, so they hand coroutines to this loop instead of
+    calling asyncio.run, which would close the loop and its connections
+    """
+
+    def __init__(self, pool: SMTPPool):
+        self.pool = pool
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, name='mailer', daemon=True)
+        self.thread.start()
+
+    def run(self, coro, timeout: float = 120):
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result(timeout)
+
+    def send_many(self, messages: list[EmailMessage]) -> list[Optional[Exception]]:
+        return self.run(self.pool.send_many(messages))
+
+    def close(self):
+        try:
+            self.run(self.pool.close(), timeout=10)
+        except Exception:
+            pass
+        self.loop.call_soon_threadsafe(self.loop.stop)
+
+_mailers = {}
+_lock = threading.Lock()
+
+def get_mailer(hostname: str, port: int, username: str, password: str, size: int = 2) -> Mailer:
+    """
+    Process-wide mailer per SMTP account, started on first use
+    Created lazily so each forked Celery child gets its own loop thread
+    """
+    key = (hostname, port, username)
+    with _lock:
+        mailer = _mailers.get(key)
+        if mailer is None:
+            mailer = Mailer(SMTPPool(hostname, port, username, password, size=size))
+            _mailers[key] = mailer
+            atexit.register(mailer.close)
+        return mailer
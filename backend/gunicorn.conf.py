@@ -0,0 +1,68 @@
+"""
+Gunicorn config for production serving
+Runs N uvicorn worker processes (uvloop + httptools when installed), sized
+to the CPUs this container may actually use
+
+Usage: gunicorn app.main:app -c gunicorn.conf.py
+Override with WEB_CONCURRENCY (worker count) and PORT
+"""
+
+import os
+
+def available_cpus():
+    """CPUs usable by this process - respects affinity and the cgroup v2 quota"""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:  # Not available on macOS
+        cpus = os.cpu_count() or 1
+
+    # Containers limited with --cpus see every host core in sched_getaffinity
+    try:
+        with open('/sys/fs/cgroup/cpu.max') as f:
+            quota, period = f.read().split()
+        if quota != 'max':
+            cpus = min(cpus, max(1, int(quota) // int(period)))
+    except (OSError, ValueError):
+        pass
+
+    return cpus
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+
+# The API is I/O bound, so one worker per core; each worker also runs sync
+# database calls in its own threadpool
+workers = int(os.environ.get('WEB_CONCURRENCY', available_cpus()))
+
+# Picks uvloop and httptools automatically when they are installed
+worker_class = 'uvicorn_worker.UvicornWorker'
+
+# Each worker opens its own Redis and Supabase clients in the lifespan hook,
+# so the app is imported after fork rather than shared from the master
+preload_app = False
+
+# SIGTERM: stop accepting, let requests finish and WebSockets close (1001),
+# then force-kill whatever is left
+graceful_timeout = 30
+timeout = 60
+keepalive = 5
+
+# Recycle workers now and then to cap slow memory growth; jitter keeps them
+# from restarting together
+max_requests = 10000
+max_requests_jitter = 1000
+
+accesslog = '-'
+errorlog = '-'
+loglevel = os.environ.get('GUNICORN_LOG_LEVEL', 'info')
+
+# Behind Railway / Render proxies
+forwarded_allow_ips = '*'
+
+def on_starting(server):
+    # Multiprocess metrics files from a previous run would be summed into this one
+    multiproc_dir = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+    if multiproc_dir:
+        os.makedirs(multiproc_dir, exist_ok=True)
+        for name in os.listdir(multiproc_dir):
+            if name.endswith('.db'):
+                os.remove(os.path.join(multiproc_dir, name))
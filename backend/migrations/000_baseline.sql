@@ -0,0 +1,42 @@
+-- Baseline: the tables as they stood when migrations started being kept here
+-- Everything is "if not exists", so on the live Supabase database this changes
+-- nothing, and on an empty Postgres (local, CI) it creates what the code expects.
+-- Later files change the schema (scrape_runs came later: 003); never edit this one.
+
+create table if not exists jobs (
+    id bigint generated by default as identity primary key,
+    user_id uuid not null references auth.users (id) on delete cascade,
+    title text not null,
+    company_name text not null,
+    location text not null,
+    job_type text,
+    salary text,
+    url text not null,
+    description text,
+    benefits text,
+    priority boolean not null default false,
+    created_at timestamptz not null default now()
+);
+
+create table if not exists preferences (
+    user_id uuid primary key references auth.users (id) on delete cascade,
+    title text,
+    company_name text,
+    location text,
+    job_type text,
+    salary text,
+    description text,
+    benefits text,
+    radius integer,
+    scrape_length integer default 25
+);
+
+create table if not exists user_statistics (
+    user_id uuid primary key references auth.users (id) on delete cascade,
+    total_jobs integer not null default 0,
+    current_jobs integer not null default 0,
+    saved_jobs integer not null default 0,
+    completed_jobs integer not null default 0,
+    total_scrapes integer not null default 0,
+    latest_scrape timestamptz
+);
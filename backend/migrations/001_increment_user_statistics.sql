@@ -0,0 +1,48 @@
+-- Atomic user_statistics counters
+-- Adds deltas in a single UPDATE, so concurrent scrapes and dashboard clicks for
+-- the same user cannot lose increments (the row lock serialises them) and each
+-- change is one round trip instead of a read and a write.
+-- Called through PostgREST: supabase.rpc('increment_user_statistics', {...})
+-- by database_service.increment_user_statistics and the spider.
+-- A user without a statistics row is left alone, as before.
+--
+-- The application maintains every counter through this function - there is no
+-- trigger on jobs, and none may be added without removing these calls, or
+-- changes would be counted twice:
+--   total_jobs      +1 per job the spider saves
+--   current_jobs    +1 per job saved, -1 per job deleted or completed (single or bulk)
+--   saved_jobs      +1/-1 per priority set/cleared, -1 per priority job deleted or completed
+--   completed_jobs  +1 per job completed
+--   total_scrapes   +1 per user per finished crawl
+
+create or replace function increment_user_statistics(
+    p_user_id uuid,
+    p_total_jobs integer default 0,
+    p_current_jobs integer default 0,
+    p_saved_jobs integer default 0,
+    p_completed_jobs integer default 0,
+    p_total_scrapes integer default 0,
+    p_latest_scrape timestamptz default null
+)
+returns setof user_statistics
+language sql
+as $$
+    update user_statistics
+    set total_jobs = total_jobs + p_total_jobs,
+        current_jobs = current_jobs + p_current_jobs,
+        saved_jobs = saved_jobs + p_saved_jobs,
+        completed_jobs = completed_jobs + p_completed_jobs,
+        total_scrapes = total_scrapes + p_total_scrapes,
+        latest_scrape = coalesce(p_latest_scrape, latest_scrape)
+    where user_id = p_user_id
+    returning *;
+$$;
+
+-- The API and the spider use the service role key; nobody else may call it
+revoke execute on function increment_user_statistics(uuid, integer, integer, integer, integer, integer, timestamptz) from public, anon, authenticated;
+
+-- Until now saves never added to current_jobs, deletes never took from it and
+-- toggles never moved saved_jobs: start both from the jobs table
+update user_statistics s
+set current_jobs = (select count(*) from jobs j where j.user_id = s.user_id),
+    saved_jobs = (select count(*) from jobs j where j.user_id = s.user_id and j.priority);
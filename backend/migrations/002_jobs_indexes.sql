@@ -0,0 +1,50 @@
+-- Hot-path indexes on jobs and a unique job key
+-- Every frontend query filters on user_id and sorts by priority desc, title;
+-- the spider's duplicate check probes (user_id, title, company_name, location).
+-- The unique key also lets the spider insert with ON CONFLICT DO NOTHING in one
+-- round trip instead of a lookup and an insert, and closes the race where two
+-- scrapes for the same user both insert a job.
+-- Check the plans with: python scripts/migrate.py --explain
+
+-- Kept from the scraped item - Indeed's job key and the listing's publication date
+alter table jobs add column if not exists external_id text;
+alter table jobs add column if not exists posted_date date;
+
+-- Existing duplicates would stop the unique index being built: keep one per key,
+-- a priority one if any, otherwise the oldest. The counters the app maintains
+-- (001) lose what was deleted, as any other delete would take it off them
+with deleted as (
+    delete from jobs
+    where id in (
+        select id
+        from (
+            select id, row_number() over (
+                partition by user_id, title, company_name, location
+                order by priority desc, id
+            ) as position
+            from jobs
+        ) ranked
+        where position > 1
+    )
+    returning user_id, priority
+), removed as (
+    select user_id, count(*) as jobs, count(*) filter (where priority) as saved
+    from deleted
+    group by user_id
+)
+update user_statistics s
+set current_jobs = s.current_jobs - removed.jobs,
+    saved_jobs = s.saved_jobs - removed.saved
+from removed
+where s.user_id = removed.user_id;
+
+-- Duplicate check and ON CONFLICT target
+create unique index if not exists jobs_user_title_company_location_key
+    on jobs (user_id, title, company_name, location);
+
+-- get_jobs / search_jobs: user_id = ? order by priority desc, title
+-- get_priority_jobs: user_id = ? and priority order by title
+create index if not exists jobs_user_priority_title_idx
+    on jobs (user_id, priority desc, title);
+
+analyze jobs;
@@ -0,0 +1,21 @@
+-- scrape_runs: one row per user per finished scrape, with its ScrapeMetrics
+-- (scraper_service.complete_runs -> database_service.create_scrape_runs)
+-- Tables created from the first documented DDL have no run_id, and every insert
+-- fails without it - add it. Nullable: rows recorded before it have none.
+
+create table if not exists scrape_runs (
+    id bigint generated always as identity primary key,
+    run_id text,
+    user_id uuid not null references auth.users (id) on delete cascade,
+    status text not null,
+    jobs_found integer not null default 0,
+    error_message text,
+    metrics jsonb,
+    created_at timestamptz not null default now()
+);
+
+alter table scrape_runs add column if not exists run_id text;
+
+create index if not exists scrape_runs_user_id_created_at_idx on scrape_runs (user_id, created_at desc);
+-- Every user's row of one run, matching the run_id in the logs
+create index if not exists scrape_runs_run_id_idx on scrape_runs (run_id);
@@ -0,0 +1,77 @@
+"""
+Crawl planner for JobFlow
+Users whose preferences translate to the same Indeed search request the same
+result pages. Pending scrapes are collected in Redis and merged into one crawl
+per distinct search; the spider fans every parsed card out
+to each subscriber's own filters, so page loads scale with distinct searches
+rather than with users. A search is the full set of title x location queries
+the preferences ask for, plus the radius
+
+    crawl_plan:pending    list of {"user_id", "preferences"} waiting to be planned (scheduled)
+    crawl_plan:manual     the same for scrapes users start from the dashboard
+    crawl_plan:manual:flush  set while a flush of the manual list is queued
+
+A plan is plain JSON so it can travel through Celery and the spider's argv:
+    {"search": {"queries": [[q, l], ...], "radius": ...},
+     "subscribers": [{"user_id": ..., "preferences": {...}}, ...]}
+"""
+
+import json
+
+from scraper.indeed_scraper.matching import search_queries, search_key, parse_radius
+
+PENDING_KEY = "crawl_plan:pending"
+MANUAL_PENDING_KEY = "crawl_plan:manual"
+MANUAL_FLUSH_KEY = f"{MANUAL_PENDING_KEY}:flush"
+
+def enqueue_scrape(r, user_id: str, preferences: dict, key: str = PENDING_KEY):
+    """Add a scrape to a pending list for the next planning pass"""
+    r.rpush(key, json.dumps({'user_id': user_id, 'preferences': preferences}))
+
+def take_pending(r, key: str = PENDING_KEY) -> list[dict]:
+    """Atomically take every scrape on a pending list"""
+    pipe = r.pipeline()
+    pipe.lrange(key, 0, -1)
+    pipe.delete(key)
+    items, _ = pipe.execute()
+    return [json.loads(item) for item in items]
+
+def return_pending(r, plans: list[dict]):
+    """Put the subscribers of undispatched plans back at the front of the pending list"""
+    items = [json.dumps(subscriber) for plan in plans for subscriber in plan['subscribers']]
+    if items:
+        # LPUSH prepends one at a time - reverse so the original order is kept
+        r.lpush(PENDING_KEY, *reversed(items))
+
+def build_plans(pending: list[dict]) -> list[dict]:
+    """
+    Merge pending scrapes into one plan per distinct search
+
+    A user pending more than once keeps only their latest preferences.
+    Plans come out in the order their first subscriber was queued
+
+    Args:
+        pending: [{"user_id", "preferences"}, ...] oldest first
+
+    Returns:
+        List of crawl plans
+    """
+    latest = {}
+    for scrape in pending:
+        # Re-inserting moves the user to their latest position
+        latest.pop(scrape['user_id'], None)
+        latest[scrape['user_id']] = scrape['preferences']
+
+    plans = {}
+    for user_id, preferences in latest.items():
+        key = search_key(preferences)
+        if key not in plans:
+            search = {'queries': [list(query) for query in search_queries(preferences)],
+                      'radius': parse_radius(preferences.get('radius'))}
+            plans[key] = {'search': search, 'subscribers': []}
+        plans[key]['subscribers'].append({'user_id': user_id, 'preferences': preferences})
+
+    return list(plans.values())
+
+def plan_user_ids(plan: dict) -> list[str]:
+    return [subscriber['user_id'] for subscriber in plan['subscribers']]
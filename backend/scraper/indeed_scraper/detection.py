@@ -0,0 +1,64 @@
+"""
+Response classification for Indeed search pages
+Decides whether a fetched page is usable or was a bot check
+"""
+
+# Verdicts
+OK = 'ok'
+CHALLENGE = 'challenge'          # Cloudflare / hCaptcha interstitial, needs a real browser
+BLOCKED = 'blocked'              # Hard HTTP error (403, 429, 5xx) with no challenge body
+AUTH_REDIRECT = 'auth_redirect'  # Bounced to secure.indeed.com/auth
+
+AUTH_REDIRECT_MARKER = 'secure.indeed.com/auth'
+
+# Only markers that appear on interstitials - Cloudflare injects its
+# challenge-platform script into normal pages too, so that one is not used
+CHALLENGE_MARKERS = (
+    b'<title>Just a moment...</title>',
+    b'cf_chl_opt',
+    b'cf-turnstile',
+    b'Verify you are human',
+    b'Additional Verification Required',
+    b'h-captcha',
+)
+
+REDIRECT_STATUSES = (301, 302, 303, 307, 308)
+
+def is_auth_redirect(response):
+    """True if the response is, or points at, Indeed's login wall"""
+    if AUTH_REDIRECT_MARKER in response.url:
+        return True
+
+    location = response.headers.get('Location')
+    return bool(location) and AUTH_REDIRECT_MARKER.encode() in location
+
+def is_challenge_page(response):
+    """True if the body is a bot check rather than search results"""
+    body = response.body
+    return any(marker in body for marker in CHALLENGE_MARKERS)
+
+def classify_response(response):
+    """
+    Classify a search page response
+
+    Args:
+        response: Scrapy response (plain HTTP or Playwright rendered)
+
+    Returns:
+        One of OK, CHALLENGE, BLOCKED, AUTH_REDIRECT
+    """
+    if is_auth_redirect(response):
+        return AUTH_REDIRECT
+
+    if is_challenge_page(response):
+        return CHALLENGE
+
+    # Redirects are not followed on the plain HTTP tier; anything other than
+    # the auth wall is treated as a challenge so the browser can follow it
+    if response.status in REDIRECT_STATUSES:
+        return CHALLENGE
+
+    if response.status >= 400:
+        return BLOCKED
+
+    return OK
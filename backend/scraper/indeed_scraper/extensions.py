@@ -0,0 +1,162 @@
+"""
+Browser watchdog
+Samples open Playwright pages and the memory of the browser processes while a
+crawl runs and reports the peaks when the spider closes, so a page leak or a
+growing Chromium shows up in the scrape's log and stats
+
+Settings:
+    BROWSER_WATCHDOG_INTERVAL: Seconds between samples, 0 disables the watchdog
+    PLAYWRIGHT_MAX_PAGES_PER_CONTEXT / PLAYWRIGHT_MAX_CONTEXTS: Open pages
+        above their product mean pages are not being closed
+"""
+
+import os
+
+from scrapy import signals
+from scrapy.exceptions import NotConfigured
+from twisted.internet import task
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+MB = 1024 * 1024
+
+def _proc_children():
+    """{ppid: [pid, ...]} for every process, read from /proc"""
+    children = {}
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as f:
+                stat = f.read()
+        except OSError:
+            continue  # Exited while listing
+        # The command name may contain spaces and parentheses - fields resume after the last ')'
+        ppid = int(stat.rsplit(')', 1)[1].split()[1])
+        children.setdefault(ppid, []).append(int(entry))
+    return children
+
+def _proc_rss(pid):
+    try:
+        with open(f'/proc/{pid}/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, IndexError, ValueError):
+        return 0
+
+def process_tree_rss():
+    """
+    RSS of this process and of everything it started (Playwright driver, Chromium)
+    Shared pages are counted once per process, so the browser figure runs high
+
+    Returns:
+        (own bytes, descendants bytes), or (None, None) when neither psutil nor /proc is available
+    """
+    if psutil is not None:
+        me = psutil.Process()
+        descendants = 0
+        for child in me.children(recursive=True):
+            try:
+                descendants += child.memory_info().rss
+            except psutil.Error:
+                pass
+        return me.memory_info().rss, descendants
+
+    try:
+        children = _proc_children()
+    except OSError:
+        return None, None
+
+    descendants = 0
+    stack = list(children.get(os.getpid(), []))
+    while stack:
+        pid = stack.pop()
+        descendants += _proc_rss(pid)
+        stack.extend(children.get(pid, []))
+    return _proc_rss(os.getpid()), descendants
+
+class BrowserWatchdog:
+    """Peak open pages, contexts and browser RSS per crawl"""
+
+    def __init__(self, crawler, interval):
+        self.crawler = crawler
+        self.interval = interval
+        self.task = None
+
+        settings = crawler.settings
+        max_pages = settings.getint('PLAYWRIGHT_MAX_PAGES_PER_CONTEXT')
+        max_contexts = settings.getint('PLAYWRIGHT_MAX_CONTEXTS')
+        self.page_limit = max_pages * max_contexts if max_pages and max_contexts else None
+
+        self.peak_pages = 0
+        self.peak_contexts = 0
+        self.peak_own_rss = 0
+        self.peak_browser_rss = 0
+        self.warned = False
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        interval = crawler.settings.getfloat('BROWSER_WATCHDOG_INTERVAL', 10)
+        if interval <= 0:
+            raise NotConfigured
+        s = cls(crawler, interval)
+        crawler.signals.connect(s.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(s.spider_closed, signal=signals.spider_closed)
+        return s
+
+    def open_pages(self):
+        """
+        (open pages, open contexts) in the Playwright download handler
+        None until a browser request has loaded the handler
+        """
+        try:
+            handler = self.crawler.engine.downloader.handlers._handlers.get('https')
+        except AttributeError:
+            return None
+        wrappers = getattr(handler, 'context_wrappers', None)
+        if wrappers is None:
+            return None
+        contexts = list(wrappers.values())
+        return sum(len(wrapper.context.pages) for wrapper in contexts), len(contexts)
+
+    def sample(self, spider):
+        usage = self.open_pages()
+        if usage is not None:
+            pages, contexts = usage
+            self.peak_pages = max(self.peak_pages, pages)
+            self.peak_contexts = max(self.peak_contexts, contexts)
+            if self.page_limit and pages > self.page_limit and not self.warned:
+                self.warned = True
+                spider.logger.warning(f"Browser watchdog: {pages} pages open, above the "
+                                      f"{self.page_limit} the context limits allow - pages are not being closed")
+
+        own_rss, browser_rss = process_tree_rss()
+        if own_rss is not None:
+            self.peak_own_rss = max(self.peak_own_rss, own_rss)
+            self.peak_browser_rss = max(self.peak_browser_rss, browser_rss)
+
+    def spider_opened(self, spider):
+        self.task = task.LoopingCall(self.sample, spider)
+        self.task.start(self.interval, now=True)
+
+    def spider_closed(self, spider, reason):
+        if self.task is not None and self.task.running:
+            self.task.stop()
+        self.sample(spider)
+
+        # Pages still open now were never closed by a callback
+        usage = self.open_pages()
+        open_at_close = usage[0] if usage else 0
+
+        stats = self.crawler.stats
+        stats.set_value('browser_watchdog/peak_open_pages', self.peak_pages)
+        stats.set_value('browser_watchdog/peak_contexts', self.peak_contexts)
+        stats.set_value('browser_watchdog/open_pages_at_close', open_at_close)
+        stats.set_value('browser_watchdog/peak_spider_rss_mb', round(self.peak_own_rss / MB, 1))
+        stats.set_value('browser_watchdog/peak_browser_rss_mb', round(self.peak_browser_rss / MB, 1))
+
+        spider.logger.info(f"Browser watchdog: peak {self.peak_pages} open page(s) in {self.peak_contexts} context(s), "
+                           f"{open_at_close} open at close, peak RSS spider {self.peak_own_rss / MB:.0f} MB, "
+                           f"browser {self.peak_browser_rss / MB:.0f} MB")
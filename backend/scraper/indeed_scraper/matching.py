@@ -0,0 +1,184 @@
+"""
+Per-user preference matching
+One PreferenceMatcher per user, so a single crawl can fan its parsed jobs out
+to every user whose search it serves (see scraper/crawl_planner.py)
+"""
+
+import json
+import logging
+
+def parse_filter(value):
+    """Comma-separated preference -> lowercase list, None when unset (null, empty or 'null')"""
+    if value and value != 'null' and str(value).strip():
+        # Filters out any potential empty strings after splitting
+        return [v.strip().lower() for v in str(value).split(',') if v.strip()] or None
+    return None
+
+def parse_radius(value):
+    if value and value != 'null' and str(value).strip():
+        try:
+            return int(value)
+        except (ValueError, TypeError):
+            return None
+    return None
+
+# Cap on title x location searches per crawl - they share one page budget,
+# so every extra query leaves fewer pages for the others
+MAX_SEARCH_QUERIES = 6
+
+def split_unique(value):
+    """Comma-separated preference -> stripped values, case-insensitive duplicates dropped, order kept"""
+    values = {}
+    for v in str(value).split(','):
+        v = v.strip()
+        if v and v.lower() not in values:
+            values[v.lower()] = v
+    return list(values.values())
+
+def search_queries(preferences):
+    """
+    Every Indeed search the preferences ask for: each title in each location,
+    in preference order (first title in every location, then the second title...)
+
+    Returns:
+        [(query, location), ...] - at most MAX_SEARCH_QUERIES
+    """
+    titles = split_unique(preferences['title'])
+    locations = split_unique(preferences['location'])
+    return [(title, location) for title in titles for location in locations][:MAX_SEARCH_QUERIES]
+
+def search_key(preferences):
+    """Preferences with equal keys request the same Indeed pages, so can share one crawl"""
+    queries = sorted({(query.lower(), location.lower()) for query, location in search_queries(preferences)})
+    return (tuple(queries), parse_radius(preferences.get('radius')))
+
+class PreferenceMatcher:
+    """
+    One user's filters and save budget within a crawl
+
+    Args:
+        user_id: User the matched jobs are saved for
+        preferences: Preference dict (or JSON string) with at least title and location
+        logger: Logger for filter decisions, the spider's by default
+    """
+
+    def __init__(self, user_id, preferences, logger=None):
+        if not user_id:
+            raise ValueError("user_id parameter is required")
+        self.user_id = user_id
+        self.logger = logger or logging.getLogger(__name__)
+
+        # Handle both programmatic (dict) and command line (JSON string) calls
+        if preferences is None:
+            raise ValueError("preferences parameter is required")
+
+        if isinstance(preferences, str):
+            try:
+                preferences = json.loads(preferences)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"Invalid JSON in preferences parameter: {e}")
+
+        # Validate required preferences
+        if not preferences.get('title') or not preferences.get('location'):
+            raise ValueError("preferences must contain 'title' and 'location' fields")
+
+        self.preferences = preferences
+
+        # Searches to crawl - the first title in the first location is the primary one
+        self.queries = search_queries(preferences)
+        if not self.queries:
+            raise ValueError("preferences must contain 'title' and 'location' fields")
+        self.query, self.location = self.queries[0]
+        self.radius = parse_radius(preferences.get('radius'))
+        self.search_key = search_key(preferences)
+
+        # Store all preferences as lists for filtering - handle null/empty values
+        self.preferred_titles = [t.strip().lower() for t in preferences['title'].split(',')]
+        self.preferred_locations = [l.strip().lower() for l in preferences['location'].split(',')]
+        self.preferred_company_name = parse_filter(preferences.get('company_name'))
+        self.preferred_job_types = parse_filter(preferences.get('job_type'))
+        self.preferred_salaries = parse_filter(preferences.get('salary'))
+        self.preferred_descriptions = parse_filter(preferences.get('description'))
+        self.preferred_benefits = parse_filter(preferences.get('benefits'))
+
+        self.max_results = int(preferences['scrape_length'])
+        self.jobs_scraped = 0
+
+    @property
+    def full(self):
+        return self.jobs_scraped >= self.max_results
+
+    def matches(self, job_data):
+        """Filter jobs based on user preferences using OR logic"""
+
+        job_title = job_data.get('title').lower()
+        job_company = job_data.get('company_name').lower()
+        job_location = (job_data.get('location') or '').lower()
+        job_type = (job_data.get('job_type') or '').lower()
+        job_description = (job_data.get('description') or '').lower()
+        job_salary = (job_data.get('salary') or '').lower()
+        job_benefits = (job_data.get('benefits') or '').lower()
+
+        # Per-card debug lines are sampled (app/core/logs.py) and formatted only when emitted
+        self.logger.debug("=== PREFERENCE CHECK (%s) ===", self.user_id)
+
+        # Check if job matches ANY of the title preferences (case-insensitive substring)
+        if self.preferred_titles:
+            title_match = any(pref_title.lower().strip() in job_title.lower().strip()
+                            for pref_title in self.preferred_titles if pref_title.strip())
+            if not title_match:
+                self.logger.debug("❌ FILTERED OUT: No title match. Prefer: %s, actual: %s", self.preferred_titles, job_title)
+                return False
+
+        # Check if job matches ANY of the location preferences (case-insensitive substring)
+        if self.preferred_locations:
+            location_match = any(pref_loc.lower().strip() in job_location.lower().strip()
+                               for pref_loc in self.preferred_locations if pref_loc.strip())
+            if not location_match:
+                self.logger.debug("❌ FILTERED OUT: No location match. Prefer: %s, actual: %s", self.preferred_locations, job_location)
+                return False
+
+        # Check if job matches ANY of the company preferences (case-insensitive substring)
+        if self.preferred_company_name:
+            title_match = any(pref_company.lower().strip() in job_company.lower().strip()
+                            for pref_company in self.preferred_company_name if pref_company.strip())
+            if not title_match:
+                self.logger.debug("❌ FILTERED OUT: No company match. Prefer: %s, actual: %s", self.preferred_company_name, job_company)
+                return False
+
+        # Check if job matches ANY of the job type preferences (case-insensitive substring) --- checks both title and job type
+        if self.preferred_job_types:
+            job_type_match = any(pref_type.lower().strip() in job_type.lower().strip() or
+                                pref_type.lower().strip() in job_title.lower().strip()
+                               for pref_type in self.preferred_job_types if pref_type.strip())
+            if not job_type_match:
+                self.logger.debug("❌ FILTERED OUT: No job type match. Prefer: %s, actual: %s", self.preferred_job_types, job_type)
+                return False
+
+        # Check if job matches ANY of the description keywords (case-insensitive substring) --- checks both title and description
+        if self.preferred_descriptions:
+            desc_match = any(keyword.lower().strip() in job_description.lower().strip() or
+                           keyword.lower().strip() in job_title.lower().strip()
+                           for keyword in self.preferred_descriptions if keyword.strip())
+            if not desc_match:
+                self.logger.debug("❌ FILTERED OUT: No description match. Prefer: %s, actual: %s", self.preferred_descriptions, job_description)
+                return False
+
+        # Check if job matches ANY of the salary preferences (case-insensitive substring)
+        if self.preferred_salaries:
+            salary_match = any(pref_salary.lower().strip() in job_salary.lower().strip()
+                             for pref_salary in self.preferred_salaries if pref_salary.strip())
+            if not salary_match:
+                self.logger.debug("❌ FILTERED OUT: No salary match. Prefer: %s, actual: %s", self.preferred_salaries, job_salary)
+                return False
+
+        # Check if job matches ANY of the benefits preferences (case-insensitive substring)
+        if self.preferred_benefits:
+            benefits_match = any(pref_benefit.lower().strip() in job_benefits.lower().strip()
+                               for pref_benefit in self.preferred_benefits if pref_benefit.strip())
+            if not benefits_match:
+                self.logger.debug("❌ FILTERED OUT: No benefits match. Prefer: %s, actual: %s", self.preferred_benefits, job_benefits)
+                return False
+
+        self.logger.debug("✅ PASSED ALL FILTERS - Job accepted!")
+        return True
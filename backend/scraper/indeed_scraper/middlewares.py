@@ -3,11 +3,20 @@
 # See documentation in:
 # https://docs.scrapy.org/en/latest/topics/spider-middleware.html
 
+import asyncio
+import inspect
+import time
+
 from scrapy import signals
+from scrapy.exceptions import NotConfigured
+from scrapy.downloadermiddlewares.httpcompression import HttpCompressionMiddleware
 
 # useful for handling different item types with a single interface
 from itemadapter import ItemAdapter
 
+from indeed_scraper.detection import classify_response, OK, CHALLENGE
+from indeed_scraper.proxies import get_proxy_pool, get_proxy, assign_proxy
+
 
 class IndeedScraperSpiderMiddleware:
     # Not all methods need to be defined. If a method is not defined,
@@ -53,51 +62,181 @@ class IndeedScraperSpiderMiddleware:
         spider.logger.info("Spider opened: %s" % spider.name)
 
 
-class IndeedScraperDownloaderMiddleware:
-    # Not all methods need to be defined. If a method is not defined,
-    # scrapy acts as if the downloader middleware does not modify the
-    # passed objects.
+class TokenBucket:
+    """Classic token bucket - rate tokens per second, bursts up to capacity"""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self):
+        self._refill()
+        while self.tokens < 1:
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+            self._refill()
+        self.tokens -= 1
+
+
+class BanAwareThrottleMiddleware:
+    """
+    Adaptive throttling for Indeed downloads
+
+    - Per-proxy token bucket so no single exit IP is hammered
+    - AIMD concurrency: +1 per window of clean responses, halved on a ban
+    - Classifies every response (detection.classify_response) and feeds the
+      verdict into the proxy pool's health scores
+    - Banned browser pages are retried on a fresh proxy and Playwright context;
+      banned plain HTTP pages pass through so the spider escalates them
+
+    Settings:
+        BAN_THROTTLE_RATE: Requests per second per proxy
+        BAN_THROTTLE_BURST: Token bucket capacity per proxy
+        AIMD_START_CONCURRENCY: Initial concurrency limit
+        AIMD_MIN_CONCURRENCY / CONCURRENT_REQUESTS: Bounds for the limit
+        BAN_MAX_RETRIES: Fresh-proxy retries per banned page
+    """
+
+    def __init__(self, crawler):
+        settings = crawler.settings
+        self.stats = crawler.stats
+
+        self.rate = settings.getfloat('BAN_THROTTLE_RATE', 0.5)
+        self.burst = settings.getint('BAN_THROTTLE_BURST', 2)
+        self.min_limit = settings.getint('AIMD_MIN_CONCURRENCY', 1)
+        self.max_limit = settings.getint('CONCURRENT_REQUESTS', 8)
+        self.limit = float(min(self.max_limit, settings.getint('AIMD_START_CONCURRENCY', 2)))
+        self.max_retries = settings.getint('BAN_MAX_RETRIES', 2)
+
+        self.buckets = {}  # {proxy_server: TokenBucket}
+        self.in_flight = 0
+        self.bans = 0
+
+        # Responses reach this middleware (650) before HttpCompressionMiddleware (590) -
+        # decode them here, or challenge markers are searched for in gzip/br bytes.
+        # Moving below 590 would also put it behind RedirectMiddleware (600), which
+        # would follow auth-wall redirects before they are classified
+        try:
+            self.decompressor = HttpCompressionMiddleware.from_crawler(crawler)
+        except NotConfigured:
+            self.decompressor = None
+        else:
+            # Scrapy < 2.14 requires the spider argument, later versions deprecate it
+            spider_arg = inspect.signature(self.decompressor.process_response).parameters.get('spider')
+            self.decompress_with_spider = spider_arg is not None and spider_arg.default is inspect.Parameter.empty
 
     @classmethod
     def from_crawler(cls, crawler):
-        # This method is used by Scrapy to create your spiders.
-        s = cls()
-        crawler.signals.connect(s.spider_opened, signal=signals.spider_opened)
+        s = cls(crawler)
+        crawler.signals.connect(s.spider_closed, signal=signals.spider_closed)
         return s
 
-    def process_request(self, request, spider):
-        # Called for each request that goes through the downloader
-        # middleware.
-
-        # Must either:
-        # - return None: continue processing this request
-        # - or return a Response object
-        # - or return a Request object
-        # - or raise IgnoreRequest: process_exception() methods of
-        #   installed downloader middleware will be called
+    def bucket_for(self, server):
+        if server not in self.buckets:
+            self.buckets[server] = TokenBucket(self.rate, self.burst)
+        return self.buckets[server]
+
+    async def process_request(self, request, spider):
+        # Hold the request until the AIMD window has room
+        while self.in_flight >= int(self.limit):
+            await asyncio.sleep(0.05)
+        self.in_flight += 1
+
+        server = request.meta.get('proxy_server')
+        if server:
+            await self.bucket_for(server).acquire()
         return None
 
-    def process_response(self, request, response, spider):
-        # Called with the response returned from the downloader.
+    def decode(self, request, response, spider):
+        """The decompressed response - HttpCompressionMiddleware passes it through untouched afterwards"""
+        if self.decompressor is None or not response.headers.get('Content-Encoding'):
+            return response
+        if self.decompress_with_spider:
+            return self.decompressor.process_response(request, response, spider)
+        return self.decompressor.process_response(request, response)
+
+    async def process_response(self, request, response, spider):
+        self.in_flight = max(0, self.in_flight - 1)
+
+        response = self.decode(request, response, spider)
+        verdict = classify_response(response)
+        server = request.meta.get('proxy_server')
+        browser = bool(request.meta.get('playwright'))
+
+        if verdict == OK:
+            self.increase()
+            if server:
+                get_proxy_pool().report_success(server, latency=request.meta.get('download_latency'))
+            return response
+
+        if verdict == CHALLENGE and not browser:
+            # Plain HTTP can't run the challenge script - not the proxy's fault alone
+            if server:
+                get_proxy_pool().report_failure(server)
+            return response
+
+        # A ban: this proxy sits out and the whole crawl backs off
+        self.bans += 1
+        self.stats.inc_value('ban_throttle/bans')
+        self.stats.inc_value(f'ban_throttle/bans/{verdict}')
+        self.decrease()
+        if server:
+            get_proxy_pool().report_ban(server)
+
+        retries = request.meta.get('ban_retries', 0)
+        if browser and retries < self.max_retries:
+            spider.logger.warning(f"Ban ({verdict}) on {request.url} via {server} - retrying on a fresh proxy ({retries + 1}/{self.max_retries})")
+            self.stats.inc_value('ban_throttle/retries')
+            # The banned page never reaches a callback - close it here, and keep it
+            # out of the retry, which would otherwise reuse it (and its banned proxy's context)
+            page = request.meta.pop('playwright_page', None)
+            if page is not None:
+                try:
+                    await page.close()
+                except Exception as e:
+                    spider.logger.debug(f"Could not close banned page: {e}")
+            return self.retry_on_fresh_proxy(request, server)
 
-        # Must either;
-        # - return a Response object
-        # - return a Request object
-        # - or raise IgnoreRequest
+        # Out of retries (or plain HTTP, which the spider escalates) - let the callback decide
+        # response.meta is not bound to the request yet at this stage - it is the same dict once it is
+        request.meta['ban_verdict'] = verdict
         return response
 
     def process_exception(self, request, exception, spider):
-        # Called when a download handler or a process_request()
-        # (from other downloader middleware) raises an exception.
+        self.in_flight = max(0, self.in_flight - 1)
 
-        # Must either:
-        # - return None: continue processing this exception
-        # - return a Response object: stops process_exception() chain
-        # - return a Request object: stops process_exception() chain
-        pass
+        server = request.meta.get('proxy_server')
+        if server:
+            get_proxy_pool().report_failure(server)
+        return None
 
-    def spider_opened(self, spider):
-        spider.logger.info("Spider opened: %s" % spider.name)
+    def retry_on_fresh_proxy(self, request, banned_server):
+        meta = dict(request.meta)
+        meta['ban_retries'] = meta.get('ban_retries', 0) + 1
+
+        # The ban already dropped the session's proxy, so this picks a new one
+        proxy = get_proxy(meta.get('proxy_session'), exclude={banned_server})
+        assign_proxy(meta, proxy)
+
+        return request.replace(meta=meta, dont_filter=True)
+
+    def increase(self):
+        """Additive increase: about +1 after a full window of clean responses"""
+        self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+        self.stats.max_value('ban_throttle/concurrency_limit', int(self.limit))
+
+    def decrease(self):
+        """Multiplicative decrease on a ban"""
+        self.limit = max(self.min_limit, self.limit / 2)
+
+    def spider_closed(self, spider):
+        spider.logger.info(f"Ban throttle: {self.bans} bans, final concurrency limit {self.limit:.1f}")
 
 
 '''
@@ -0,0 +1,112 @@
+"""
+Playwright request policy
+Search pages are only read for their job-card HTML, so the browser does not
+need images, fonts, media or third-party analytics and ad scripts. Aborting
+them saves proxy bandwidth (billed per GB) and render time. Cloudflare's
+challenge assets are always let through - blocking those turns a solvable
+challenge into a lost page
+
+should_abort_request is wired up in settings.py as PLAYWRIGHT_ABORT_REQUEST;
+PageTransfer measures what each rendered page actually pulled over the wire
+"""
+
+import time
+from collections import Counter
+from urllib.parse import urlsplit
+
+BLOCKED_RESOURCE_TYPES = frozenset({'image', 'font', 'media'})
+
+# Analytics, tag managers and ad networks - matched on the host and its subdomains
+BLOCKED_HOSTS = (
+    'google-analytics.com',
+    'googletagmanager.com',
+    'googleadservices.com',
+    'googlesyndication.com',
+    'doubleclick.net',
+    'adservice.google.com',
+    'facebook.net',
+    'facebook.com',
+    'bat.bing.com',
+    'clarity.ms',
+    'hotjar.com',
+    'segment.io',
+    'segment.com',
+    'optimizely.com',
+    'newrelic.com',
+    'nr-data.net',
+    'quantserve.com',
+    'scorecardresearch.com',
+    'adnxs.com',
+    'criteo.com',
+    'criteo.net',
+    'taboola.com',
+    'outbrain.com',
+    'tiktok.com',
+    'linkedin.com',
+    'licdn.com',
+)
+
+# Cloudflare challenge platform: its own host, and /cdn-cgi/ paths on the site's host
+ALLOWED_HOSTS = ('challenges.cloudflare.com',)
+ALLOWED_PATHS = ('/cdn-cgi/',)
+
+# Aborted requests per reason, for the end-of-crawl summary
+blocked = Counter()
+
+def host_matches(host, domains):
+    return any(host == domain or host.endswith('.' + domain) for domain in domains)
+
+def abort_reason(url, resource_type):
+    """Why a browser request should be aborted, None to let it through"""
+    parts = urlsplit(url)
+    host = (parts.hostname or '').lower()
+
+    if host_matches(host, ALLOWED_HOSTS) or parts.path.startswith(ALLOWED_PATHS):
+        return None
+    if resource_type in BLOCKED_RESOURCE_TYPES:
+        return resource_type
+    if host_matches(host, BLOCKED_HOSTS):
+        return 'third_party'
+    return None
+
+def should_abort_request(request):
+    """PLAYWRIGHT_ABORT_REQUEST predicate - request is a Playwright Request"""
+    reason = abort_reason(request.url, request.resource_type)
+    if reason is None:
+        return False
+    blocked[reason] += 1
+    return True
+
+class PageTransfer:
+    """
+    Wire bytes, request count and network time of one page load
+    Register on_request / on_request_finished as Playwright page event handlers
+    """
+
+    def __init__(self):
+        self.bytes = 0
+        self.requests = 0
+        self.started = None
+        self.finished = None
+
+    async def on_request(self, request):
+        if self.started is None:
+            self.started = time.monotonic()
+
+    async def on_request_finished(self, request):
+        try:
+            sizes = await request.sizes()
+        except Exception:
+            return  # Page closed before the sizes were available
+        self.requests += 1
+        # Body sizes are as transferred (encoded), i.e. what the proxy bills
+        self.bytes += (sizes['requestHeadersSize'] + sizes['requestBodySize'] +
+                       sizes['responseHeadersSize'] + sizes['responseBodySize'])
+        self.finished = time.monotonic()
+
+    @property
+    def load_seconds(self):
+        """First request to last finished request, None before anything finished"""
+        if self.started is None or self.finished is None:
+            return None
+        return self.finished - self.started
@@ -1,25 +1,215 @@
 """
 Webshare rotating proxy integration
-Each request gets a random IP address
+Proxy list is parsed once per process. Each proxy is scored on success rate,
+latency and bans, banned proxies back off exponentially, and a session keeps
+its proxy until that proxy gets banned
 """
 import random
 import os
 import json
+import time
 
-def get_proxy():
-    """Get random proxy from environment variables - returns (server, username, password)"""
-    # Get proxy configuration from environment variables
-    proxy_str = os.environ.get('PROXY_STR')
-    proxy_username = os.environ.get('PROXY_USERNAME')
-    proxy_password = os.environ.get('PROXY_PASSWORD')
+class ProxyStats:
+    """Health record for one proxy"""
 
-    print(f"DEBUG PROXY_STR raw value: {repr(proxy_str)}")
+    def __init__(self):
+        self.successes = 0
+        self.failures = 0
+        self.bans = 0
+        self.consecutive_bans = 0
+        self.latency = None  # Exponentially weighted moving average, seconds
+        self.banned_until = 0.0
 
-    if not proxy_str or not proxy_username or not proxy_password:
-        raise ValueError("Missing proxy environment variables: PROXY_STR, PROXY_USERNAME, PROXY_PASSWORD")
+class ProxyPool:
+    """
+    Weighted, health-scored proxy selection
 
-    # Parse JSON array of proxies
-    proxy_list = json.loads(proxy_str)
+    Args:
+        servers: Proxy servers ("host:port" or "http://host:port")
+        username: Proxy username
+        password: Proxy password
+        base_backoff: Seconds a proxy sits out after its first ban
+        max_backoff: Upper bound for the exponential ban backoff
+    """
 
-    # Return random proxy with credentials
-    return (random.choice(proxy_list), proxy_username, proxy_password)
+    LATENCY_ALPHA = 0.3  # Weight of the newest latency sample
+    LATENCY_REFERENCE = 5.0  # A proxy this slow gets half the weight of an instant one
+
+    def __init__(self, servers, username, password, base_backoff=30, max_backoff=900):
+        if not servers:
+            raise ValueError("Proxy pool needs at least one proxy")
+
+        self.servers = list(servers)
+        self.username = username
+        self.password = password
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+
+        self.stats = {server: ProxyStats() for server in self.servers}
+        self.sessions = {}  # {session_key: server}
+
+    @classmethod
+    def from_env(cls):
+        """Build the pool from PROXY_STR / PROXY_USERNAME / PROXY_PASSWORD"""
+        proxy_str = os.environ.get('PROXY_STR')
+        proxy_username = os.environ.get('PROXY_USERNAME')
+        proxy_password = os.environ.get('PROXY_PASSWORD')
+
+        if not proxy_str or not proxy_username or not proxy_password:
+            raise ValueError("Missing proxy environment variables: PROXY_STR, PROXY_USERNAME, PROXY_PASSWORD")
+
+        # Parse JSON array of proxies
+        return cls(json.loads(proxy_str), proxy_username, proxy_password)
+
+    def is_banned(self, server, now=None):
+        now = time.monotonic() if now is None else now
+        return self.stats[server].banned_until > now
+
+    def weight(self, server):
+        """Selection weight: smoothed success rate scaled down by latency"""
+        stats = self.stats[server]
+        # Bans count double so a proxy that keeps getting caught sinks quickly
+        success_rate = (stats.successes + 1) / (stats.successes + stats.failures + 2 * stats.bans + 2)
+        latency = stats.latency if stats.latency is not None else 0.0
+        return success_rate / (1 + latency / self.LATENCY_REFERENCE)
+
+    def choose(self, exclude=()):
+        """Weighted random choice among proxies that are not sitting out a ban"""
+        now = time.monotonic()
+        candidates = [s for s in self.servers if s not in exclude and not self.is_banned(s, now)]
+
+        if not candidates:
+            # Everything is banned: use whichever proxy comes back first
+            candidates = [s for s in self.servers if s not in exclude] or self.servers
+            return min(candidates, key=lambda s: self.stats[s].banned_until)
+
+        weights = [self.weight(s) for s in candidates]
+        return random.choices(candidates, weights=weights, k=1)[0]
+
+    def get(self, session_key=None, exclude=()):
+        """
+        Get a proxy, sticking to the session's previous proxy while it is healthy
+
+        Returns:
+            (server, username, password)
+        """
+        server = self.sessions.get(session_key) if session_key is not None else None
+
+        if server is None or server in exclude or self.is_banned(server):
+            server = self.choose(exclude)
+            if session_key is not None:
+                self.sessions[session_key] = server
+
+        return (server, self.username, self.password)
+
+    def release(self, session_key):
+        """Forget a session so its next request picks a fresh proxy"""
+        self.sessions.pop(session_key, None)
+
+    def report_success(self, server, latency=None):
+        stats = self.stats.get(server)
+        if stats is None:
+            return
+        stats.successes += 1
+        stats.consecutive_bans = 0
+        if latency is not None:
+            if stats.latency is None:
+                stats.latency = latency
+            else:
+                stats.latency = self.LATENCY_ALPHA * latency + (1 - self.LATENCY_ALPHA) * stats.latency
+
+    def report_failure(self, server):
+        """Timeouts and connection errors - lowers the score, no backoff"""
+        stats = self.stats.get(server)
+        if stats is None:
+            return
+        stats.failures += 1
+
+    def report_ban(self, server):
+        """403s, auth redirects, challenges a browser could not pass - sit out with backoff"""
+        stats = self.stats.get(server)
+        if stats is None:
+            return
+        stats.bans += 1
+        stats.consecutive_bans += 1
+
+        backoff = min(self.max_backoff, self.base_backoff * 2 ** (stats.consecutive_bans - 1))
+        # Jitter so proxies banned together don't all come back together
+        stats.banned_until = time.monotonic() + backoff * random.uniform(0.8, 1.2)
+
+        # Sessions on this proxy move elsewhere on their next request
+        for session_key, session_server in list(self.sessions.items()):
+            if session_server == server:
+                del self.sessions[session_key]
+
+    def summary(self):
+        """Per-proxy counters for end-of-crawl logging"""
+        return {
+            server: {
+                'successes': stats.successes,
+                'failures': stats.failures,
+                'bans': stats.bans,
+                'latency': round(stats.latency, 2) if stats.latency is not None else None,
+            }
+            for server, stats in self.stats.items()
+        }
+
+_pool = None
+
+def get_proxy_pool():
+    """Process-wide pool, parsed from the environment on first use"""
+    global _pool
+    if _pool is None:
+        _pool = ProxyPool.from_env()
+    return _pool
+
+def proxies_enabled():
+    """PROXY_DISABLED=1 connects directly, e.g. to scripts/mock_indeed_server.py"""
+    return os.environ.get('PROXY_DISABLED', '0') == '0'
+
+def get_proxy(session_key=None, exclude=()):
+    """Get a healthy proxy for the session - returns (server, username, password), None when proxies are disabled"""
+    if not proxies_enabled():
+        return None
+    return get_proxy_pool().get(session_key, exclude)
+
+def proxy_url(server, username, password):
+    """Build an authenticated proxy URL for plain Scrapy requests (HttpProxyMiddleware)"""
+    if '://' in server:
+        scheme, host = server.split('://', 1)
+    else:
+        scheme, host = 'http', server
+    return f"{scheme}://{username}:{password}@{host.rstrip('/')}"
+
+def assign_proxy(meta, proxy):
+    """
+    Point a request's meta at a proxy, for either fetch tier
+    Playwright requests (meta['playwright']) get a context bound to the proxy,
+    plain requests get an HttpProxyMiddleware URL and a per-proxy cookie jar.
+    With no proxy (see get_proxy) requests go out directly, browser ones in one shared context
+    """
+    if proxy is None:
+        meta['proxy_server'] = None
+        if meta.get('playwright'):
+            meta['playwright_context'] = 'direct'
+        return meta
+
+    server, username, password = proxy
+    meta['proxy_server'] = server
+
+    if meta.get('playwright'):
+        # One context per proxy - context kwargs only apply when a context is
+        # created, so a shared context would silently keep its first proxy
+        meta['playwright_context'] = f'proxy-{server}'
+        meta['playwright_context_kwargs'] = {
+            'proxy': {
+                'server': server,
+                'username': username,
+                'password': password
+            }
+        }
+    else:
+        meta['proxy'] = proxy_url(server, username, password)
+        # Clearance cookies are tied to the exit IP, so keep one jar per proxy
+        meta['cookiejar'] = server
+    return meta
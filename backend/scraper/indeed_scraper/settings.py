@@ -1,5 +1,7 @@
 # Scrapy settings for indeed_scraper project
 
+import os
+
 BOT_NAME = 'indeed_scraper'
 
 SPIDER_MODULES = ['indeed_scraper.spiders']
@@ -30,6 +32,34 @@ DEFAULT_REQUEST_HEADERS = {
 TWISTED_REACTOR = "twisted.internet.asyncioreactor.AsyncioSelectorReactor"
 PLAYWRIGHT_BROWSER_TYPE = "chromium"
 
+# Playwright only renders requests with meta['playwright'] = True,
+# everything else goes through Scrapy's regular HTTP handler
+DOWNLOAD_HANDLERS = {
+    "http": "scrapy_playwright.handler.ScrapyPlaywrightDownloadHandler",
+    "https": "scrapy_playwright.handler.ScrapyPlaywrightDownloadHandler",
+}
+
+# Bound Chromium memory: the spider closes every page in its callbacks, these
+# cap what can be open at once (contexts are per proxy, see proxies.assign_proxy)
+PLAYWRIGHT_MAX_PAGES_PER_CONTEXT = 2
+PLAYWRIGHT_MAX_CONTEXTS = 4
+
+# Abort images, fonts, media and analytics/ad requests in browser pages (playwright_policy.py)
+# PLAYWRIGHT_BLOCK_ASSETS=0 in the environment loads everything, for before/after comparisons
+PLAYWRIGHT_BLOCK_ASSETS = os.environ.get('PLAYWRIGHT_BLOCK_ASSETS', '1') != '0'
+PLAYWRIGHT_ABORT_REQUEST = 'indeed_scraper.playwright_policy.should_abort_request' if PLAYWRIGHT_BLOCK_ASSETS else None
+
+# BrowserWatchdog (extensions.py) - open pages and browser RSS, sampled every N seconds
+BROWSER_WATCHDOG_INTERVAL = 10
+
+# Try plain HTTP first and escalate to Playwright on challenges or empty pages
+# TIERED_FETCH_ENABLED=0 in the environment renders every page in the browser
+TIERED_FETCH_ENABLED = os.environ.get('TIERED_FETCH_ENABLED', '1') != '0'
+
+# Search every comma-separated title in every location (up to 6 queries sharing
+# the page budget); False searches only the first title in the first location
+MULTI_QUERY_ENABLED = True
+
 '''
 DOWNLOADER_MIDDLEWARES = {
     'scrapy.downloadermiddlewares.httpproxy.HttpProxyMiddleware': 1,
@@ -62,6 +92,14 @@ ITEM_PIPELINES = {
     'indeed_scraper.pipelines.DataCleaningPipeline': 100,
 }
 
-# Logging
-LOG_LEVEL = 'DEBUG'
+# Logging - run_spider.py routes everything through app/core/logs.py (queued, JSON)
+# instead of Scrapy's root handler; LOG_LEVEL / LOG_MODULE_LEVELS in the environment win
+LOG_LEVEL = 'INFO'
+LOG_INSTALL_ROOT_HANDLER = False
+LOG_MODULE_LEVELS = {
+    'scrapy.core.scraper': 'WARNING',  # "Scraped from" with the whole item, per item
+    'scrapy.core.engine': 'INFO',  # "Crawled (200)" per response
+    'scrapy_playwright': 'INFO',  # Per request and page event at DEBUG
+    'asyncio': 'WARNING',
+}
 FEED_EXPORT_ENCODING = 'utf-8'
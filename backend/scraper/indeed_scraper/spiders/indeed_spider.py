@@ -2,13 +2,20 @@ import scrapy
 import math
 import os
 import sys
+import time
+import resource
 from datetime import datetime
-from urllib.parse import urlencode
+from urllib.parse import urlencode, urlsplit
 import json
 
 # Import anti-bot measures
-from indeed_scraper.user_agents import get_random_user_agent
-from indeed_scraper.proxies import get_proxy
+from indeed_scraper.user_agents import get_header_profile
+from indeed_scraper.proxies import get_proxy_pool, get_proxy, assign_proxy
+from indeed_scraper.detection import classify_response, OK
+from indeed_scraper.extractors import extract_mosaic_results, mosaic_results_to_items
+from indeed_scraper.matching import PreferenceMatcher
+from indeed_scraper.playwright_policy import PageTransfer, blocked as blocked_requests
+from indeed_scraper.extensions import process_tree_rss, MB
 
 # Add paths for imports
 current_dir = os.path.dirname(__file__)
@@ -19,8 +26,11 @@ if backend_dir not in sys.path:
     sys.path.insert(0, backend_dir)
 
 from indeed_scraper.items import JobItem
+from app.core.telemetry import traced, observe
+from app.core.logs import log_context
 
 # Redis publishing in subprocess via environment variables
+@traced('spider.publish')
 def publish_update(message):
     """Publish scrape update to Redis for real-time frontend updates"""
     try:
@@ -66,23 +76,40 @@ class IndeedSpider(scrapy.Spider):
     """
     
     name = 'indeed'
-    base_domain = 'ca.indeed.com'
-    allowed_domains = [base_domain]
+    # INDEED_BASE_URL points the spider elsewhere, e.g. at scripts/mock_indeed_server.py
+    base_url = os.environ.get('INDEED_BASE_URL', 'https://ca.indeed.com').rstrip('/')
+    base_domain = urlsplit(base_url).netloc
+    allowed_domains = [urlsplit(base_url).hostname]
     
     custom_settings = {
         # PARALLEL LOADING: Multiple pages at once
-        'DOWNLOAD_DELAY': 1,
-        'CONCURRENT_REQUESTS': 4,  
-        'CONCURRENT_REQUESTS_PER_DOMAIN': 4,
+        # CONCURRENT_REQUESTS is only the ceiling - BanAwareThrottleMiddleware
+        # grows concurrency towards it while responses are clean and halves it on bans
+        'DOWNLOAD_DELAY': 0,
+        'CONCURRENT_REQUESTS': 8,
+        'CONCURRENT_REQUESTS_PER_DOMAIN': 8,
         'RANDOMIZE_DOWNLOAD_DELAY': False,
         'RETRY_TIMES': 3,
-
-        # AUTOTHROTTLE: Let Scrapy adjust speed based on server response
-        'AUTOTHROTTLE_ENABLED': True,
-        'AUTOTHROTTLE_START_DELAY': 5,  # Start slow
-        'AUTOTHROTTLE_MAX_DELAY': 15,  # Max delay if server struggling
-        'AUTOTHROTTLE_TARGET_CONCURRENCY': 1.0,  # Target 1 concurrent (sequential)
-        'AUTOTHROTTLE_DEBUG': False,
+        'RETRY_HTTP_CODES': [500, 502, 503, 504, 522, 524, 408],  # 403/429 are bans, handled below
+
+        # BAN-AWARE THROTTLING: replaces AutoThrottle's latency-only feedback
+        'AUTOTHROTTLE_ENABLED': False,
+        'DOWNLOADER_MIDDLEWARES': {
+            # Ahead of RedirectMiddleware (600) in the response chain, so auth redirects are seen, not followed
+            # (and of HttpCompressionMiddleware (590) - it decodes bodies itself before classifying)
+            # Before HttpProxyMiddleware (750) in the request chain, so proxy swaps apply
+            'indeed_scraper.middlewares.BanAwareThrottleMiddleware': 650,
+        },
+        'BAN_THROTTLE_RATE': 0.5,  # Requests per second per proxy
+        'BAN_THROTTLE_BURST': 2,
+        'AIMD_START_CONCURRENCY': 2,
+        'AIMD_MIN_CONCURRENCY': 1,
+        'BAN_MAX_RETRIES': 2,
+
+        # Browser lifecycle: callbacks close their pages, the watchdog reports open pages and browser RSS
+        'EXTENSIONS': {
+            'indeed_scraper.extensions.BrowserWatchdog': 500,
+        },
         'LOG_LEVEL': 'INFO',
 
         # Anti-bot measures
@@ -101,170 +128,285 @@ class IndeedSpider(scrapy.Spider):
         }
     }
     
-    def __init__(self, user_id=None, preferences=None, *args, **kwargs):
+    def __init__(self, user_id=None, preferences=None, plan=None, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
-        # Store user_id for Redis publishing
-        if not user_id:
-            raise ValueError("user_id parameter is required")
-        self.user_id = user_id
-
         # Initialize query, preference, tallying variables
         self.scrape_session_counted = False  # Track if we've incremented total_scrapes for this session
 
-        # Handle both programmatic (dict) and command line (JSON string) calls
-        if preferences is None:
-            raise ValueError("preferences parameter is required")
+        # Subscriber mode: one crawl serves every user in a crawl plan (see crawl_planner.py),
+        # otherwise the spider serves the single user it was started for
+        if plan is not None:
+            if isinstance(plan, str):
+                try:
+                    plan = json.loads(plan)
+                except json.JSONDecodeError as e:
+                    raise ValueError(f"Invalid JSON in plan parameter: {e}")
+            self.subscribers = [
+                PreferenceMatcher(subscriber['user_id'], subscriber['preferences'], self.logger)
+                for subscriber in plan.get('subscribers') or []
+            ]
+            if not self.subscribers:
+                raise ValueError("plan must contain at least one subscriber")
+        else:
+            self.subscribers = [PreferenceMatcher(user_id, preferences, self.logger)]
 
-        if isinstance(preferences, str):
-            import json
-            try:
-                preferences = json.loads(preferences)
-            except json.JSONDecodeError as e:
-                raise ValueError(f"Invalid JSON in preferences parameter: {e}")
-
-        # Validate required preferences
-        if not preferences.get('title') or not preferences.get('location'):
-            raise ValueError("preferences must contain 'title' and 'location' fields")
-
-        # Extract search parameters from user preferences
-        # Use first title as primary search query
-        title_prefs = preferences['title'].split(',')
-        self.query = title_prefs[0].strip()
-
-        # Use first location as primary search location
-        location_prefs = preferences['location'].split(',')
-        self.location = location_prefs[0].strip()
-
-        # Store all preferences as lists for filtering - handle null/empty values
-        self.preferred_titles = [t.strip().lower() for t in title_prefs]
-        self.preferred_locations = [l.strip().lower() for l in location_prefs]
-        
-        # Handle company_name - check for null, empty, or 'null' string
-        company_name_val = preferences.get('company_name')
-        self.preferred_company_name = None
-        if company_name_val and company_name_val != 'null' and str(company_name_val).strip():
-            # Filters out any potential empty strings after splitting (if c.strip())
-            self.preferred_company_name = [c.strip().lower() for c in str(company_name_val).split(',') if c.strip()]
-            
-        # Handle job_type - check for null, empty, or 'null' string
-        job_type_val = preferences.get('job_type')
-        self.preferred_job_types = None
-        if job_type_val and job_type_val != 'null' and str(job_type_val).strip():
-            # Filters out any potential empty strings after splitting (if j.strip())
-            self.preferred_job_types = [j.strip().lower() for j in str(job_type_val).split(',') if j.strip()]
-
-        # Handle salary - check for null, empty, or 'null' string
-        salary_val = preferences.get('salary')
-        self.preferred_salaries = None
-        if salary_val and salary_val != 'null' and str(salary_val).strip():
-            # Filters out any potential empty strings after splitting (if s.strip())
-            self.preferred_salaries = [s.strip().lower() for s in str(salary_val).split(',') if s.strip()]
-
-        # Handle description - check for null, empty, or 'null' string
-        desc_val = preferences.get('description')
-        self.preferred_descriptions = None
-        if desc_val and desc_val != 'null' and str(desc_val).strip():
-            # Filters out any potential empty strings after splitting (if d.strip())
-            self.preferred_descriptions = [d.strip().lower() for d in str(desc_val).split(',') if d.strip()]
-
-        # Handle benefits - check for null, empty, or 'null' string
-        benefits_val = preferences.get('benefits')
-        self.preferred_benefits = None
-        if benefits_val and benefits_val != 'null' and str(benefits_val).strip():
-            # Filters out any potential empty strings after splitting (if b.strip())
-            self.preferred_benefits = [b.strip().lower() for b in str(benefits_val).split(',') if b.strip()]
-
-        # Handle radius - check for null, empty, or 'null' string
-        radius_val = preferences.get('radius')
-        self.radius = None
-        if radius_val and radius_val != 'null' and str(radius_val).strip():
-            try:
-                self.radius = int(radius_val)
-            except (ValueError, TypeError):
-                self.radius = None
+        if len({matcher.search_key for matcher in self.subscribers}) > 1:
+            raise ValueError("plan subscribers must share one search (query, location, radius)")
 
-        self.max_results = int(preferences['scrape_length'])
-        self.jobs_scraped = 0
+        # Store user_id for Redis publishing (single-user runs only)
+        self.user_id = self.subscribers[0].user_id if len(self.subscribers) == 1 else None
+
+        # Extract search parameters - every title in every location, shared by all subscribers
+        primary = self.subscribers[0]
+        self.queries = primary.queries
+        self.query = primary.query
+        self.location = primary.location
+        self.radius = primary.radius
+
+        # Pages are budgeted for the most demanding subscriber
+        self.max_results = max(matcher.max_results for matcher in self.subscribers)
+        self.jobs_scraped = 0  # Saves across all subscribers
         self.pages_visited = 0
-        self.max_pages = 15  # Safety limit - never visit more than 15 pages
+        self.max_pages = 15  # Safety limit - never visit more than 15 pages, across all queries
+        self.pages_requested = 0  # Distinct search pages requested (escalations not counted)
+        self.pending_pages = 0  # Requested pages not yet parsed or given up on
+        self.browser_first = False  # Tier new pages start on, set in start_requests
+
+        # Multi-query crawl: per query page budget and yield, one dedup set across queries
+        self.query_stats = [self.new_query_stats(query, location) for query, location in self.queries]
+        self.seen_jobs = set()
+
+        # Tiered fetching: plain HTTP first, Playwright only when needed
+        self.http_pages = 0  # Pages attempted over plain HTTP
+        self.browser_pages = 0  # Pages rendered through Playwright
+        self.escalations = 0  # Plain HTTP pages that had to be re-fetched in the browser
+        self.failed_pages = []  # Pages still blocked after ban retries
+        self.page_transfers = []  # (bytes, requests, load seconds) per rendered page
+
+        # Run metrics, sent with the final update (see ScrapeMetrics in app/schemas/messages.py)
+        self.crawl_started = None  # Monotonic time of the first request
+        self.startup_seconds = None
+        self.timings = {'http_wait': 0.0, 'browser_wait': 0.0, 'parse': 0.0, 'db': 0.0}
+        self.bytes_transferred = 0
+        self.cards_filtered = 0  # New cards no subscriber's filters accepted
+        self.cards_existing = 0  # Accepted cards the subscriber already had
+
+        self.supabase = None  # Created on first save, shared by every save in the crawl
+        # SCRAPER_DRY_RUN=1 crawls and filters as usual but writes nothing (benchmarks, mock server runs)
+        self.dry_run = os.environ.get('SCRAPER_DRY_RUN', '0') != '0'
 
         self.logger.info(f"=== Indeed Spider Initialized ===")
         self.logger.info(f"Primary Query: {self.query}")
         self.logger.info(f"Primary Location: {self.location}")
+        self.logger.info(f"Search Queries: {self.queries}")
         self.logger.info(f"Location Radius: {self.radius}")
         self.logger.info(f"Max Results: {self.max_results}")
-        self.logger.info(f"Title Filters: {self.preferred_titles}")
-        self.logger.info(f"Location Filters: {self.preferred_locations}")
-        self.logger.info(f"Job Type Filters: {self.preferred_job_types}")
-        self.logger.info(f"Salary Filters: {self.preferred_salaries}")
-        self.logger.info(f"Description Filters: {self.preferred_descriptions}")
-
-    def make_request(self, url, callback, **kwargs):
-        """Create a Playwright request with rotating proxy and user agent"""
-        headers = {}
-        
-        user_agent = get_random_user_agent()
-        headers['User-Agent'] = user_agent
-        
-        self.logger.info(f"Using user agent: {user_agent[:60]}...")
+        for matcher in self.subscribers:
+            self.logger.info(f"Subscriber {matcher.user_id}: max {matcher.max_results}, "
+                             f"titles {matcher.preferred_titles}, locations {matcher.preferred_locations}, "
+                             f"job types {matcher.preferred_job_types}, salaries {matcher.preferred_salaries}, "
+                             f"descriptions {matcher.preferred_descriptions}")
 
-        request = scrapy.Request(
+    def make_request(self, url, callback, meta=None, browser=False, session_key=None, **kwargs):
+        """
+        Create a request with a health-scored proxy and a browser-consistent header profile
+        Plain HTTP by default, rendered through Playwright when browser=True
+        Requests sharing a session_key keep the same proxy until it gets banned
+        """
+        meta = dict(meta or {})
+        headers = get_header_profile()
+        proxy = get_proxy(session_key)
+
+        meta['proxy_session'] = session_key
+
+        if browser:
+            meta['playwright'] = True
+            # Still banned after BanAwareThrottleMiddleware's retries - the callback
+            # loses the page (ban_verdict) instead of HttpErrorMiddleware failing it
+            meta['handle_httpstatus_list'] = [403, 429, 503]
+        else:
+            # Bot checks are escalated to the browser, not retried or followed
+            meta['dont_retry'] = True
+            meta['dont_redirect'] = True
+            meta['handle_httpstatus_list'] = [301, 302, 303, 307, 308, 403, 429, 503]
+
+        assign_proxy(meta, proxy)
+        meta['fetch_tier'] = 'browser' if browser else 'http'
+
+        self.logger.debug("Using user agent: %.60s... (%s)", headers['User-Agent'], meta['fetch_tier'])
+
+        return scrapy.Request(
             url=url,
             callback=callback,
             headers=headers,
+            meta=meta,
             **kwargs
         )
-        
-        proxy = get_proxy()
-        request.meta['playwright_context_kwargs'] = {
-            'proxy': {
-                'server': proxy[0],
-                'username': proxy[1],
-                'password': proxy[2]
-            }
+
+    def browser_meta(self, page_num):
+        """Playwright options for rendering a search page"""
+        # Stagger the requests slightly to avoid simultaneous hits
+        wait_time = 2000 + ((page_num - 1) * 1000)  # 2s, 3s, 4s, etc.
+
+        # Measures what the page pulls through the proxy, reported in the callback
+        transfer = PageTransfer()
+
+        return {
+            'page_transfer': transfer,
+            'playwright_page_event_handlers': {
+                'request': transfer.on_request,
+                'requestfinished': transfer.on_request_finished,
+            },
+            # The callback gets the page so it can close it (see close_page) - pages left
+            # open also keep their context's PLAYWRIGHT_MAX_PAGES_PER_CONTEXT slot
+            'playwright_include_page': True,
+            'playwright_page_goto_kwargs': {'wait_until': 'domcontentloaded', 'timeout': 60000},
+            'playwright_page_methods': [
+                {'method': 'wait_for_timeout', 'args': [wait_time]}
+            ],
         }
-        
-        self.logger.info(f"Using user agent: {user_agent[:60]}...")
-        self.logger.info(f"Using proxy: {proxy[0]}...")
-        
-        return request
+
+    def make_search_request(self, page_num, browser=False, query_index=0):
+        """Request for one search results page (page_num is 1-based) of one query"""
+        meta = {'page_number': page_num, 'query_index': query_index}
+        if browser:
+            meta.update(self.browser_meta(page_num))
+
+        return self.make_request(
+            url=self.get_indeed_search_url(page_num - 1, query_index=query_index),
+            callback=self.parse_search_results,
+            meta=meta,
+            browser=browser,
+            session_key=f'page-{query_index}-{page_num}',
+            errback=self.handle_error,
+            dont_filter=True
+        )
+
+    def request_next_page(self, query_index):
+        """Request the next unrequested page of a query, counted against the page budget"""
+        stats = self.query_stats[query_index]
+        stats['pages_requested'] += 1
+        self.pages_requested += 1
+        self.pending_pages += 1
+        return self.make_search_request(stats['pages_requested'], browser=self.browser_first, query_index=query_index)
+
+    @staticmethod
+    def new_query_stats(query, location):
+        return {
+            'query': query,
+            'location': location,
+            'pages_requested': 0,
+            'pages': 0,  # Pages resolved (parsed or lost)
+            'loads': 0,  # Page loads, escalated pages count twice
+            'cards': 0,
+            'new': 0,  # Cards not already seen through another page or query
+            'saved': 0,  # New cards saved for at least one subscriber
+            'exhausted': False,  # A page added nothing new - no point going deeper
+        }
+
+    async def start(self):
+        """
+        Scrapy 2.13+ entry point - newer releases no longer fall back to
+        start_requests on their own, older ones still call it directly
+        """
+        for request in self.start_requests():
+            yield request
 
     def start_requests(self):
         """Load multiple pages in parallel"""
+        # Subprocess start to first request: interpreter, Scrapy and reactor startup
+        self.crawl_started = time.monotonic()
+        started_at = os.environ.get('SPIDER_STARTED_AT')
+        if started_at:
+            self.startup_seconds = time.time() - float(started_at)
+            observe('spider.startup', self.startup_seconds)
+
+        # One query only - the first title in the first location - when multi-query crawling is off
+        if not self.settings.getbool('MULTI_QUERY_ENABLED', True):
+            self.queries = self.queries[:1]
+            self.query_stats = self.query_stats[:1]
+
         # Calculate pages needed (assume ~13 jobs per page)
         estimated_pages = min(max(1, math.ceil(self.max_results/13)), self.max_pages)
 
-        self.logger.info(f"=== PARALLEL LOADING {estimated_pages} PAGES ===")
+        # Plain HTTP first unless tiered fetching is switched off
+        self.browser_first = not self.settings.getbool('TIERED_FETCH_ENABLED', True)
+
+        # No yield data yet, so the first wave splits the estimate evenly;
+        # later waves follow each query's yield (see next_wave)
+        per_query = max(1, estimated_pages // len(self.queries))
+
+        self.logger.info(f"=== PARALLEL LOADING {per_query} PAGE(S) x {len(self.queries)} QUERIES "
+                         f"({'browser' if self.browser_first else 'http'} first) ===")
 
         # Yield all page requests at once
-        for page_num in range(estimated_pages):
-            page_url = self.get_indeed_search_url(page_num)
-            
-            # Stagger the requests slightly to avoid simultaneous hits
-            wait_time = 2000 + (page_num * 1000)  # 2s, 3s, 4s, etc.  
-                  
-            yield self.make_request(
-                url=page_url,
-                callback=self.parse_search_results,
-                meta={
-                    'playwright': True,
-                    'playwright_include_page': True,
-                    'playwright_page_goto_kwargs': {'wait_until': 'domcontentloaded', 'timeout': 60000},
-                    'playwright_page_methods': [
-                        {'method': 'wait_for_timeout', 'args': [wait_time]}
-                    ],
-                    'page_number': page_num + 1,
-                    },
-                errback=self.handle_error,
-                dont_filter=True
-            )
+        for page_num in range(per_query):
+            for query_index in range(len(self.queries)):
+                if self.pages_requested >= self.max_pages:
+                    return
+                yield self.request_next_page(query_index)
+
+    def resolve_page(self, query_index):
+        """
+        A requested page is done with (parsed, lost or errored)
+        Once every outstanding page is in, plans the next wave
+        """
+        self.query_stats[query_index]['pages'] += 1
+        if self.pending_pages <= 0:
+            return []
+        self.pending_pages -= 1
+        if self.pending_pages:
+            return []
+        return list(self.next_wave())
+
+    def next_wave(self):
+        """
+        Spend more of the page budget on the queries that have been paying off
+
+        Pages needed are estimated from the mean yield (saved jobs per page)
+        and split across queries in proportion to their own yield; queries
+        that stopped producing new jobs get none
+        """
+        open_matchers = [matcher for matcher in self.subscribers if not matcher.full]
+        remaining_pages = self.max_pages - self.pages_requested
+        if not open_matchers or remaining_pages <= 0:
+            return
+
+        yields = {
+            i: stats['saved'] / stats['pages']
+            for i, stats in enumerate(self.query_stats)
+            if stats['pages'] and not stats['exhausted'] and stats['saved']
+        }
+        if not yields:
+            self.logger.info("=== NO FURTHER PAGES: no query is still producing new jobs ===")
+            return
+
+        still_needed = max(matcher.max_results - matcher.jobs_scraped for matcher in open_matchers)
+        total_yield = sum(yields.values())
+        mean_yield = total_yield / len(yields)
+        pages = min(remaining_pages, max(1, math.ceil(still_needed / mean_yield)))
 
-    def get_indeed_search_url(self, page, external_id=None):
+        # Largest remainder keeps the split proportional and the total exact
+        shares = {i: pages * y / total_yield for i, y in yields.items()}
+        allocation = {i: int(share) for i, share in shares.items()}
+        leftover = pages - sum(allocation.values())
+        for i in sorted(shares, key=lambda i: shares[i] - allocation[i], reverse=True)[:leftover]:
+            allocation[i] += 1
+
+        self.logger.info(f"=== NEXT WAVE: {pages} page(s) for {still_needed} more job(s), "
+                         f"allocation {[(self.queries[i], n) for i, n in allocation.items() if n]} ===")
+
+        for i, n in allocation.items():
+            for _ in range(n):
+                yield self.request_next_page(i)
+
+    def get_indeed_search_url(self, page, external_id=None, query_index=0):
         """Build Indeed search URL"""
+        query, location = self.queries[query_index]
         params = {
-            'q': self.query,
-            'l': self.location,
+            'q': query,
+            'l': location,
             'start': page * 10  # Indeed shows 10 jobs per page
         }
 
@@ -275,74 +417,212 @@ class IndeedSpider(scrapy.Spider):
         if external_id is not None:
             params['vjk'] = external_id
             
-        return f"https://{self.base_domain}/jobs?{urlencode(params)}"
+        return f"{self.base_url}/jobs?{urlencode(params)}"
     
-    def parse_search_results(self, response):
-        """Parse search results from parallel pages"""
+    def escalate(self, response, reason):
+        """Re-fetch a plain HTTP page through Playwright"""
         page_num = response.meta.get('page_number')
-        self.pages_visited += 1
+        self.escalations += 1
+        self.crawler.stats.inc_value('tiered_fetch/escalations')
+        self.crawler.stats.inc_value(f'tiered_fetch/escalations/{reason}')
+        self.logger.info(f"Escalating page {page_num} to browser: {reason}")
 
-        self.logger.info(f"Parsing page {page_num}: {response.url} (status: {response.status})")
+        return self.make_search_request(page_num, browser=True, query_index=response.meta.get('query_index', 0))
 
-        # Check for bot detection or HTTP errors
-        if 'secure.indeed.com/auth' in response.url or response.status >= 400:
-            error_msg = f'HTTP {response.status} error on page {page_num}' if response.status >= 400 else 'Bot detection redirect'
-            try:
-                failure_update = {
-                    'user_id': self.user_id,
-                    'status': 'failed',
-                    'jobs_found': self.jobs_scraped,
-                    'error_message': error_msg,
-                    'spider_finished': True
-                }
-                publish_update(failure_update)
-            except Exception as e:
-                self.logger.error(f"Failed to publish failure update: {e}")
-            self.logger.error(error_msg)
+    async def close_page(self, meta):
+        """
+        Close the Playwright page a browser request came with
+        Pages otherwise stay alive in Chromium until the crawl ends. When the
+        browser is at PLAYWRIGHT_MAX_CONTEXTS the page's context is closed too
+        once idle, so requests waiting for a context slot can proceed
+        """
+        page = meta.pop('playwright_page', None)
+        if page is None:
             return
+        try:
+            context = page.context
+            await page.close()
+            self.crawler.stats.inc_value('playwright/pages_closed')
+
+            max_contexts = self.settings.getint('PLAYWRIGHT_MAX_CONTEXTS')
+            browser = context.browser
+            if max_contexts and browser and not context.pages and len(browser.contexts) >= max_contexts:
+                await context.close()
+                self.crawler.stats.inc_value('playwright/contexts_evicted')
+        except Exception as e:
+            # Already closed, e.g. the browser went away with the crawl
+            self.logger.debug(f"Could not close Playwright page: {e}")
 
-        # Find job cards
-        job_cards = (
-            response.css('div.job_seen_beacon') or
-            response.css('td.resultContent') or
-            response.css('div.cardOutline')
-        )
+    async def parse_search_results(self, response):
+        """Callback for search pages - releases the browser page first, the HTML is already in the response"""
+        await self.close_page(response.meta)
+        for result in self.parse_search_page(response):
+            yield result
 
-        self.logger.info(f"Found {len(job_cards)} job cards on page {page_num}")
+    @traced('spider.parse_search_results')
+    def parse_search_page(self, response):
+        """Parse search results from parallel pages"""
+        page_num = response.meta.get('page_number')
+        query_index = response.meta.get('query_index', 0)
+        query_stats = self.query_stats[query_index]
+        query_stats['loads'] += 1
+        tier = response.meta.get('fetch_tier', 'browser')
+
+        # The first browser page also pays for launching Chromium
+        if tier == 'browser' and not self.browser_pages:
+            observe('spider.first_browser_page', response.meta.get('download_latency'))
+        observe(f'spider.page_load.{tier}', response.meta.get('download_latency'))
+        self.timings[f'{tier}_wait'] += response.meta.get('download_latency') or 0
+
+        if tier == 'http':
+            self.http_pages += 1
+            self.bytes_transferred += len(response.body)
+        else:
+            self.browser_pages += 1
+            self.record_page_transfer(response)
+        self.crawler.stats.inc_value(f'tiered_fetch/{tier}_pages')
+
+        self.logger.info(f"Parsing page {page_num} ({tier}): {response.url} (status: {response.status})")
+
+        # Proxy health and ban retries are handled by BanAwareThrottleMiddleware,
+        # anything still blocked here has used up its retries
+        verdict = response.meta.get('ban_verdict') or classify_response(response)
+
+        # Embedded JSON payload is the cheapest signal that the page has results
+        parse_started = time.perf_counter()
+        mosaic_results = None
+        job_cards = []
+        if verdict == OK:
+            mosaic_results = extract_mosaic_results(response.text)
+            if not mosaic_results:
+                job_cards = self.find_job_cards(response)
+        self.timings['parse'] += time.perf_counter() - parse_started
+
+        # Plain HTTP got a bot check or an empty shell - let the browser try
+        if tier == 'http':
+            if verdict != OK:
+                yield self.escalate(response, verdict)
+                return
+            if not mosaic_results and not job_cards:
+                yield self.escalate(response, 'empty')
+                return
 
-        # Process jobs
-        for card in job_cards:
-            if self.jobs_scraped >= self.max_results:
-                break
+        self.pages_visited += 1
 
-            job_data = self.parse_job_card(card)
+        # Check for bot detection or HTTP errors - lose this page, keep the rest of the crawl
+        if verdict != OK:
+            error_msg = f'HTTP {response.status} error on page {page_num}' if response.status >= 400 else f'Bot detection ({verdict}) on page {page_num}'
+            self.failed_pages.append(error_msg)
+            self.crawler.stats.inc_value('pages_lost')
+            self.logger.error(error_msg)
+            yield from self.resolve_page(query_index)
+            return
 
-            if job_data and self.matches_preferences(job_data):
-                try:
-                    was_saved = self.save_job_to_database(job_data)
-                    if was_saved:
-                        self.jobs_scraped += 1
-                        self.logger.info(f"Saved job {self.jobs_scraped}: {job_data.get('title')} at {job_data.get('company_name')} (page {page_num})")
-                        yield job_data
-                    else:
-                        self.logger.info(f"Duplicate skipped: {job_data.get('title')} at {job_data.get('company_name')}")
-                except Exception as e:
-                    self.logger.error(f"Failed to save job: {e}")
+        # Prefer the embedded JSON payload (one decode per page), fall back to parsing card HTML
+        # Cards are built up front so parse time is measured apart from the saves below
+        parse_started = time.perf_counter()
+        if mosaic_results:
+            self.logger.info(f"Found {len(mosaic_results)} embedded results on page {page_num}")
+            self.crawler.stats.inc_value('extract/json_pages')
+            jobs = list(mosaic_results_to_items(mosaic_results, self.base_domain))
+        else:
+            self.logger.info(f"Found {len(job_cards)} job cards on page {page_num}")
+            self.crawler.stats.inc_value('extract/css_pages')
+            jobs = [self.parse_job_card(card) for card in job_cards]
+        self.timings['parse'] += time.perf_counter() - parse_started
+
+        # Process jobs - each card is offered to every subscriber still under its budget
+        page_new = 0
+        for job_data in jobs:
+            open_matchers = [matcher for matcher in self.subscribers if not matcher.full]
+            if not open_matchers:
+                break
+            if not job_data:
+                continue
+
+            # Queries overlap and Indeed repeats cards across pages - offer each job once per crawl
+            query_stats['cards'] += 1
+            job_key = self.job_key(job_data)
+            if job_key in self.seen_jobs:
+                continue
+            self.seen_jobs.add(job_key)
+            query_stats['new'] += 1
+            page_new += 1
+
+            saved_for_any = False
+            matched_any = False
+            for matcher in open_matchers:
+                # Filter and save records carry the subscriber (a crawl plan serves several)
+                with log_context(user_id=matcher.user_id):
+                    if not matcher.matches(job_data):
+                        continue
+                    matched_any = True
+                    try:
+                        was_saved = self.save_job_to_database(job_data, matcher.user_id)
+                        if was_saved:
+                            matcher.jobs_scraped += 1
+                            self.jobs_scraped += 1
+                            saved_for_any = True
+                            self.logger.info(f"Saved job {matcher.jobs_scraped} for {matcher.user_id}: {job_data.get('title')} at {job_data.get('company_name')} (page {page_num})")
+                        else:
+                            self.cards_existing += 1
+                            self.logger.debug("Duplicate skipped for %s: %s at %s", matcher.user_id, job_data.get('title'), job_data.get('company_name'))
+                    except Exception as e:
+                        self.logger.error(f"Failed to save job: {e}")
+
+            if not matched_any:
+                self.cards_filtered += 1
+            if saved_for_any:
+                query_stats['saved'] += 1
+                yield job_data
+
+        if not page_new and any(not matcher.full for matcher in self.subscribers):
+            query_stats['exhausted'] = True
 
         # Publish page update
-        try:
-            page_update = {
-                'user_id': self.user_id,
-                'status': 'running',
-                'jobs_found': self.jobs_scraped,
-                'page_completed': page_num,
-            }
-            publish_update(page_update)
-        except Exception as e:
-            self.logger.error(f"Failed to publish update: {e}")
+        self.publish_subscriber_updates('running', page_completed=page_num)
+
+        yield from self.resolve_page(query_index)
+
+    def record_page_transfer(self, response):
+        """Bytes and network time of a rendered page - with and without asset blocking"""
+        transfer = response.meta.get('page_transfer')
+        if transfer is None:
+            self.bytes_transferred += len(response.body)
+            return
+        self.bytes_transferred += transfer.bytes
+        load_seconds = transfer.load_seconds
+        self.page_transfers.append((transfer.bytes, transfer.requests, load_seconds))
+        self.crawler.stats.inc_value('page_transfer/bytes', transfer.bytes)
+        self.crawler.stats.inc_value('page_transfer/requests', transfer.requests)
+        self.logger.info(f"Page {response.meta.get('page_number')} transfer: {transfer.bytes / 1024:.0f} KB "
+                         f"in {transfer.requests} request(s)"
+                         f"{f', {load_seconds:.1f}s network' if load_seconds is not None else ''}")
+
+    @staticmethod
+    def job_key(job_data):
+        """Dedup key for a card - the Indeed job key, or title/company/location without one"""
+        if job_data.get('external_id'):
+            return job_data['external_id']
+        return (
+            (job_data.get('title') or '').strip().lower(),
+            (job_data.get('company_name') or '').strip().lower(),
+            (job_data.get('location') or '').strip().lower(),
+        )
+
+    def find_job_cards(self, response):
+        """Job card containers for the CSS fallback path"""
+        return (
+            response.css('div.job_seen_beacon') or
+            response.css('td.resultContent') or
+            response.css('div.cardOutline')
+        )
 
     def parse_job_card(self, card):
-        """Extract job data from a job card"""
+        """
+        Extract job data from a job card
+        Fallback for pages without the embedded payload - see extractors.py
+        """
 
         try:
             # Job ID - try multiple locations
@@ -466,7 +746,7 @@ class IndeedSpider(scrapy.Spider):
             job['benefits'] = benefits
             job['description'] = ''  # Description fetching disabled to reduce requests by 50%
             
-            self.logger.info(f"Scraped job {self.jobs_scraped + 1}: {title} at {company}")
+            self.logger.debug("Parsed job card: %s at %s", title, company)
             return job
 
         except Exception as e:
@@ -551,114 +831,56 @@ class IndeedSpider(scrapy.Spider):
             self.logger.error(f"Error parsing description: {e}")                                                                                                                                             
     """                                                       
 
-    def matches_preferences(self, job_data):
-        """Filter jobs based on user preferences using OR logic"""
+    def matches_preferences(self, job_data, matcher=None):
+        """Filter jobs based on a subscriber's preferences (the first subscriber by default)"""
+        return (matcher or self.subscribers[0]).matches(job_data)
 
-        job_title = job_data.get('title').lower()
-        job_company = job_data.get('company_name').lower()
-        job_location = (job_data.get('location') or '').lower()
-        job_type = (job_data.get('job_type') or '').lower()
-        job_description = (job_data.get('description') or '').lower()
-        job_salary = (job_data.get('salary') or '').lower()
-        job_benefits = (job_data.get('benefits') or '').lower()
-
-        # Debug logging
-        self.logger.info(f"=== PREFERENCE CHECK ===")
-        
-        # Check if job matches ANY of the title preferences (case-insensitive substring)
-        if self.preferred_titles:
-            title_match = any(pref_title.lower().strip() in job_title.lower().strip()
-                            for pref_title in self.preferred_titles if pref_title.strip())
-            if not title_match:
-                self.logger.info(f"❌ FILTERED OUT: No title match. Prefer: {self.preferred_titles}, actual: {job_title}")
-                return False
-            
-        # Check if job matches ANY of the location preferences (case-insensitive substring)
-        if self.preferred_locations:
-            location_match = any(pref_loc.lower().strip() in job_location.lower().strip()
-                               for pref_loc in self.preferred_locations if pref_loc.strip())
-            if not location_match:
-                self.logger.info(f"❌ FILTERED OUT: No location match. Prefer: {self.preferred_locations}, actual: {job_location}")
-                return False
-
-        # Check if job matches ANY of the company preferences (case-insensitive substring)
-        if self.preferred_company_name:
-            title_match = any(pref_company.lower().strip() in job_company.lower().strip()
-                            for pref_company in self.preferred_company_name if pref_company.strip())
-            if not title_match:
-                self.logger.info(f"❌ FILTERED OUT: No company match. Prefer: {self.preferred_company_name}, actual: {job_company}")
-                return False
-            
-        # Check if job matches ANY of the job type preferences (case-insensitive substring) --- checks both title and job type
-        if self.preferred_job_types:
-            job_type_match = any(pref_type.lower().strip() in job_type.lower().strip() or
-                                pref_type.lower().strip() in job_title.lower().strip()
-                               for pref_type in self.preferred_job_types if pref_type.strip())
-            if not job_type_match:
-                self.logger.info(f"❌ FILTERED OUT: No job type match. Prefer: {self.preferred_job_types}, actual: {job_type}")
-                return False
-
-        # Check if job matches ANY of the description keywords (case-insensitive substring) --- checks both title and description
-        if self.preferred_descriptions:
-            desc_match = any(keyword.lower().strip() in job_description.lower().strip() or
-                           keyword.lower().strip() in job_title.lower().strip()
-                           for keyword in self.preferred_descriptions if keyword.strip())
-            if not desc_match:
-                self.logger.debug(f"❌ FILTERED OUT: No description match. Prefer: {self.preferred_descriptions}, actual: {job_description}")
-                return False
-
-        # Check if job matches ANY of the salary preferences (case-insensitive substring)
-        if self.preferred_salaries:
-            salary_match = any(pref_salary.lower().strip() in job_salary.lower().strip()
-                             for pref_salary in self.preferred_salaries if pref_salary.strip())
-            if not salary_match:
-                self.logger.debug(f"❌ FILTERED OUT: No salary match. Prefer: {self.preferred_salaries}, actual: {job_salary}")
-                return False
-
-        # Check if job matches ANY of the benefits preferences (case-insensitive substring)
-        if self.preferred_benefits:
-            benefits_match = any(pref_benefit.lower().strip() in job_benefits.lower().strip()
-                               for pref_benefit in self.preferred_benefits if pref_benefit.strip())
-            if not benefits_match:
-                self.logger.debug(f"❌ FILTERED OUT: No benefits matchPrefer: {self.preferred_benefits}, actual: {job_benefits}")
-                return False
-
-        self.logger.info(f"✅ PASSED ALL FILTERS - Job accepted!")
-        return True
-
-    def save_job_to_database(self, job_data):
-        """Save job to database using environment variables (for subprocess compatibility)"""
-        try:
+    def get_supabase(self):
+        """Supabase client from environment variables (for subprocess compatibility), created once per crawl"""
+        if self.supabase is None:
             from supabase import create_client
-            from datetime import datetime
 
-            # Get database settings from environment variables
             supabase_url = os.environ.get('SUPABASE_URL')
             supabase_key = os.environ.get('SUPABASE_KEY')
-            user_id = os.environ.get('SCRAPER_USER_ID')
 
-            if not all([supabase_url, supabase_key, user_id]):
+            if not all([supabase_url, supabase_key]):
                 missing = []
                 if not supabase_url: missing.append('SUPABASE_URL')
                 if not supabase_key: missing.append('SUPABASE_KEY')
-                if not user_id: missing.append('SCRAPER_USER_ID')
                 raise ValueError(f"Missing environment variables: {missing}")
 
-            # Create Supabase client
-            supabase = create_client(supabase_url, supabase_key)
+            self.supabase = create_client(supabase_url, supabase_key)
+        return self.supabase
+
+    def increment_statistics(self, supabase, user_id, total_jobs=0, current_jobs=0, total_scrapes=0, latest_scrape=None):
+        """Add to a user's counters in one atomic UPDATE (migrations/001_increment_user_statistics.sql)"""
+        return supabase.rpc('increment_user_statistics', {
+            'p_user_id': user_id,
+            'p_total_jobs': total_jobs,
+            'p_current_jobs': current_jobs,
+            'p_total_scrapes': total_scrapes,
+            'p_latest_scrape': latest_scrape,
+        }).execute()
+
+    @traced('spider.save_job')
+    def save_job_to_database(self, job_data, user_id=None):
+        """Save job to database for one subscriber (the spider's own user in single-user runs)"""
+        db_started = time.perf_counter()
+        try:
+            user_id = user_id or self.user_id
+            if not user_id:
+                raise ValueError("user_id is required to save a job in subscriber mode")
 
-            # Check for duplicate jobs based on title, company, and location
+            if self.dry_run:
+                return True
+
+            supabase = self.get_supabase()
+
+            # Duplicates are jobs with the same title, company, and location for this user
             title = (job_data.get('title') or '').strip()
             company = (job_data.get('company_name') or '').strip()
             location = (job_data.get('location') or '').strip()
 
-            # Query for existing jobs with same title, company, and location for this user
-            existing_jobs = supabase.table('jobs').select('id').eq('user_id', user_id).eq('title', title).eq('company_name', company).eq('location', location).execute()
-
-            if existing_jobs.data:
-                self.logger.debug(f"Duplicate job found: {title} at {company} in {location} - skipping")
-                return False  # Indicate duplicate was found and skipped
-
             # Prepare job data for database
             job_record = {
                 'user_id': user_id,
@@ -669,20 +891,25 @@ class IndeedSpider(scrapy.Spider):
                 'salary': (job_data.get('salary') or ''),
                 'url': (job_data.get('url') or ''),
                 'description': (job_data.get('description') or ''),
-                'benefits': (job_data.get('benefits') or '')
+                'benefits': (job_data.get('benefits') or ''),
+                'external_id': job_data.get('external_id'),
+                'posted_date': job_data.get('posted_date'),
             }
 
-            # Insert into database
-            jobs_result = supabase.table('jobs').insert(job_record).execute()
-            
-            # Update user stats
-            current = supabase.table('user_statistics').select('*').eq('user_id', user_id).execute()
-            if current.data:
-                stats = current.data[0]
-            stats['total_jobs'] += 1
-            stats['latest_scrape'] = datetime.now().astimezone().isoformat()
-            stats_result = supabase.table('user_statistics').update(stats).eq('user_id', user_id).execute()
-            
+            # Insert unless the user already has it - one round trip, the unique key
+            # (migrations/002_jobs_indexes.sql) decides, so concurrent scrapes can't both insert
+            jobs_result = supabase.table('jobs') \
+                .upsert(job_record, on_conflict='user_id,title,company_name,location', ignore_duplicates=True) \
+                    .execute()
+
+            if not jobs_result.data:
+                self.logger.debug(f"Duplicate job found: {title} at {company} in {location} - skipping")
+                return False  # Indicate duplicate was found and skipped
+
+            # Update user stats - one atomic increment, concurrent scrapes for the user can't lose it
+            stats_result = self.increment_statistics(supabase, user_id, total_jobs=1, current_jobs=1,
+                                                     latest_scrape=datetime.now().astimezone().isoformat())
+
             self.logger.debug(f"Database insert result: {jobs_result}")
             self.logger.debug(f"Database update result: {stats_result}")
             return True  # Indicate successful save
@@ -690,48 +917,30 @@ class IndeedSpider(scrapy.Spider):
         except Exception as e:
             self.logger.error(f"Database save error: {e}")
             raise
+        finally:
+            self.timings['db'] += time.perf_counter() - db_started
+
+    @traced('spider.handle_error')
+    async def handle_error(self, failure):
+        """Handle request errors - the page is lost, the rest of the crawl goes on"""
+        await self.close_page(failure.request.meta)
 
-    def handle_error(self, failure):
-        """Handle request errors - gracefully handle timeouts"""
         self.logger.error(f"=== REQUEST FAILED ===")
         self.logger.error(f"URL: {failure.request.url}")
         self.logger.error(f"Error type: {type(failure.value)}")
         self.logger.error(f"Error details: {failure.value}")
-        
-        # Check if this is a timeout error
-        is_timeout = (
-            'TimeoutError' in str(type(failure.value)) or
-            'timeout' in str(failure.value).lower() or
-            'Timeout' in str(failure.value)
-        )
-
-        if is_timeout:
-            self.logger.info(f"=== TIMEOUT DETECTED - PRESERVING {self.jobs_scraped} JOBS ===")
-            self.logger.info(f"Jobs found so far: {self.jobs_scraped}")
-            self.logger.info(f"Pages processed: {self.pages_visited}")
 
-            # Don't stop the spider - let it finish naturally with jobs found so far
-            # The spider will complete and return the jobs it has collected
-            return
-        else:
-            # For non-timeout errors, publish failure update
-            self.logger.error(f"Non-timeout error occurred: {failure.value}")
-            self.logger.info(f"Continuing with {self.jobs_scraped} jobs found so far")
-
-            # Publish error update
-            try:
-                error_update = {
-                    'user_id': self.user_id,
-                    'status': 'failed',
-                    'jobs_found': self.jobs_scraped,
-                    'error_message': str(failure.value),
-                    'spider_finished': True
-                }
-                publish_update(error_update)
-            except Exception as e:
-                self.logger.error(f"Failed to publish error update: {e}")
-
-            return
+        # Timeouts and errors lose this page, not the crawl - closed() reports the
+        # outcome, failing a subscriber only if no other page got through for them
+        page_num = failure.request.meta.get('page_number')
+        error_msg = f'{type(failure.value).__name__} on page {page_num}: {failure.value}'
+        self.failed_pages.append(error_msg)
+        self.crawler.stats.inc_value('pages_lost')
+        self.logger.info(f"Continuing with {self.jobs_scraped} jobs found so far")
+
+        # The page is given up on - the rest of the budget may go to other pages
+        for request in self.resolve_page(failure.request.meta.get('query_index', 0)):
+            yield request
     
     def closed(self, reason):
         """Called when spider closes"""
@@ -740,52 +949,140 @@ class IndeedSpider(scrapy.Spider):
         self.logger.info(f"Total jobs scraped: {self.jobs_scraped}")
         self.logger.info(f"Pages processed: {self.pages_visited}")
 
-        # Update total_scrapes once per scraping session
-        if not self.scrape_session_counted:
-            try:
-                from supabase import create_client
-                import os
+        # Tiered fetch summary - how often plain HTTP was not enough
+        if self.http_pages:
+            escalation_rate = self.escalations / self.http_pages
+            self.crawler.stats.set_value('tiered_fetch/escalation_rate', round(escalation_rate, 3))
+            self.logger.info(f"Plain HTTP pages: {self.http_pages}, browser pages: {self.browser_pages}, "
+                             f"escalations: {self.escalations} ({escalation_rate:.0%})")
+
+        # Browser page weight - compare runs with PLAYWRIGHT_BLOCK_ASSETS on and off
+        if self.page_transfers:
+            count = len(self.page_transfers)
+            total_bytes = sum(t[0] for t in self.page_transfers)
+            loads = [t[2] for t in self.page_transfers if t[2] is not None]
+            blocking = 'on' if self.settings.get('PLAYWRIGHT_ABORT_REQUEST') else 'off'
+            self.crawler.stats.set_value('page_transfer/avg_kb', round(total_bytes / count / 1024, 1))
+            self.logger.info(f"Browser pages (asset blocking {blocking}): {count} page(s), "
+                             f"avg {total_bytes / count / 1024:.0f} KB, "
+                             f"avg {sum(t[1] for t in self.page_transfers) / count:.0f} requests"
+                             f"{f', avg {sum(loads) / len(loads):.1f}s network' if loads else ''}; "
+                             f"aborted {dict(blocked_requests)}")
 
-                # Get database settings from environment variables
-                supabase_url = os.environ.get('SUPABASE_URL')
-                supabase_key = os.environ.get('SUPABASE_KEY')
-                user_id = os.environ.get('SCRAPER_USER_ID')
-
-                if all([supabase_url, supabase_key, user_id]):
-                    # Create Supabase client
-                    supabase = create_client(supabase_url, supabase_key)
+        try:
+            self.logger.info(f"Proxy health: {get_proxy_pool().summary()}")
+        except ValueError:
+            pass  # Proxy pool never configured
 
+        # Update total_scrapes once per scraping session, for every subscriber
+        if not self.scrape_session_counted and not self.dry_run:
+            db_started = time.perf_counter()
+            try:
+                supabase = self.get_supabase()
+                for matcher in self.subscribers:
                     # Update total_scrapes by 1 for this scraping session
-                    current = supabase.table('user_statistics').select('*').eq('user_id', user_id).execute()
-                    if current.data:
-                        stats = current.data[0]
-                        stats['total_scrapes'] += 1
-                        supabase.table('user_statistics').update(stats).eq('user_id', user_id).execute()
-                        self.logger.info(f"Incremented total_scrapes to {stats['total_scrapes']}")
-                        self.scrape_session_counted = True
-                else:
-                    self.logger.warning("Could not update total_scrapes - missing environment variables")
+                    result = self.increment_statistics(supabase, matcher.user_id, total_scrapes=1)
+                    if result.data:
+                        self.logger.info(f"Incremented total_scrapes to {result.data[0]['total_scrapes']} for {matcher.user_id}")
+                self.scrape_session_counted = True
+            except ValueError as e:
+                self.logger.warning(f"Could not update total_scrapes - {e}")
             except Exception as e:
                 self.logger.error(f"Failed to update total_scrapes: {e}")
+            self.timings['db'] += time.perf_counter() - db_started
 
-        # Publish final completion update with accurate job count
-        try:
-            completion_update = {
-                'user_id': self.user_id,
-                'status': 'completed',
-                'jobs_found': self.jobs_scraped,
-                'error_message': None,
-                'spider_finished': True  # Signal that spider is completely done
-            }
-            publish_update(completion_update)
-            self.logger.info(f"Published final completion update: {self.jobs_scraped} jobs found")
-        except Exception as e:
-            self.logger.error(f"Failed to publish completion update: {e}")
+        metrics = self.run_metrics()
+        self.logger.info(f"Run metrics: {metrics}")
+
+        # Publish final update with accurate job count, per subscriber
+        # Blocked pages only fail a subscriber's scrape when nothing else got through for them
+        for matcher in self.subscribers:
+            try:
+                scrape_failed = matcher.jobs_scraped == 0 and bool(self.failed_pages)
+                completion_update = {
+                    'user_id': matcher.user_id,
+                    'status': 'failed' if scrape_failed else 'completed',
+                    'jobs_found': matcher.jobs_scraped,
+                    'error_message': self.failed_pages[-1] if scrape_failed else None,
+                    'spider_finished': True,  # Signal that spider is completely done
+                    'final': True,  # The run's outcome - scraper_service waits for this one only
+                    'metrics': metrics,  # Crawl-wide - shared by every subscriber
+                }
+                publish_update(completion_update)
+                self.logger.info(f"Published final {completion_update['status']} update for {matcher.user_id}: {matcher.jobs_scraped} jobs found")
+            except Exception as e:
+                self.logger.error(f"Failed to publish completion update: {e}")
+
+        self.log_query_yield()
+
+        if self.failed_pages:
+            self.logger.warning(f"{len(self.failed_pages)} page(s) lost to bot detection or errors: {self.failed_pages}")
 
         if self.jobs_scraped > 0:
             self.logger.info(f"SUCCESS: Found {self.jobs_scraped} jobs from {self.pages_visited} page(s)")
         else:
             self.logger.warning(f"NO JOBS FOUND after {self.pages_visited} page(s)")
 
-        if reason == 'finished' and self.jobs_scraped < self.max_results:
-            self.logger.info(f"Note: Stopped before reaching max results ({self.max_results}) - this may be due to timeouts or filtering")
\ No newline at end of file
+        if reason == 'finished' and any(not matcher.full for matcher in self.subscribers):
+            self.logger.info(f"Note: Stopped before reaching max results ({self.max_results}) - this may be due to timeouts or filtering")
+
+    def run_metrics(self):
+        """The crawl's share of ScrapeMetrics - scraper_service.py adds queue, subprocess and total times"""
+        stats = self.crawler.stats
+        cards_seen = sum(query_stats['cards'] for query_stats in self.query_stats)
+        cards_new = sum(query_stats['new'] for query_stats in self.query_stats)
+
+        # ru_maxrss is the process's own peak (KiB on Linux); the browser's comes from
+        # BrowserWatchdog's samples plus one taken now, before Playwright shuts down
+        _, browser_rss = process_tree_rss()
+        peak_browser_mb = max(stats.get_value('browser_watchdog/peak_browser_rss_mb', 0),
+                              (browser_rss or 0) / MB)
+
+        return {
+            'startup_seconds': round(self.startup_seconds, 3) if self.startup_seconds is not None else None,
+            'crawl_seconds': round(time.monotonic() - self.crawl_started, 3) if self.crawl_started else None,
+            'http_wait_seconds': round(self.timings['http_wait'], 3),
+            'browser_wait_seconds': round(self.timings['browser_wait'], 3),
+            'parse_seconds': round(self.timings['parse'], 3),
+            'db_seconds': round(self.timings['db'], 3),
+            'pages_fetched': self.http_pages + self.browser_pages,
+            'http_pages': self.http_pages,
+            'browser_pages': self.browser_pages,
+            'escalations': self.escalations,
+            'pages_lost': len(self.failed_pages),
+            'retries': stats.get_value('ban_throttle/retries', 0) + stats.get_value('retry/count', 0),
+            'cards_seen': cards_seen,
+            'cards_deduped': cards_seen - cards_new,
+            'cards_filtered': self.cards_filtered,
+            'cards_existing': self.cards_existing,
+            'jobs_saved': self.jobs_scraped,
+            'bytes_transferred': self.bytes_transferred,
+            'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+            'peak_browser_rss_mb': round(peak_browser_mb, 1) if peak_browser_mb else None,
+        }
+
+    def publish_subscriber_updates(self, status, **fields):
+        """Publish one update per subscriber, each with that subscriber's own job count"""
+        for matcher in self.subscribers:
+            try:
+                publish_update({
+                    'user_id': matcher.user_id,
+                    'status': status,
+                    'jobs_found': matcher.jobs_scraped,
+                    **fields,
+                })
+            except Exception as e:
+                self.logger.error(f"Failed to publish update: {e}")
+
+    def log_query_yield(self):
+        """Per query instrumentation: how many saved jobs each page load bought"""
+        self.crawler.stats.set_value('multi_query/queries', len(self.query_stats))
+        for i, stats in enumerate(self.query_stats):
+            jobs_per_load = stats['saved'] / stats['loads'] if stats['loads'] else 0.0
+            for field in ('pages', 'loads', 'cards', 'new', 'saved'):
+                self.crawler.stats.set_value(f'multi_query/{i}/{field}', stats[field])
+            self.crawler.stats.set_value(f'multi_query/{i}/jobs_per_load', round(jobs_per_load, 2))
+            self.logger.info(f"Query '{stats['query']}' in '{stats['location']}': {stats['pages']} page(s), "
+                             f"{stats['loads']} load(s), {stats['cards']} cards, {stats['new']} new, "
+                             f"{stats['saved']} saved, {jobs_per_load:.2f} jobs/page load"
+                             f"{' (exhausted)' if stats['exhausted'] else ''}")
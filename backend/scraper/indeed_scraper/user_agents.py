@@ -2,6 +2,7 @@
 User Agent rotation for anti-bot measures
 Comprehensive mix of desktop and mobile browsers - January 2025
 """
+import re
 
 USER_AGENTS = [
     # === DESKTOP BROWSERS ===
@@ -31,4 +32,55 @@ USER_AGENTS = [
 def get_random_user_agent():
     """Get a random user agent from the list"""
     import random
-    return random.choice(USER_AGENTS)
\ No newline at end of file
+    return random.choice(USER_AGENTS)
+
+def get_header_profile(user_agent=None):
+    """
+    Build request headers that match the user agent's browser family
+    Plain HTTP requests have no browser to fill these in, so a Chrome UA
+    without client hints (or a Firefox UA with them) is an easy bot signal
+    """
+    if user_agent is None:
+        user_agent = get_random_user_agent()
+
+    headers = {
+        'User-Agent': user_agent,
+        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8',
+        'Accept-Language': 'en-CA,en-US;q=0.9,en;q=0.8',
+        'Upgrade-Insecure-Requests': '1',
+        'Sec-Fetch-Dest': 'document',
+        'Sec-Fetch-Mode': 'navigate',
+        'Sec-Fetch-Site': 'none',
+        'Sec-Fetch-User': '?1',
+    }
+
+    # Chromium based browsers send client hints, Safari and Firefox do not
+    chrome_match = re.search(r'Chrome/(\d+)', user_agent)
+    if chrome_match:
+        major = chrome_match.group(1)
+        if 'Edg/' in user_agent:
+            brand = 'Microsoft Edge'
+        elif 'OPR/' in user_agent:
+            brand = 'Opera'
+        else:
+            brand = 'Google Chrome'
+
+        # Android UAs also say Linux - check it first
+        if 'Android' in user_agent:
+            platform = 'Android'
+        elif 'Windows' in user_agent:
+            platform = 'Windows'
+        elif 'Macintosh' in user_agent:
+            platform = 'macOS'
+        elif 'CrOS' in user_agent:
+            platform = 'Chrome OS'
+        else:
+            platform = 'Linux'
+
+        headers['sec-ch-ua'] = f'"{brand}";v="{major}", "Chromium";v="{major}", "Not.A/Brand";v="99"'
+        # Phones say Mobile, Android tablets do not
+        headers['sec-ch-ua-mobile'] = '?1' if 'Mobile' in user_agent else '?0'
+        headers['sec-ch-ua-platform'] = f'"{platform}"'
+        headers['Priority'] = 'u=0, i'
+
+    return headers
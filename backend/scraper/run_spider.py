@@ -21,14 +21,18 @@ sys.path.insert(0, str(scraper_dir))
 
 from scrapy.crawler import CrawlerProcess
 from scrapy.utils.project import get_project_settings
+from scrapy.settings import default_settings
 from indeed_scraper.spiders.indeed_spider import IndeedSpider
+from app.core.telemetry import setup_tracing, continue_trace, stage
+from app.core.logs import setup_logging, log_context
 
-def run_spider_standalone(preferences_json):
+def run_spider_standalone(preferences_json=None, plan_json=None):
     """
     Run the spider standalone and return scraped jobs
 
     Args:
-        preferences_json: JSON string of user preferences
+        preferences_json: JSON string of user preferences (single user, from SCRAPER_USER_ID)
+        plan_json: JSON string of a crawl plan - one search serving several users (see crawl_planner.py)
 
     Returns:
         None (jobs saved directly to database)
@@ -45,25 +49,38 @@ def run_spider_standalone(preferences_json):
         # Just need to ensure clean stdout
         settings.set('FEEDS', {})  # No output feeds
 
-        # Parse preferences
-        preferences = json.loads(preferences_json)
-
-        # Get user_id from environment variable (set by scraper_service.py)
-        user_id = os.environ.get('SCRAPER_USER_ID')
-        if not user_id:
-            raise ValueError("SCRAPER_USER_ID environment variable not set")
-
-        # Create crawler process
-        process = CrawlerProcess(settings)
-
-        # Run spider with user_id
-        process.crawl(
-            IndeedSpider,
-            user_id=user_id,
-            preferences=preferences
-        )
-
-        process.start()
+        if plan_json is not None:
+            # Each subscriber carries its own user_id
+            spider_kwargs = {'plan': json.loads(plan_json)}
+        else:
+            # Parse preferences
+            preferences = json.loads(preferences_json)
+
+            # Get user_id from environment variable (set by scraper_service.py)
+            user_id = os.environ.get('SCRAPER_USER_ID')
+            if not user_id:
+                raise ValueError("SCRAPER_USER_ID environment variable not set")
+
+            spider_kwargs = {'user_id': user_id, 'preferences': preferences}
+
+        # Create crawler process - without Scrapy's synchronous root handler,
+        # app/core/logs.py writes everything from a background thread instead.
+        # Newer Scrapy reads LOG_INSTALL_ROOT_HANDLER (settings.py), older takes the argument
+        if hasattr(default_settings, 'LOG_INSTALL_ROOT_HANDLER'):
+            process = CrawlerProcess(settings)
+        else:
+            process = CrawlerProcess(settings, install_root_handler=False)
+        setup_logging('jobflow-spider', settings.get('LOG_LEVEL'), settings.getdict('LOG_MODULE_LEVELS'))
+
+        # Run spider with user_id/preferences or the plan
+        process.crawl(IndeedSpider, **spider_kwargs)
+
+        # Spans join the scrape task's trace (carried in the environment by scraper_service.py)
+        setup_tracing('jobflow-spider')
+        # Every record of the crawl carries the run (and, for single-user runs, the user)
+        with log_context(run_id=os.environ.get('SCRAPE_RUN_ID'), user_id=os.environ.get('SCRAPER_USER_ID')), \
+                continue_trace(os.environ), stage('spider.crawl'):
+            process.start()
 
     except Exception as e:
         print(f"Error in run_spider_standalone: {str(e)}")
@@ -72,11 +89,13 @@ def run_spider_standalone(preferences_json):
         sys.exit(1)
 
 if __name__ == '__main__':
-    if len(sys.argv) != 2:
+    if len(sys.argv) == 3 and sys.argv[1] == '--plan':
+        # Run one planned crawl for every subscriber in the plan
+        run_spider_standalone(plan_json=sys.argv[2])
+    elif len(sys.argv) == 2:
+        # Run spider - jobs are saved directly to database, no output needed
+        run_spider_standalone(preferences_json=sys.argv[1])
+    else:
         print("Usage: python run_spider.py '<preferences_json>'")
+        print("       python run_spider.py --plan '<plan_json>'")
         sys.exit(1)
-
-    preferences_json = sys.argv[1]
-
-    # Run spider - jobs are saved directly to database, no output needed
-    run_spider_standalone(preferences_json)
\ No newline at end of file
@@ -7,7 +7,10 @@ import redis
 import sys
 import os
 import json
+import time
+import signal
 import subprocess
+import uuid
 
 # Add paths for imports
 current_dir = os.path.dirname(__file__)
@@ -18,19 +21,229 @@ if backend_dir not in sys.path:
     sys.path.insert(0, backend_dir)
 
 from app.core.config import settings
-from app.schemas.messages import ScrapeUpdateMessage, Status
+from app.schemas.messages import ScrapeUpdateMessage, ScrapeMetrics, Status
+from app.core.telemetry import traced, stage, trace_carrier
+from app.core.logs import log_context
 
 # For production Upstash (SSL):
 # connection_link = f"rediss://:{settings.upstash_redis_rest_token}@{settings.upstash_redis_rest_url[8:]}:{settings.upstash_redis_port}?ssl_cert_reqs=required"
 
+@traced('scrape.publish')
 def publish_update(message: ScrapeUpdateMessage):
     """Publish scrape update to Redis for real-time frontend updates"""
     r = redis.from_url(settings.redis_url)
     r.publish(settings.scrape_update_channel, message.model_dump_json())
     r.close()
 
+def kill_process_group(process: subprocess.Popen):
+    """Kill the spider and everything it started (Playwright driver, Chromium)"""
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError):
+        process.kill()
+    process.wait()
+
+def new_run_id() -> str:
+    """Short id tying a scrape's log records (worker and spider) to its scrape_runs rows"""
+    return uuid.uuid4().hex[:12]
+
+def spider_env(run_id: str, user_id: str = None) -> dict:
+    """Environment for the spider subprocess - only the settings it needs"""
+    env = os.environ.copy()
+    """
+    env['UPSTASH_REDIS_REST_URL'] = settings.upstash_redis_rest_url
+    env['UPSTASH_REDIS_REST_TOKEN'] = settings.upstash_redis_rest_token
+    env['UPSTASH_REDIS_PORT'] = str(settings.upstash_redis_port)
+    """
+    env['REDIS_URL'] = settings.redis_url
+    env['SCRAPE_UPDATE_CHANNEL'] = settings.scrape_update_channel
+    if user_id:
+        env['SCRAPER_USER_ID'] = user_id  # Pass user_id to subprocess (single-user runs)
+    env['SUPABASE_URL'] = settings.supabase_url
+    env['SUPABASE_KEY'] = settings.supabase_key
+    env['PROXY_STR'] = settings.proxy_str
+    env['PROXY_USERNAME'] = settings.proxy_username
+    env['PROXY_PASSWORD'] = settings.proxy_password
+    env['TRACE_EXPORTER'] = settings.trace_exporter
+    env['SCRAPE_RUN_ID'] = run_id  # Tags the spider's log records (app/core/logs.py)
+    env['SCRAPER_DRY_RUN'] = '1' if settings.scraper_dry_run else '0'
+    return env
+
+def run_spider_process(spider_args: list, env: dict, user_ids: list, job_counts: dict, metrics: dict,
+                       finished: dict) -> int:
+    """
+    Run run_spider.py and follow its Redis updates until every user has a final one
+
+    Args:
+        spider_args: Arguments for run_spider.py
+        env: Subprocess environment (see spider_env)
+        user_ids: Users the spider reports for - updates for other scrapes on the channel are ignored
+        job_counts: Filled with each user's latest job count, also on timeout
+        metrics: Filled with each user's ScrapeMetrics fields - the spider's, plus the subprocess time
+        finished: Filled with each user's final update from the spider (status, error_message)
+
+    Returns:
+        Spider return code - its kill signal if it had to be killed after every final update
+
+    Raises:
+        subprocess.TimeoutExpired: Spider ran past scrape_timeout before reporting (it has been killed)
+    """
+    spider_script = os.path.join(current_dir, 'run_spider.py')
+
+    # The spider continues this trace and reports its own startup time
+    env = {**env, **trace_carrier(), 'SPIDER_STARTED_AT': str(time.time())}
+
+    started = time.monotonic()
+    try:
+        with stage('scrape.subprocess'):
+            return _run_spider_process(spider_script, spider_args, env, user_ids, job_counts, metrics, finished)
+    finally:
+        subprocess_seconds = round(time.monotonic() - started, 3)
+        for user_id in user_ids:
+            metrics.setdefault(user_id, {})['subprocess_seconds'] = subprocess_seconds
+
+def _run_spider_process(spider_script: str, spider_args: list, env: dict, user_ids: list, job_counts: dict, metrics: dict,
+                        finished: dict) -> int:
+    # Use Popen for real-time output streaming
+    print("=== STARTING SPIDER SUBPROCESS ===")
+    process = subprocess.Popen([
+        sys.executable, '-u', spider_script,  # -u flag for unbuffered output
+        *spider_args,
+    ], stdout=None, stderr=None, text=True, env=env,
+        start_new_session=True)  # Own process group, so Chromium can be killed with it
+
+    # Listen for Redis messages from spider to get final job count
+    #r = redis.from_url(connection_link)
+    r = redis.from_url(settings.redis_url)
+    pubsub = r.pubsub()
+    pubsub.subscribe(settings.scrape_update_channel)
+
+    waiting = set(user_ids)
+    # The loop below used to run until the spider exited, so a hung spider
+    # was never timed out - the deadline now covers the whole run
+    deadline = time.monotonic() + settings.scrape_timeout
+
+    try:
+        # Poll for both subprocess completion and Redis messages for page completions
+        while process.poll() is None and waiting:
+            if time.monotonic() > deadline:
+                raise subprocess.TimeoutExpired(spider_script, settings.scrape_timeout)
+
+            # Check for Redis messages with timeout
+            message = pubsub.get_message(timeout=1.0)
+            if message and message['type'] == 'message':
+                try:
+                    update_data = json.loads(message['data'])
+                    user_id = update_data.get('user_id')
+
+                    # The channel carries every scrape's updates - only follow this spider's users
+                    if user_id not in waiting:
+                        continue
+                    print(f"REDIS UPDATE: {update_data}")
+                    job_counts[user_id] = update_data.get('jobs_found') or 0
+
+                    # Only the update sent from the spider's closed() ends the wait - earlier
+                    # ones, even failed or spider_finished, leave pages still downloading
+                    if update_data.get('final'):
+                        waiting.discard(user_id)
+                        metrics.setdefault(user_id, {}).update(update_data.get('metrics') or {})
+                        status = update_data.get('status')
+                        finished[user_id] = update_data
+                        print(f"Spider finished for {user_id} with status '{status}' and {job_counts[user_id]} jobs")
+
+                        if status == 'failed':
+                            error_msg = update_data.get('error_message', 'Spider failed')
+                            print(f"Spider failure detected: {error_msg}")
+                except (json.JSONDecodeError, TypeError) as e:
+                    print(f"Failed to parse Redis message: {e}")
+
+        # Every user has a final update and the spider is shutting down - its
+        # results stand, so one that will not exit is killed rather than failed
+        if process.poll() is None:
+            try:
+                process.wait(timeout=settings.scrape_shutdown_grace)
+            except subprocess.TimeoutExpired:
+                print(f"Spider still running {settings.scrape_shutdown_grace}s after its final updates, killing it")
+                kill_process_group(process)
+
+    except subprocess.TimeoutExpired:
+        print("=== SPIDER SUBPROCESS TIMED OUT ===")
+        raise
+    finally:
+        # Never leave Chromium running - covers timeouts and the Celery
+        # soft time limit interrupting this loop
+        if process.poll() is None:
+            kill_process_group(process)
+        pubsub.close()
+        r.close()
+
+    print("=== SPIDER SUBPROCESS FINISHED ===")
+    return process.returncode
+
+def final_updates(user_ids: list, job_counts: dict, returncode: int, finished: dict) -> list[ScrapeUpdateMessage]:
+    """Final status per user - the one the spider reported, otherwise from its return code"""
+    updates = []
+    for user_id in user_ids:
+        reported = finished.get(user_id)
+        if reported is not None:
+            status = Status.FAILED if reported.get('status') == Status.FAILED.value else Status.COMPLETED
+            error_msg = (reported.get('error_message') or 'Spider failed') if status == Status.FAILED else None
+        elif returncode != 0:
+            status, error_msg = Status.FAILED, f"Spider subprocess failed with return code {returncode}"
+        else:
+            status, error_msg = Status.COMPLETED, None
+        updates.append(ScrapeUpdateMessage(user_id=user_id, status=status,
+                                           jobs_found=job_counts.get(user_id, 0), error_message=error_msg))
+    return updates
+
+def complete_runs(run_id: str, updates: list[ScrapeUpdateMessage], metrics: dict, started: float,
+                  queue_wait: float = None) -> list[ScrapeUpdateMessage]:
+    """
+    Attach each user's ScrapeMetrics to their final update and record the runs in scrape_runs
+
+    Args:
+        run_id: The run's id (see new_run_id)
+        updates: Final update per user
+        metrics: ScrapeMetrics fields per user, from run_spider_process
+        started: time.monotonic() when the task started on the worker
+        queue_wait: Seconds the task waited in the queue, if known
+    """
+    total_seconds = round(time.monotonic() - started, 3)
+    for update in updates:
+        update.metrics = ScrapeMetrics(**{
+            **metrics.get(update.user_id, {}),
+            'queue_wait_seconds': round(queue_wait, 3) if queue_wait is not None else None,
+            'total_seconds': total_seconds,
+        })
+        print(f"Scrape metrics for {update.user_id}: {update.metrics.model_dump(exclude_none=True)}")
+
+    if settings.scraper_dry_run:
+        return updates
+
+    # A lost run record must not fail the scrape
+    try:
+        from app.services.database_service import create_scrape_runs
+        create_scrape_runs(run_id, updates)
+    except Exception as e:
+        print(f"Failed to record scrape runs: {e}")
+    return updates
+
+def failed_updates(user_ids: list, job_counts: dict, error_msg: str) -> list[ScrapeUpdateMessage]:
+    """Publish and return a failure for every user"""
+    updates = []
+    for user_id in user_ids:
+        error_update = ScrapeUpdateMessage(
+            user_id=user_id,
+            status=Status.FAILED,
+            jobs_found=job_counts.get(user_id, 0),
+            error_message=error_msg
+        )
+        publish_update(error_update)
+        updates.append(error_update)
+    return updates
 
-def run_scraper_with_preferences(user_id: str, preferences: dict) -> ScrapeUpdateMessage:
+@traced('scrape.run_scraper_with_preferences')
+def run_scraper_with_preferences(user_id: str, preferences: dict, queue_wait: float = None) -> ScrapeUpdateMessage:
     """
     Main function to run scraper with user preferences using subprocess
     Called by celery_app.py run_scrape task
@@ -38,11 +251,22 @@ def run_scraper_with_preferences(user_id: str, preferences: dict) -> ScrapeUpdat
     Args:
         user_id: User ID for database storage
         preferences: Dict with title, location, job_type, salary, description, scrape_length
+        queue_wait: Seconds the task waited in the queue, recorded with the run's metrics
 
     Returns:
-        ScrapeUpdateMessage: Final status with job count or error
+        ScrapeUpdateMessage: Final status with job count and metrics, or error
     """
 
+    run_id = new_run_id()
+    # Worker output for this scrape - prints too, through Celery's stdout redirect - carries the run
+    with log_context(run_id=run_id, user_id=user_id):
+        return _run_scraper_with_preferences(run_id, user_id, preferences, queue_wait)
+
+def _run_scraper_with_preferences(run_id: str, user_id: str, preferences: dict, queue_wait: float) -> ScrapeUpdateMessage:
+    started = time.monotonic()
+    job_counts = {}
+    metrics = {}
+    finished = {}
     try:
         # Send initial running status
         update = ScrapeUpdateMessage(user_id=user_id, status=Status.RUNNING, jobs_found=0)
@@ -51,131 +275,67 @@ def run_scraper_with_preferences(user_id: str, preferences: dict) -> ScrapeUpdat
         # Validate required preferences
         if not preferences.get('title') or not preferences.get('location'):
             error_msg = "Missing required preferences: title and location must be provided"
-            error_update = ScrapeUpdateMessage(
-                user_id=user_id,
-                status=Status.FAILED,
-                jobs_found=0,
-                error_message=error_msg
-            )
-            publish_update(error_update)
-            return error_update
-
-        # Run spider via subprocess to avoid import conflicts
-        spider_script = os.path.join(current_dir, 'run_spider.py')
-        preferences_json = json.dumps(preferences)
-
-        print(f"Running spider subprocess with preferences: {preferences_json}")
-
-        # Run spider subprocess
-        # Pass only essential settings to subprocess via environment variables
-        env = os.environ.copy()
-        """
-        env['UPSTASH_REDIS_REST_URL'] = settings.upstash_redis_rest_url
-        env['UPSTASH_REDIS_REST_TOKEN'] = settings.upstash_redis_rest_token
-        env['UPSTASH_REDIS_PORT'] = str(settings.upstash_redis_port)
-        """
-        env['REDIS_URL'] = settings.redis_url
-        env['SCRAPE_UPDATE_CHANNEL'] = settings.scrape_update_channel
-        env['SCRAPER_USER_ID'] = user_id  # Pass user_id to subprocess
-        env['SUPABASE_URL'] = settings.supabase_url
-        env['SUPABASE_KEY'] = settings.supabase_key
-        env['PROXY_STR'] = settings.proxy_str
-        env['PROXY_USERNAME'] = settings.proxy_username
-        env['PROXY_PASSWORD'] = settings.proxy_password
-
-        # Use Popen for real-time output streaming
-        print("=== STARTING SPIDER SUBPROCESS ===")
-        process = subprocess.Popen([
-            sys.executable, '-u', spider_script,  # -u flag for unbuffered output
-            preferences_json,
-        ], stdout=None, stderr=None, text=True, env=env)
-
-        # Listen for Redis messages from spider to get final job count
-        #r = redis.from_url(connection_link)
-        r = redis.from_url(settings.redis_url)
-        pubsub = r.pubsub()
-        pubsub.subscribe(settings.scrape_update_channel)
-
-        final_job_count = 0
-        spider_completed = False
-
-        try:
-            # Poll for both subprocess completion and Redis messages for page completions
-            while process.poll() is None and not spider_completed:
-                # Check for Redis messages with timeout
-                message = pubsub.get_message(timeout=1.0)
-                if message and message['type'] == 'message':
-                    try:
-                        update_data = json.loads(message['data'])
-                        print(f"REDIS UPDATE: {update_data}")
-
-                        # Check if this is the final completion message (completed or failed)
-                        if update_data.get('spider_finished'):
-                            final_job_count = update_data.get('jobs_found')
-                            spider_completed = True
-                            status = update_data.get('status')
-                            print(f"Spider finished with status '{status}' and {final_job_count} jobs")
-                            
-                            # If spider reports failure, exit early
-                            if status == 'failed':
-                                error_msg = update_data.get('error_message', 'Spider failed')
-                                print(f"Spider failure detected: {error_msg}")
-                    except (json.JSONDecodeError, TypeError) as e:
-                        print(f"Failed to parse Redis message: {e}")
-
-            # Wait for subprocess to complete
-            process.wait(timeout=600)
-            returncode = process.returncode
-
-        except subprocess.TimeoutExpired:
-            process.kill()
-            process.wait()
-            print("=== SPIDER SUBPROCESS TIMED OUT ===")
-            returncode = 1
-        finally:
-            pubsub.close()
-            r.close()
-
-        print("=== SPIDER SUBPROCESS FINISHED ===")
-
-        if returncode != 0:
-            error_msg = f"Spider subprocess failed with return code {returncode}"
-            error_update = ScrapeUpdateMessage(
-                user_id=user_id,
-                status=Status.FAILED,
-                jobs_found=final_job_count,
-                error_message=error_msg
-            )
-            return error_update
-
-        # Return final job count from Redis message
-        completion_update = ScrapeUpdateMessage(
-            user_id=user_id,
-            status=Status.COMPLETED,
-            jobs_found=final_job_count
-        )
-        return completion_update
+            updates = failed_updates([user_id], job_counts, error_msg)
+        else:
+            # Run spider via subprocess to avoid import conflicts
+            preferences_json = json.dumps(preferences)
+            print(f"Running spider subprocess with preferences: {preferences_json}")
+
+            returncode = run_spider_process([preferences_json], spider_env(run_id, user_id), [user_id], job_counts, metrics, finished)
+            updates = final_updates([user_id], job_counts, returncode, finished)
 
     except subprocess.TimeoutExpired:
-        error_msg = "Spider timed out after 10 minutes"
-        error_update = ScrapeUpdateMessage(
-            user_id=user_id,
-            status=Status.FAILED,
-            jobs_found=final_job_count,
-            error_message=error_msg
-        )
-        publish_update(error_update)
-        return error_update
+        error_msg = f"Spider timed out after {settings.scrape_timeout // 60} minutes"
+        updates = failed_updates([user_id], job_counts, error_msg)
 
     except Exception as e:
         error_msg = f"Scraper failed: {str(e)}"
         print(f"Error: {error_msg}")
+        updates = failed_updates([user_id], job_counts, error_msg)
 
-        error_update = ScrapeUpdateMessage(
-            user_id=user_id,
-            status=Status.FAILED,
-            jobs_found=final_job_count,
-            error_message=error_msg
-        )
-        publish_update(error_update)
-        return error_update
\ No newline at end of file
+    return complete_runs(run_id, updates, metrics, started, queue_wait)[0]
+
+@traced('scrape.run_crawl_plan')
+def run_crawl_plan(plan: dict, queue_wait: float = None) -> list[ScrapeUpdateMessage]:
+    """
+    Run one planned crawl for every subscriber in the plan (see crawl_planner.py)
+    Called by celery_app.py run_crawl_plan task
+
+    Args:
+        plan: {"search": {...}, "subscribers": [{"user_id", "preferences"}, ...]}
+        queue_wait: Seconds the task waited in the queue, recorded with the run's metrics
+
+    Returns:
+        Final ScrapeUpdateMessage per subscriber, in plan order
+    """
+
+    run_id = new_run_id()
+    with log_context(run_id=run_id):
+        return _run_crawl_plan(run_id, plan, queue_wait)
+
+def _run_crawl_plan(run_id: str, plan: dict, queue_wait: float) -> list[ScrapeUpdateMessage]:
+    started = time.monotonic()
+    user_ids = [subscriber['user_id'] for subscriber in plan['subscribers']]
+    job_counts = {}
+    metrics = {}
+    finished = {}
+    try:
+        for user_id in user_ids:
+            publish_update(ScrapeUpdateMessage(user_id=user_id, status=Status.RUNNING, jobs_found=0))
+
+        plan_json = json.dumps(plan)
+        print(f"Running planned crawl for {len(user_ids)} user(s): {json.dumps(plan['search'])}")
+
+        returncode = run_spider_process(['--plan', plan_json], spider_env(run_id), user_ids, job_counts, metrics, finished)
+        updates = final_updates(user_ids, job_counts, returncode, finished)
+
+    except subprocess.TimeoutExpired:
+        error_msg = f"Spider timed out after {settings.scrape_timeout // 60} minutes"
+        updates = failed_updates(user_ids, job_counts, error_msg)
+
+    except Exception as e:
+        error_msg = f"Scraper failed: {str(e)}"
+        print(f"Error: {error_msg}")
+        updates = failed_updates(user_ids, job_counts, error_msg)
+
+    return complete_runs(run_id, updates, metrics, started, queue_wait)
@@ -0,0 +1,112 @@
+"""
+Email render throughput benchmark
+Simulates a notification burst (e.g. a nightly scrape for every user finishing
+at once) and compares:
+    - per-send Template(...) - the old path, parses and compiles every time
+    - the email_service registry - compiled once, shared environment
+and the cost of a cold compile with and without the bytecode cache, which is
+what each new or recycled worker child pays once
+
+Rendered HTML must match between both paths before timings are reported
+
+Usage: python scripts/benchmark_email_render.py [notifications]
+"""
+
+import os
+import sys
+import time
+import shutil
+from pathlib import Path
+
+backend_dir = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from benchmark_startup import DUMMY_ENV
+
+# Settings needs these to import; nothing is contacted
+for key, value in DUMMY_ENV.items():
+    os.environ.setdefault(key, value)
+
+from jinja2 import Template
+from app.core.config import settings
+from app.schemas.messages import ScrapeUpdateMessage, Status
+from app.services import email_service
+
+def make_notifications(count):
+    """Alternating complete/failed notifications with varied preferences"""
+    notifications = []
+    for i in range(count):
+        preferences = {
+            'title': f'python developer {i}',
+            'location': ['toronto', 'ottawa', 'remote'][i % 3],
+            'job_type': 'full-time' if i % 2 else None,
+        }
+        if i % 4:
+            update = ScrapeUpdateMessage(user_id=f'user-{i}', status=Status.COMPLETED, jobs_found=i % 50)
+        else:
+            update = ScrapeUpdateMessage(user_id=f'user-{i}', status=Status.FAILED, jobs_found=i % 7,
+                                         error_message='Spider timed out after 10 minutes')
+        notifications.append((update, preferences))
+    return notifications
+
+def render_per_send(update, preferences):
+    # What every send did before the registry
+    if update.status == Status.COMPLETED:
+        return Template(email_service.EMAIL_SUCCESS_TEMPLATE).render(
+            jobs_found=update.jobs_found, preferences=preferences, dashboard_url=settings.allowed_origins)
+    return Template(email_service.EMAIL_FAILURE_TEMPLATE).render(
+        update=update, preferences=preferences, dashboard_url=settings.allowed_origins)
+
+def render_registry(update, preferences):
+    if update.status == Status.COMPLETED:
+        return email_service.render_scrape_complete_email(update.jobs_found, preferences)
+    return email_service.render_scrape_failed_email(update, preferences)
+
+def time_burst(render, notifications):
+    start = time.perf_counter()
+    for update, preferences in notifications:
+        render(update, preferences)
+    return time.perf_counter() - start
+
+def time_cold_compile(bytecode_cache, runs=20):
+    """Median seconds for a fresh environment to load every template"""
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        environment = email_service.create_template_environment(bytecode_cache=bytecode_cache)
+        for name in email_service.EMAIL_TEMPLATES:
+            environment.get_template(name)
+        samples.append(time.perf_counter() - start)
+    return sorted(samples)[len(samples) // 2]
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    notifications = make_notifications(count)
+
+    for update, preferences in notifications[:8]:
+        if render_per_send(update, preferences) != render_registry(update, preferences):
+            print('Registry output differs from per-send Template output')
+            return 1
+
+    # Registry is warm after the check above, as it is after the first email
+    per_send = time_burst(render_per_send, notifications)
+    registry = time_burst(render_registry, notifications)
+
+    print(f'Burst of {count} notifications\n')
+    print(f'{"path":<22}{"total ms":>10}{"renders/s":>12}')
+    print(f'{"per-send Template":<22}{per_send * 1000:>10.0f}{count / per_send:>12.0f}')
+    print(f'{"registry":<22}{registry * 1000:>10.0f}{count / registry:>12.0f}   {per_send / registry:.1f}x')
+
+    # Cold compile - empty the disk cache so the first warm run has to fill it
+    shutil.rmtree(email_service.TEMPLATE_CACHE_DIR, ignore_errors=True)
+    no_cache = time_cold_compile(bytecode_cache=False)
+    time_cold_compile(bytecode_cache=True, runs=1)
+    with_cache = time_cold_compile(bytecode_cache=True)
+
+    print(f'\nCold compile of all templates (new worker child)')
+    print(f'{"no bytecode cache":<22}{no_cache * 1000:>10.2f} ms')
+    print(f'{"bytecode cache":<22}{with_cache * 1000:>10.2f} ms   {no_cache / with_cache:.1f}x')
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
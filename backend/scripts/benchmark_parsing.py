@@ -0,0 +1,97 @@
+"""
+Parse-time benchmark for Indeed search pages
+Compares the embedded JSON extractor against the per-card CSS fallback
+over the saved pages in scripts/fixtures/indeed
+
+Usage: python scripts/benchmark_parsing.py [iterations]
+"""
+
+import sys
+import time
+import logging
+from pathlib import Path
+
+backend_dir = Path(__file__).resolve().parent.parent
+scraper_dir = backend_dir / 'scraper'
+
+sys.path.insert(0, str(backend_dir))
+sys.path.insert(0, str(scraper_dir))
+sys.path.insert(0, str(scraper_dir / 'indeed_scraper'))
+
+from scrapy.http import HtmlResponse
+from indeed_scraper.spiders.indeed_spider import IndeedSpider
+from indeed_scraper.extractors import extract_mosaic_results, mosaic_results_to_items
+
+FIXTURES_DIR = Path(__file__).resolve().parent / 'fixtures' / 'indeed'
+
+PREFERENCES = {
+    'title': 'python developer',
+    'location': 'toronto',
+    'scrape_length': 50,
+}
+
+def load_pages():
+    """Saved search pages that carry both the embedded payload and card HTML"""
+    pages = []
+    for path in sorted(FIXTURES_DIR.glob('search_page_[0-9]*.html')):
+        body = path.read_bytes()
+        url = f'https://{IndeedSpider.base_domain}/jobs?q=python+developer&l=toronto'
+        pages.append((path.name, HtmlResponse(url=url, body=body, encoding='utf-8')))
+    return pages
+
+def parse_json(spider, response):
+    # Fresh text each run so the decoded-body cache doesn't flatter either path
+    html = response.body.decode('utf-8')
+    results = extract_mosaic_results(html) or []
+    return list(mosaic_results_to_items(results, spider.base_domain))
+
+def parse_css(spider, response):
+    response = response.replace(body=response.body)  # Drop the cached selector tree
+    return [job for job in (spider.parse_job_card(card) for card in spider.find_job_cards(response)) if job]
+
+def bench(fn, spider, response, iterations):
+    """Seconds per call, best of three batches"""
+    best = float('inf')
+    for _ in range(3):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            fn(spider, response)
+        best = min(best, (time.perf_counter() - start) / iterations)
+    return best
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+
+    # Per-card INFO logging would dominate the timings
+    logging.disable(logging.INFO)
+
+    spider = IndeedSpider(user_id='benchmark', preferences=PREFERENCES)
+    pages = load_pages()
+    if not pages:
+        print(f'No fixtures found in {FIXTURES_DIR}')
+        return 1
+
+    print(f'{"fixture":<24}{"jobs":>6}{"json ms":>10}{"css ms":>10}{"speedup":>10}')
+
+    total_json = total_css = 0.0
+    for name, response in pages:
+        json_jobs = parse_json(spider, response)
+        css_jobs = parse_css(spider, response)
+
+        # Both paths must agree before their speed is worth comparing
+        if [j['external_id'] for j in json_jobs] != [j['external_id'] for j in css_jobs]:
+            print(f'{name}: JSON and CSS extraction disagree')
+            return 1
+
+        json_time = bench(parse_json, spider, response, iterations)
+        css_time = bench(parse_css, spider, response, iterations)
+        total_json += json_time
+        total_css += css_time
+
+        print(f'{name:<24}{len(json_jobs):>6}{json_time * 1000:>10.2f}{css_time * 1000:>10.2f}{css_time / json_time:>9.1f}x')
+
+    print(f'{"total":<24}{"":>6}{total_json * 1000:>10.2f}{total_css * 1000:>10.2f}{total_css / total_json:>9.1f}x')
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
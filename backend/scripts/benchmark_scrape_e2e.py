@@ -0,0 +1,142 @@
+"""
+End-to-end scrape throughput by concurrency
+Drives run_scraper_with_preferences - spider subprocess, Redis updates and
+Playwright escalations included - against scripts/mock_indeed_server.py with
+1, 2, 4 and 8 scrapes at once, the way Celery pool children run them, and
+reports scrapes/minute, p50/p95 scrape duration and the peak memory of the
+spider processes and their browsers
+
+Nothing leaves the machine: proxies are off and the run is dry (no Supabase
+writes). Needs the configured REDIS_URL to be reachable (the service follows
+each spider over pub/sub) and Playwright's Chromium installed
+
+Usage:
+    python scripts/benchmark_scrape_e2e.py [--concurrency 1 2 4 8] [--rounds 2] [--browser]
+                                           [--scrape-length 25] [--latency 0.3] [--jitter 0.2]
+                                           [--challenge-rate 0.1] [--forbidden-rate 0.05]
+"""
+
+import os
+import sys
+import time
+import argparse
+import statistics
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmark_startup import backend_dir, DUMMY_ENV
+from mock_indeed_server import start_server
+
+PREFERENCES = {
+    'title': 'python, developer',
+    'location': 'toronto',
+}
+
+class MemorySampler(threading.Thread):
+    """Peak RSS of everything this process started - spiders, Playwright drivers, Chromium"""
+
+    def __init__(self, process_tree_rss, interval=0.5):
+        super().__init__(daemon=True)
+        self.process_tree_rss = process_tree_rss
+        self.interval = interval
+        self.peak = 0
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            _, descendants = self.process_tree_rss()
+            self.peak = max(self.peak, descendants or 0)
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+def percentile(samples, pct):
+    return statistics.quantiles(samples, n=100)[pct - 1] if len(samples) > 1 else samples[0]
+
+def run_level(run_scrape, concurrency, scrapes, preferences):
+    """
+    Run `scrapes` scrapes with `concurrency` at a time
+
+    Returns:
+        (wall seconds, [(scrape seconds, final ScrapeUpdateMessage), ...])
+    """
+    def one(i):
+        started = time.perf_counter()
+        update = run_scrape(f'benchmark-{concurrency}-{i}', preferences)
+        return time.perf_counter() - started, update
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(one, range(scrapes)))
+    return time.perf_counter() - started, results
+
+def main():
+    parser = argparse.ArgumentParser(description='End-to-end scrape throughput against a local mock Indeed')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--rounds', type=int, default=2, help='Scrapes per level = concurrency x rounds')
+    parser.add_argument('--browser', action='store_true', help='Render every page in Playwright (no plain HTTP tier)')
+    parser.add_argument('--scrape-length', type=int, default=25)
+    parser.add_argument('--latency', type=float, default=0.3)
+    parser.add_argument('--jitter', type=float, default=0.2)
+    parser.add_argument('--challenge-rate', type=float, default=0.1)
+    parser.add_argument('--forbidden-rate', type=float, default=0.05)
+    args = parser.parse_args()
+
+    server = start_server(latency=args.latency, jitter=args.jitter,
+                          challenge_rate=args.challenge_rate, forbidden_rate=args.forbidden_rate)
+
+    # Read by the app settings and inherited by every spider subprocess - set before either loads
+    for key, value in DUMMY_ENV.items():
+        os.environ.setdefault(key, value)
+    os.environ['INDEED_BASE_URL'] = server.base_url
+    os.environ['PROXY_DISABLED'] = '1'
+    os.environ['SCRAPER_DRY_RUN'] = '1'
+    os.environ['TIERED_FETCH_ENABLED'] = '0' if args.browser else '1'
+    os.environ.setdefault('LOG_LEVEL', 'WARNING')
+
+    sys.path.insert(0, str(backend_dir))
+    sys.path.insert(0, str(backend_dir / 'scraper'))
+    from scraper.scraper_service import run_scraper_with_preferences
+    from indeed_scraper.extensions import process_tree_rss, MB
+
+    preferences = {**PREFERENCES, 'scrape_length': args.scrape_length}
+
+    print(f'Mock Indeed at {server.base_url}: {args.latency}s (+{args.jitter}s) per page, '
+          f'{args.challenge_rate:.0%} challenges, {args.forbidden_rate:.0%} 403s; '
+          f'{"browser only" if args.browser else "tiered fetch"}, {args.scrape_length} results per scrape\n')
+    print(f'{"scrapes at once":>15}{"scrapes":>9}{"failed":>8}{"per min":>9}{"p50 s":>8}{"p95 s":>8}'
+          f'{"peak MB":>9}{"pages":>7}{"browser":>9}')
+
+    baseline = None
+    try:
+        for concurrency in args.concurrency:
+            scrapes = concurrency * args.rounds
+            sampler = MemorySampler(process_tree_rss)
+            sampler.start()
+            try:
+                wall, results = run_level(run_scraper_with_preferences, concurrency, scrapes, preferences)
+            finally:
+                sampler.stop()
+
+            durations = [seconds for seconds, _ in results]
+            updates = [update for _, update in results]
+            failed = sum(update.status == 'failed' for update in updates)
+            metrics = [update.metrics for update in updates if update.metrics]
+            pages = statistics.mean(m.pages_fetched for m in metrics) if metrics else 0
+            browser_pages = statistics.mean(m.browser_pages for m in metrics) if metrics else 0
+
+            per_minute = scrapes / wall * 60
+            baseline = baseline or per_minute
+            print(f'{concurrency:>15}{scrapes:>9}{failed:>8}{per_minute:>9.1f}'
+                  f'{percentile(durations, 50):>8.1f}{percentile(durations, 95):>8.1f}'
+                  f'{sampler.peak / MB:>9.0f}{pages:>7.1f}{browser_pages:>9.1f}   {per_minute / baseline:.1f}x')
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    print(f'\nMock server: {server.counts}')
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,261 @@
+"""
+Offline benchmark suite for IndeedSpider callbacks
+Feeds the saved pages in scripts/fixtures/indeed through HtmlResponse into the
+spider with the database and Redis stubbed out, so no network is needed
+
+Each stage reports throughput (cards/sec or items/sec), peak traced memory and
+allocations still alive after the call. With --baseline the run fails when a
+stage's throughput drops more than --tolerance below the saved baseline, so the
+suite can gate CI.
+
+Usage:
+    python scripts/benchmark_spider.py [--iterations N] [--save out.json]
+                                       [--baseline base.json] [--tolerance 0.25]
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import tracemalloc
+from pathlib import Path
+
+backend_dir = Path(__file__).resolve().parent.parent
+scraper_dir = backend_dir / 'scraper'
+
+sys.path.insert(0, str(backend_dir))
+sys.path.insert(0, str(scraper_dir))
+sys.path.insert(0, str(scraper_dir / 'indeed_scraper'))
+
+from scrapy import Request
+from scrapy.http import HtmlResponse
+from scrapy.utils.test import get_crawler
+from indeed_scraper.spiders import indeed_spider as spider_module
+from indeed_scraper.spiders.indeed_spider import IndeedSpider
+from indeed_scraper.extractors import extract_mosaic_results, mosaic_results_to_items
+
+FIXTURES_DIR = Path(__file__).resolve().parent / 'fixtures' / 'indeed'
+
+PREFERENCES = {
+    'title': 'python, developer, engineer',
+    'location': 'toronto, ottawa, remote',
+    'job_type': 'full-time, contract',
+    'scrape_length': 1000,  # Never cap a benchmark page
+}
+
+# ============================================================
+# Stubs
+# ============================================================
+
+published = []
+
+# Escalated requests still pick a proxy; nothing is ever sent through it
+os.environ.setdefault('PROXY_STR', '["127.0.0.1:9"]')
+os.environ.setdefault('PROXY_USERNAME', 'benchmark')
+os.environ.setdefault('PROXY_PASSWORD', 'benchmark')
+
+def stub_publish_update(message):
+    # Redis stand-in: keep messages for the correctness checks
+    published.append(message)
+
+class StubDatabase:
+    """In-memory stand-in for save_job_to_database, with the same dedup key"""
+
+    def __init__(self):
+        self.seen = set()
+
+    def save(self, job_data, user_id=None):
+        key = (user_id, job_data.get('title'), job_data.get('company_name'), job_data.get('location'))
+        if key in self.seen:
+            return False
+        self.seen.add(key)
+        return True
+
+def make_spider():
+    crawler = get_crawler(IndeedSpider)
+    spider = IndeedSpider.from_crawler(crawler, user_id='benchmark', preferences=PREFERENCES)
+    spider.db = StubDatabase()
+    spider.save_job_to_database = spider.db.save
+    spider_module.publish_update = stub_publish_update
+    return spider
+
+def make_response(name, tier='browser', page_number=1):
+    url = f'https://{IndeedSpider.base_domain}/jobs?q=python&l=toronto&start={(page_number - 1) * 10}'
+    request = Request(url, meta={'fetch_tier': tier, 'page_number': page_number})
+    return HtmlResponse(url=url, body=(FIXTURES_DIR / name).read_bytes(), encoding='utf-8', request=request)
+
+def reset(spider):
+    spider.jobs_scraped = 0
+    for matcher in spider.subscribers:
+        matcher.jobs_scraped = 0
+    spider.db.seen.clear()
+    spider.seen_jobs.clear()
+    published.clear()
+
+# ============================================================
+# Correctness - a fast parser that parses the wrong thing is not a win
+# ============================================================
+
+def check_fixtures(spider):
+    """Run every fixture once and check the callback does what the page calls for"""
+    failures = []
+
+    for name in ('search_page_1.html', 'search_page_css_only.html', 'search_page_json_only.html'):
+        reset(spider)
+        items = list(spider.parse_search_page(make_response(name)))
+        if not items or any(isinstance(item, Request) for item in items):
+            failures.append(f'{name}: expected job items, got {len(items)} results')
+
+    for name in ('challenge_page.html', 'empty_page.html'):
+        reset(spider)
+        results = list(spider.parse_search_page(make_response(name, tier='http')))
+        if len(results) != 1 or not results[0].meta.get('playwright'):
+            failures.append(f'{name}: plain HTTP page was not escalated to the browser')
+
+    reset(spider)
+    spider.failed_pages.clear()
+    list(spider.parse_search_page(make_response('challenge_page.html', tier='browser')))
+    if not spider.failed_pages:
+        failures.append('challenge_page.html: browser tier challenge was not recorded as a lost page')
+
+    return failures
+
+# ============================================================
+# Stages
+# ============================================================
+
+def build_stages(spider):
+    """Each stage is (name, unit, units per call, callable)"""
+    payload_pages = [(FIXTURES_DIR / n).read_text(encoding='utf-8') for n in ('search_page_1.html', 'search_page_2.html', 'search_page_json_only.html')]
+    card_pages = [make_response(n) for n in ('search_page_1.html', 'search_page_2.html', 'search_page_css_only.html')]
+    result_pages = [make_response(n, page_number=i + 1) for i, n in enumerate(('search_page_1.html', 'search_page_2.html', 'search_page_css_only.html', 'search_page_json_only.html'))]
+
+    items = []
+    for html in payload_pages:
+        items.extend(mosaic_results_to_items(extract_mosaic_results(html), spider.base_domain))
+    card_count = sum(len(spider.find_job_cards(page)) for page in card_pages)
+
+    reset(spider)
+    result_count = sum(len(list(spider.parse_search_page(page))) for page in result_pages)
+
+    def extract_json():
+        for html in payload_pages:
+            list(mosaic_results_to_items(extract_mosaic_results(html), spider.base_domain))
+
+    def parse_job_card():
+        for page in card_pages:
+            # Fresh response so the cached lxml tree is rebuilt, like a real page
+            page = page.replace(body=page.body)
+            for card in spider.find_job_cards(page):
+                spider.parse_job_card(card)
+
+    def matches_preferences():
+        for item in items:
+            spider.matches_preferences(item)
+
+    def parse_search_results():
+        reset(spider)
+        for page in result_pages:
+            for _ in spider.parse_search_page(page.replace(body=page.body)):
+                pass
+
+    return [
+        ('extract_json', 'cards', len(items), extract_json),
+        ('parse_job_card', 'cards', card_count, parse_job_card),
+        ('matches_preferences', 'items', len(items), matches_preferences),
+        ('parse_search_results', 'items', result_count, parse_search_results),
+    ]
+
+def time_stage(fn, iterations):
+    """Best seconds per call over three batches"""
+    best = float('inf')
+    for _ in range(3):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            fn()
+        best = min(best, (time.perf_counter() - start) / iterations)
+    return best
+
+def measure_allocations(fn):
+    """Peak traced bytes and blocks still alive after one call"""
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    fn()
+    after = tracemalloc.take_snapshot()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    live_blocks = sum(stat.count_diff for stat in after.compare_to(before, 'lineno') if stat.count_diff > 0)
+    return peak, live_blocks
+
+# ============================================================
+# Main
+# ============================================================
+
+def compare_to_baseline(results, baseline_path, tolerance):
+    baseline = json.loads(Path(baseline_path).read_text())
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        floor = baseline[name]['per_sec'] * (1 - tolerance)
+        if result['per_sec'] < floor:
+            regressions.append(f"{name}: {result['per_sec']:.0f}/s is below {floor:.0f}/s "
+                               f"(baseline {baseline[name]['per_sec']:.0f}/s, tolerance {tolerance:.0%})")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline IndeedSpider benchmark')
+    parser.add_argument('--iterations', type=int, default=20)
+    parser.add_argument('--save', help='Write results as JSON (use as a future baseline)')
+    parser.add_argument('--baseline', help='Fail if throughput regresses against this JSON')
+    parser.add_argument('--tolerance', type=float, default=0.25)
+    args = parser.parse_args()
+
+    # Per-card logging would dominate the timings (the challenge check logs an expected error)
+    logging.disable(logging.ERROR)
+
+    spider = make_spider()
+
+    failures = check_fixtures(spider)
+    if failures:
+        print('Fixture checks failed:')
+        for failure in failures:
+            print(f'  {failure}')
+        return 1
+
+    results = {}
+    print(f'{"stage":<24}{"units":>7}{"ms/call":>10}{"per sec":>12}{"peak KiB":>10}{"live blocks":>13}')
+    for name, unit, units, fn in build_stages(spider):
+        seconds = time_stage(fn, args.iterations)
+        peak, live_blocks = measure_allocations(fn)
+        per_sec = units / seconds
+        results[name] = {
+            'unit': unit,
+            'units': units,
+            'ms_per_call': seconds * 1000,
+            'per_sec': per_sec,
+            'peak_kib': peak / 1024,
+            'live_blocks': live_blocks,
+        }
+        print(f'{name:<24}{units:>7}{seconds * 1000:>10.2f}{per_sec:>8.0f} {unit:<3}{peak / 1024:>10.0f}{live_blocks:>13}')
+
+    if args.save:
+        Path(args.save).write_text(json.dumps(results, indent=2))
+        print(f'Saved results to {args.save}')
+
+    if args.baseline:
+        regressions = compare_to_baseline(results, args.baseline, args.tolerance)
+        if regressions:
+            print('Throughput regressions:')
+            for regression in regressions:
+                print(f'  {regression}')
+            return 1
+        print('No regressions against baseline')
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,130 @@
+"""
+API cold start benchmark
+Measures, in fresh interpreters:
+    - import time of app.main (what every API replica pays on boot)
+    - import time of worker.celery_app (what the API used to pull in via the scrape router)
+    - time to first request: spawn uvicorn until /api/health answers
+
+Time to first request needs the configured REDIS_URL to be reachable, since the
+lifespan hook subscribes to scrape updates before serving
+
+Usage: python scripts/benchmark_startup.py [runs] [--skip-serve]
+"""
+
+import os
+import sys
+import time
+import socket
+import subprocess
+import statistics
+import urllib.request
+from pathlib import Path
+
+backend_dir = Path(__file__).resolve().parent.parent
+
+# Settings needs these to import; nothing is contacted during import
+DUMMY_ENV = {
+    'ALLOWED_ORIGINS': '["http://localhost:3000"]',
+    'REDIS_URL': 'redis://localhost:6379/0',
+    'UPSTASH_REDIS_REST_URL': 'https://localhost',
+    'UPSTASH_REDIS_REST_TOKEN': 'benchmark',
+    'SUPABASE_URL': 'http://localhost:54321',
+    'SUPABASE_KEY': 'benchmark.benchmark.benchmark',
+    'EMAIL_PASSWORD': 'benchmark',
+    'PROXY_STR': '[]',
+    'PROXY_USERNAME': 'benchmark',
+    'PROXY_PASSWORD': 'benchmark',
+}
+
+def child_env():
+    env = {**DUMMY_ENV, **os.environ}
+    env['PYTHONPATH'] = str(backend_dir)
+    return env
+
+def import_time(module):
+    """Seconds to import module in a fresh interpreter"""
+    code = f"import time; t = time.perf_counter(); import {module}; print(time.perf_counter() - t)"
+    result = subprocess.run([sys.executable, '-c', code], cwd=backend_dir, env=child_env(),
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr.strip()}")
+    return float(result.stdout.strip().splitlines()[-1])
+
+def heaviest_imports(module, top=8):
+    """Top-level packages by cumulative import time (python -X importtime)"""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            cwd=backend_dir, env=child_env(), capture_output=True, text=True)
+    packages = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+        _, cumulative, name = [part.strip() for part in line[len('import time:'):].split('|')]
+        if not cumulative.isdigit():
+            continue
+        # Only top-level entries (no leading indentation in the name column)
+        raw_name = line.rsplit('|', 1)[1]
+        if raw_name.startswith('  '):
+            continue
+        package = name.split('.')[0]
+        packages[package] = max(packages.get(package, 0), int(cumulative))
+    return sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top]
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+def time_to_first_request(timeout=60):
+    """Seconds from spawning uvicorn until /api/health returns 200"""
+    port = free_port()
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable, '-m', 'uvicorn', 'app.main:app', '--port', str(port)],
+                               cwd=backend_dir, env=child_env(),
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while time.perf_counter() - start < timeout:
+            if process.poll() is not None:
+                raise RuntimeError("uvicorn exited during startup (is REDIS_URL reachable?)")
+            try:
+                with urllib.request.urlopen(f'http://127.0.0.1:{port}/api/health', timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - start
+            except OSError:
+                time.sleep(0.02)
+        raise RuntimeError(f"/api/health did not answer within {timeout}s")
+    finally:
+        process.terminate()
+        process.wait()
+
+def summarize(samples):
+    return f"median {statistics.median(samples) * 1000:7.0f} ms   min {min(samples) * 1000:7.0f} ms"
+
+def main():
+    args = [a for a in sys.argv[1:] if not a.startswith('--')]
+    runs = int(args[0]) if args else 5
+    skip_serve = '--skip-serve' in sys.argv
+
+    print(f"Cold start over {runs} runs\n")
+
+    for module in ('app.main', 'worker.celery_app'):
+        try:
+            samples = [import_time(module) for _ in range(runs)]
+            print(f"import {module:<20} {summarize(samples)}")
+        except RuntimeError as e:
+            print(f"import {module:<20} failed: {e}")
+
+    print("\nHeaviest imports for app.main (cumulative ms):")
+    for package, micros in heaviest_imports('app.main'):
+        print(f"    {package:<24} {micros / 1000:7.1f}")
+
+    if not skip_serve:
+        try:
+            samples = [time_to_first_request() for _ in range(runs)]
+            print(f"\ntime to first request        {summarize(samples)}")
+        except RuntimeError as e:
+            print(f"\ntime to first request failed: {e}")
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
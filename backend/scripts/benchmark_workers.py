@@ -0,0 +1,143 @@
+"""
+API throughput by worker count
+Starts the production server (gunicorn.conf.py) with 1, 2, 4 and 8 workers and
+drives each with the same async load, reporting requests/sec and latency
+percentiles
+
+The default path (/api/health) measures serving overhead only. Point --path at
+a database endpoint with --token to include Supabase calls, e.g.
+    --path /api/get_jobs --token <supabase access token>
+
+Needs the configured REDIS_URL to be reachable (the lifespan hook subscribes
+to pub/sub in every worker) and httpx (installed with fastapi[standard])
+
+Usage:
+    python scripts/benchmark_workers.py [--workers 1 2 4 8] [--concurrency 64]
+                                        [--duration 10] [--path /api/health] [--token T]
+"""
+
+import sys
+import time
+import asyncio
+import argparse
+import statistics
+import subprocess
+import urllib.request
+
+import httpx
+
+from benchmark_startup import backend_dir, child_env, free_port
+
+def start_server(workers, port, timeout=60):
+    """Spawn gunicorn and wait until every worker can answer /api/health"""
+    env = child_env()
+    env['WEB_CONCURRENCY'] = str(workers)
+    env['PORT'] = str(port)
+    env['GUNICORN_LOG_LEVEL'] = 'warning'
+
+    process = subprocess.Popen([sys.executable, '-m', 'gunicorn', 'app.main:app', '-c', 'gunicorn.conf.py',
+                                '--access-logfile', '/dev/null'],
+                               cwd=backend_dir, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    start = time.perf_counter()
+    while time.perf_counter() - start < timeout:
+        if process.poll() is not None:
+            raise RuntimeError("gunicorn exited during startup (is REDIS_URL reachable?)")
+        try:
+            with urllib.request.urlopen(f'http://127.0.0.1:{port}/api/health', timeout=1) as response:
+                if response.status == 200:
+                    # First answer means one worker is up - give the rest a moment
+                    time.sleep(1 + workers * 0.25)
+                    return process
+        except OSError:
+            time.sleep(0.05)
+
+    stop_server(process)
+    raise RuntimeError(f"/api/health did not answer within {timeout}s")
+
+def stop_server(process):
+    process.terminate()
+    try:
+        process.wait(timeout=40)  # graceful_timeout is 30s
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+async def run_load(url, concurrency, duration, headers):
+    """Closed-loop load: `concurrency` clients each sending back to back"""
+    latencies = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(limits=limits, headers=headers, timeout=30) as client:
+
+        async def client_loop():
+            nonlocal errors
+            while time.perf_counter() < deadline:
+                sent = time.perf_counter()
+                try:
+                    response = await client.get(url)
+                    if response.status_code >= 400:
+                        errors += 1
+                        continue
+                except httpx.HTTPError:
+                    errors += 1
+                    continue
+                latencies.append(time.perf_counter() - sent)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(client_loop() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    return latencies, errors, elapsed
+
+def percentile(samples, pct):
+    return statistics.quantiles(samples, n=100)[pct - 1] if len(samples) > 1 else samples[0]
+
+def main():
+    parser = argparse.ArgumentParser(description='API throughput by gunicorn worker count')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--concurrency', type=int, default=64)
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--path', default='/api/health')
+    parser.add_argument('--token', help='Bearer token for authenticated paths')
+    args = parser.parse_args()
+
+    headers = {'Authorization': f'Bearer {args.token}'} if args.token else {}
+
+    print(f'GET {args.path}, {args.concurrency} concurrent clients, {args.duration:.0f}s per run\n')
+    print(f'{"workers":>8}{"requests":>10}{"errors":>8}{"req/s":>10}{"p50 ms":>9}{"p95 ms":>9}{"p99 ms":>9}')
+
+    baseline = None
+    for workers in args.workers:
+        port = free_port()
+        try:
+            process = start_server(workers, port)
+        except RuntimeError as e:
+            print(f'{workers:>8}  failed: {e}')
+            continue
+
+        try:
+            # Short warm-up so connection setup and imports don't land in the numbers
+            asyncio.run(run_load(f'http://127.0.0.1:{port}{args.path}', args.concurrency, 1, headers))
+            latencies, errors, elapsed = asyncio.run(
+                run_load(f'http://127.0.0.1:{port}{args.path}', args.concurrency, args.duration, headers))
+        finally:
+            stop_server(process)
+
+        if not latencies:
+            print(f'{workers:>8}{0:>10}{errors:>8}  every request failed')
+            continue
+
+        rps = len(latencies) / elapsed
+        baseline = baseline or rps
+        print(f'{workers:>8}{len(latencies):>10}{errors:>8}{rps:>10.0f}'
+              f'{percentile(latencies, 50) * 1000:>9.1f}{percentile(latencies, 95) * 1000:>9.1f}'
+              f'{percentile(latencies, 99) * 1000:>9.1f}   {rps / baseline:.1f}x')
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
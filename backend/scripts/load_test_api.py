@@ -0,0 +1,270 @@
+"""
+API load test, offline
+Starts app.main:app on the in-memory database (app/core/memory_db.py) seeded
+with synthetic users holding 10 to 10k jobs, signs its own JWTs (served from a
+local JWKS endpoint via JWKS_URL), and drives it with virtual users:
+
+    get_jobs 50%, search_jobs 25%, toggle_job_priority 15%, job_complete 10%
+
+one run per jobs-per-user tier, then opens WebSocket clients on /ws/scrape and
+publishes scrape updates through Redis to time their delivery. Reports
+requests/second and p50/p95/p99 latency per endpoint, so DB-layer and caching
+changes can be compared run to run. --db-latency adds a per-query delay, a
+stand-in for the Supabase round trip
+
+Needs the configured REDIS_URL to be reachable (the API subscribes on startup)
+
+Usage:
+    python scripts/load_test_api.py [--tiers 10 100 1000 10000] [--users 20] [--duration 20]
+                                    [--db-latency 0.0] [--workers 1] [--think 0.0]
+                                    [--ws-clients 200] [--ws-messages 1000] [--ws-rate 200]
+"""
+
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import statistics
+import subprocess
+import threading
+import urllib.request
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import jwt
+import httpx
+import websockets
+from redis.asyncio import Redis
+from cryptography.hazmat.primitives.asymmetric import ec
+
+from benchmark_startup import backend_dir, child_env, free_port
+
+sys.path.insert(0, str(backend_dir))
+from app.core.memory_db import seed_user_ids
+
+KEY_ID = 'load-test'
+
+# (endpoint, weight) - a session mostly browses, sometimes edits
+SCENARIO = (('get_jobs', 50), ('search_jobs', 25), ('toggle_job_priority', 15), ('job_complete', 10))
+
+SEARCH_TERMS = ['python', 'toronto', 'engineer', 'contract', 'shopify', 'remote', 'dental', 'analyst']
+
+class Signer:
+    """An EC key pair: signs tokens for seeded users, publishes the public half as a JWKS"""
+
+    def __init__(self):
+        self.key = ec.generate_private_key(ec.SECP256R1())
+        jwk = jwt.algorithms.ECAlgorithm.to_jwk(self.key.public_key(), as_dict=True)
+        self.jwks = json.dumps({'keys': [{**jwk, 'kid': KEY_ID, 'alg': 'ES256', 'use': 'sig'}]}).encode()
+
+    def token(self, user_id):
+        claims = {'sub': user_id, 'aud': 'authenticated', 'exp': int(time.time()) + 3600,
+                  'email': f'{user_id}@loadtest.local'}
+        return jwt.encode(claims, self.key, algorithm='ES256', headers={'kid': KEY_ID})
+
+def serve_jwks(signer):
+    """JWKS on a background thread - returns its URL"""
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(signer.jwks)))
+            self.end_headers()
+            self.wfile.write(signer.jwks)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f'http://127.0.0.1:{server.server_address[1]}/auth/v1/.well-known/jwks.json'
+
+def start_api(env, workers, timeout=120):
+    """uvicorn on a free port - returns (process, base url) once /api/health answers"""
+    port = free_port()
+    process = subprocess.Popen([sys.executable, '-m', 'uvicorn', 'app.main:app', '--port', str(port),
+                                '--workers', str(workers), '--log-level', 'warning'],
+                               cwd=backend_dir, env=env, stdout=subprocess.DEVNULL)
+    base_url = f'http://127.0.0.1:{port}'
+    started = time.perf_counter()
+    while time.perf_counter() - started < timeout:
+        if process.poll() is not None:
+            raise RuntimeError("uvicorn exited during startup (is REDIS_URL reachable?)")
+        try:
+            with urllib.request.urlopen(f'{base_url}/api/health', timeout=1) as response:
+                if response.status == 200:
+                    return process, base_url
+        except OSError:
+            time.sleep(0.1)
+    process.terminate()
+    raise RuntimeError(f"/api/health did not answer within {timeout}s")
+
+def percentiles(samples):
+    """(p50, p95, p99) in milliseconds"""
+    if len(samples) < 2:
+        value = samples[0] * 1000 if samples else 0.0
+        return value, value, value
+    cuts = statistics.quantiles(samples, n=100)
+    return cuts[49] * 1000, cuts[94] * 1000, cuts[98] * 1000
+
+async def virtual_user(client, token, deadline, think, results, seed):
+    """One browsing session until deadline - appends (endpoint, ok, seconds) to results"""
+    rng = random.Random(seed)
+    headers = {'Authorization': f'Bearer {token}'}
+    endpoints, weights = zip(*SCENARIO)
+    job_ids = []
+
+    async def call(endpoint, method, path, **kwargs):
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, path, headers=headers, **kwargs)
+            ok = response.status_code < 400
+        except httpx.HTTPError:
+            response, ok = None, False
+        results.append((endpoint, ok, time.perf_counter() - started))
+        return response if ok else None
+
+    while time.perf_counter() < deadline:
+        endpoint = rng.choices(endpoints, weights)[0]
+        if endpoint != 'search_jobs' and not job_ids:
+            endpoint = 'get_jobs'  # Nothing known (or left) to edit
+
+        if endpoint == 'get_jobs':
+            response = await call(endpoint, 'GET', '/api/get_jobs')
+            if response is not None:
+                job_ids = [job['id'] for job in response.json()]
+        elif endpoint == 'search_jobs':
+            await call(endpoint, 'GET', '/api/search_jobs', params={'q': rng.choice(SEARCH_TERMS)})
+        elif endpoint == 'toggle_job_priority':
+            await call(endpoint, 'PUT', f'/api/toggle_job_priority/{rng.choice(job_ids)}')
+        else:
+            job_id = job_ids.pop(rng.randrange(len(job_ids)))
+            await call(endpoint, 'GET', f'/api/job_complete/{job_id}')
+
+        if think:
+            await asyncio.sleep(rng.uniform(0, 2 * think))
+
+async def run_tier(base_url, tokens, duration, think):
+    """Every user of a tier browsing at once for duration seconds"""
+    results = []
+    limits = httpx.Limits(max_connections=len(tokens), max_keepalive_connections=len(tokens))
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        deadline = time.perf_counter() + duration
+        await asyncio.gather(*(virtual_user(client, token, deadline, think, results, i)
+                               for i, token in enumerate(tokens)))
+    return results
+
+def report_tier(jobs, users, duration, results):
+    print(f'\n{jobs} jobs per user, {users} users')
+    print(f'{"endpoint":<22}{"requests":>10}{"errors":>8}{"req/s":>9}{"p50 ms":>9}{"p95 ms":>9}{"p99 ms":>9}')
+    rows = [(endpoint, [r for r in results if r[0] == endpoint]) for endpoint, _ in SCENARIO]
+    rows.append(('all', results))
+    for endpoint, samples in rows:
+        if not samples:
+            continue
+        p50, p95, p99 = percentiles([seconds for _, _, seconds in samples])
+        errors = sum(not ok for _, ok, _ in samples)
+        print(f'{endpoint:<22}{len(samples):>10}{errors:>8}{len(samples) / duration:>9.1f}'
+              f'{p50:>9.1f}{p95:>9.1f}{p99:>9.1f}')
+
+async def run_websockets(base_url, env, signer, user_ids, clients, messages, rate):
+    """
+    Open clients WebSockets, publish messages scrape updates at rate per second
+    through Redis, and time publish-to-receive for each delivery
+    """
+    ws_url = base_url.replace('http://', 'ws://') + '/ws/scrape'
+    owners = [user_ids[i % len(user_ids)] for i in range(clients)]
+    sent = {}  # (user_id, sequence) -> publish time
+    latencies = []
+
+    async def listen(socket):
+        async for raw in socket:
+            update = json.loads(raw)
+            published = sent.get((update['user_id'], update['jobs_found']))
+            if published is not None:
+                latencies.append(time.perf_counter() - published)
+
+    connect_times = []
+    sockets = []
+    for user_id in owners:
+        started = time.perf_counter()
+        sockets.append(await websockets.connect(f'{ws_url}?token={signer.token(user_id)}'))
+        connect_times.append(time.perf_counter() - started)
+    listeners = [asyncio.create_task(listen(socket)) for socket in sockets]
+
+    redis = Redis.from_url(env['REDIS_URL'])
+    channel = env.get('SCRAPE_UPDATE_CHANNEL', 'scrape_update')
+    expected = 0
+    started = time.perf_counter()
+    for sequence in range(messages):
+        user_id = owners[sequence % len(owners)]
+        sent[(user_id, sequence)] = time.perf_counter()
+        await redis.publish(channel, json.dumps({'user_id': user_id, 'status': 'running', 'jobs_found': sequence}))
+        expected += owners.count(user_id)
+        await asyncio.sleep(max(0.0, started + (sequence + 1) / rate - time.perf_counter()))
+
+    # Stragglers
+    drain_until = time.perf_counter() + 5
+    while len(latencies) < expected and time.perf_counter() < drain_until:
+        await asyncio.sleep(0.05)
+
+    for task in listeners:
+        task.cancel()
+    for socket in sockets:
+        await socket.close()
+    await redis.aclose()
+
+    print(f'\nWebSocket: {clients} clients, {messages} updates at {rate}/s')
+    p50, p95, p99 = percentiles(connect_times)
+    print(f'{"connect (incl. auth)":<22}{len(connect_times):>10}{"":>8}{"":>9}{p50:>9.1f}{p95:>9.1f}{p99:>9.1f}')
+    p50, p95, p99 = percentiles(latencies)
+    print(f'{"publish to receive":<22}{len(latencies):>10}{expected - len(latencies):>8}{"":>9}'
+          f'{p50:>9.1f}{p95:>9.1f}{p99:>9.1f}   (errors = undelivered)')
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline API load test on the in-memory database')
+    parser.add_argument('--tiers', type=int, nargs='+', default=[10, 100, 1000, 10000], help='Jobs per user')
+    parser.add_argument('--users', type=int, default=20, help='Concurrent users per tier')
+    parser.add_argument('--duration', type=float, default=20, help='Seconds per tier')
+    parser.add_argument('--think', type=float, default=0.0, help='Mean seconds between a user\'s requests')
+    parser.add_argument('--db-latency', type=float, default=0.0, help='Seconds added to every database query')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='uvicorn workers - each holds its own copy of the data, so edits diverge')
+    parser.add_argument('--ws-clients', type=int, default=200)
+    parser.add_argument('--ws-messages', type=int, default=1000)
+    parser.add_argument('--ws-rate', type=float, default=200, help='Updates published per second')
+    args = parser.parse_args()
+
+    seed_spec = ','.join(f'{jobs}:{args.users}' for jobs in args.tiers)
+    signer = Signer()
+    env = child_env()
+    env.update({
+        'DATABASE_BACKEND': 'memory',
+        'MEMORY_DB_SEED': seed_spec,
+        'MEMORY_DB_LATENCY': str(args.db_latency),
+        'JWKS_URL': serve_jwks(signer),
+        'TRACE_EXPORTER': 'none',
+    })
+
+    print(f'Seeding {seed_spec} (jobs per user:users), {args.db_latency * 1000:.0f} ms per query, '
+          f'{args.workers} worker(s)')
+    process, base_url = start_api(env, args.workers)
+    try:
+        users_by_tier = seed_user_ids(seed_spec)
+        for jobs in args.tiers:
+            tokens = [signer.token(user_id) for user_id in users_by_tier[jobs]]
+            results = asyncio.run(run_tier(base_url, tokens, args.duration, args.think))
+            report_tier(jobs, len(tokens), args.duration, results)
+
+        if args.ws_clients and args.ws_messages:
+            all_users = [user_id for user_ids in users_by_tier.values() for user_id in user_ids]
+            asyncio.run(run_websockets(base_url, env, signer, all_users,
+                                       args.ws_clients, args.ws_messages, args.ws_rate))
+    finally:
+        process.terminate()
+        process.wait()
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
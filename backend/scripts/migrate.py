@@ -0,0 +1,136 @@
+"""
+Database migrations
+Applies migrations/NNN_*.sql in order, each in its own transaction, and records
+the applied versions in schema_migrations. --explain runs EXPLAIN on the hot
+jobs queries and reports which index serves each and whether Postgres still sorts
+
+Connects with DATABASE_URL - the Supabase direct connection string (Project
+Settings -> Database), not the REST URL. Needs psycopg, which is not in the
+requirements (only run from a workstation or CI): pip install "psycopg[binary]"
+
+Usage:
+    python scripts/migrate.py [--status] [--explain] [--user-id UUID] [--natural]
+"""
+
+import os
+import sys
+import json
+import argparse
+from pathlib import Path
+
+MIGRATIONS_DIR = Path(__file__).resolve().parent.parent / 'migrations'
+
+# (query, index expected to serve it, whether its order by should come from the index)
+HOT_QUERIES = {
+    'get_jobs': (
+        "select * from jobs where user_id = %(user_id)s order by priority desc, title",
+        'jobs_user_priority_title_idx', True,
+    ),
+    'get_priority_jobs': (
+        "select * from jobs where user_id = %(user_id)s and priority order by title",
+        'jobs_user_priority_title_idx', True,
+    ),
+    'duplicate check': (
+        "select id from jobs where user_id = %(user_id)s and title = %(title)s "
+        "and company_name = %(company_name)s and location = %(location)s",
+        'jobs_user_title_company_location_key', False,
+    ),
+}
+
+def migrations():
+    """[(version, path)] in the order to apply them"""
+    return sorted((path.name.split('_', 1)[0], path) for path in MIGRATIONS_DIR.glob('[0-9]*_*.sql'))
+
+def applied_versions(conn):
+    conn.execute("""
+        create table if not exists schema_migrations (
+            version text primary key,
+            name text not null,
+            applied_at timestamptz not null default now()
+        )
+    """)
+    conn.commit()
+    return {row[0] for row in conn.execute("select version from schema_migrations")}
+
+def apply_pending(conn, status_only=False):
+    done = applied_versions(conn)
+    pending = [(version, path) for version, path in migrations() if version not in done]
+
+    for version, path in migrations():
+        print(f"{'applied' if version in done else 'pending'}  {path.name}")
+    if status_only or not pending:
+        return
+
+    for version, path in pending:
+        print(f"\nApplying {path.name}")
+        with conn.transaction():
+            conn.execute(path.read_text())
+            conn.execute("insert into schema_migrations (version, name) values (%s, %s)", (version, path.name))
+    print(f"\n{len(pending)} migration(s) applied")
+
+def plan_nodes(node):
+    yield node
+    for child in node.get('Plans', []):
+        yield from plan_nodes(child)
+
+def explain(conn, user_id=None, natural=False):
+    """EXPLAIN each hot query for the user with the most jobs - True when all use their index"""
+    if user_id is None:
+        row = conn.execute("select user_id from jobs group by user_id order by count(*) desc limit 1").fetchone()
+        if row is None:
+            print("No jobs to explain against")
+            return False
+        user_id = row[0]
+    sample = conn.execute("select title, company_name, location from jobs where user_id = %s limit 1",
+                          (user_id,)).fetchone() or ('', '', '')
+    params = {'user_id': user_id, 'title': sample[0], 'company_name': sample[1], 'location': sample[2]}
+    jobs = conn.execute("select count(*) from jobs where user_id = %s", (user_id,)).fetchone()[0]
+
+    print(f"\nPlans for user {user_id} ({jobs} jobs)"
+          f"{'' if natural else ', sequential scans disabled to test index fit (--natural to allow)'}\n")
+    ok = True
+    with conn.transaction():
+        if not natural:
+            # Small tables are cheaper to scan, which says nothing about whether the index fits
+            conn.execute("set local enable_seqscan = off")
+        for name, (query, index, ordered) in HOT_QUERIES.items():
+            plan = conn.execute(f"explain (format json) {query}", params).fetchone()[0]
+            plan = json.loads(plan) if isinstance(plan, str) else plan
+            nodes = list(plan_nodes(plan[0]['Plan']))
+            indexes = {node['Index Name'] for node in nodes if 'Index Name' in node}
+            sorts = any(node['Node Type'] in ('Sort', 'Incremental Sort') for node in nodes)
+
+            passed = index in indexes and not (ordered and sorts)
+            ok = ok and passed
+            shape = ' -> '.join(node['Node Type'] for node in nodes)
+            print(f"{'ok  ' if passed else 'FAIL'}  {name:<18} {shape}"
+                  f"  [index: {', '.join(sorted(indexes)) or 'none'}{', sorts' if sorts else ''}]")
+    return ok
+
+def main():
+    parser = argparse.ArgumentParser(description='Apply migrations/ and check index usage')
+    parser.add_argument('--status', action='store_true', help='List applied and pending migrations only')
+    parser.add_argument('--explain', action='store_true', help='Check the hot jobs queries use their indexes')
+    parser.add_argument('--user-id', help='User to explain for (default: the one with the most jobs)')
+    parser.add_argument('--natural', action='store_true', help='Leave sequential scans enabled when explaining')
+    args = parser.parse_args()
+
+    try:
+        import psycopg
+    except ImportError:
+        print('psycopg is not installed: pip install "psycopg[binary]"')
+        return 1
+
+    database_url = os.environ.get('DATABASE_URL')
+    if not database_url:
+        print('Set DATABASE_URL to the Postgres connection string')
+        return 1
+
+    with psycopg.connect(database_url) as conn:
+        if args.explain:
+            return 0 if explain(conn, args.user_id, args.natural) else 1
+        apply_pending(conn, status_only=args.status)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
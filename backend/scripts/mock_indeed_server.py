@@ -0,0 +1,160 @@
+"""
+Local stand-in for Indeed search pages
+Serves the recorded pages in scripts/fixtures/indeed for /jobs?q=&l=&start=
+with configurable latency, Cloudflare challenges and 403s, so scrapes can be
+run and benchmarked without Indeed or paid proxies
+
+Job keys are rewritten per query and offset, so deeper pages hold new jobs like
+real ones do. A page is challenged at most once - the browser re-fetch passes,
+as it would with a real challenge. Pages past --max-pages come back empty
+
+Point the spider at it (run_spider.py or scraper_service.py):
+    INDEED_BASE_URL=http://127.0.0.1:8765 PROXY_DISABLED=1 SCRAPER_DRY_RUN=1
+
+Usage:
+    python scripts/mock_indeed_server.py [--port 8765] [--latency 0.3] [--jitter 0.2]
+                                         [--challenge-rate 0.1] [--forbidden-rate 0.05]
+                                         [--max-pages 10]
+"""
+
+import re
+import time
+import random
+import hashlib
+import argparse
+import threading
+from pathlib import Path
+from urllib.parse import urlsplit, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+FIXTURES_DIR = Path(__file__).resolve().parent / 'fixtures' / 'indeed'
+
+SEARCH_PAGES = ('search_page_1.html', 'search_page_2.html')
+
+# Indeed job keys: 16 hex characters, in both the card HTML and the embedded payload
+JOB_KEY = re.compile(rb'(?<=data-jk=")[0-9a-f]{16}|(?<="jobkey": ")[0-9a-f]{16}')
+
+class MockIndeedServer(ThreadingHTTPServer):
+    """
+    Args:
+        address: (host, port) - port 0 picks a free one
+        latency: Seconds every page waits before answering
+        jitter: Up to this many seconds more, uniformly random
+        challenge_rate: Share of first fetches answered with a challenge page
+        forbidden_rate: Share of fetches answered with a bare 403
+        max_pages: Pages per query before results run out
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address, latency=0.3, jitter=0.2, challenge_rate=0.1, forbidden_rate=0.05, max_pages=10):
+        super().__init__(address, MockIndeedHandler)
+        self.latency = latency
+        self.jitter = jitter
+        self.challenge_rate = challenge_rate
+        self.forbidden_rate = forbidden_rate
+        self.max_pages = max_pages
+
+        self.pages = [(FIXTURES_DIR / name).read_bytes() for name in SEARCH_PAGES]
+        self.empty_page = (FIXTURES_DIR / 'empty_page.html').read_bytes()
+        self.challenge_page = (FIXTURES_DIR / 'challenge_page.html').read_bytes()
+
+        self.lock = threading.Lock()
+        self.challenged = set()  # Pages already challenged once
+        self.counts = {'pages': 0, 'empty': 0, 'challenges': 0, 'forbidden': 0}
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def count(self, outcome):
+        with self.lock:
+            self.counts[outcome] += 1
+
+    def first_challenge(self, page_id):
+        """Whether to challenge this fetch - each page at most once"""
+        with self.lock:
+            if page_id in self.challenged or random.random() >= self.challenge_rate:
+                return False
+            self.challenged.add(page_id)
+            return True
+
+    def search_page(self, query, location, start):
+        """A recorded page with job keys unique to this query and offset"""
+        page = self.pages[(start // 10) % len(self.pages)]
+        salt = f'{query}|{location}|{start}'.encode()
+        return JOB_KEY.sub(lambda m: hashlib.md5(salt + m.group()).hexdigest()[:16].encode(), page)
+
+class MockIndeedHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path != '/jobs':
+            # Favicons, /cdn-cgi/ beacons and the like from rendered pages
+            self.send_body(404, b'')
+            return
+
+        server = self.server
+        params = parse_qs(url.query)
+        query = params.get('q', [''])[0]
+        location = params.get('l', [''])[0]
+        start = int(params.get('start', ['0'])[0] or 0)
+
+        time.sleep(server.latency + random.uniform(0, server.jitter))
+
+        if random.random() < server.forbidden_rate:
+            server.count('forbidden')
+            self.send_body(403, b'<html><body>Forbidden</body></html>')
+        elif server.first_challenge((query, location, start)):
+            server.count('challenges')
+            # Cloudflare answers managed challenges with a 403 and the interstitial
+            self.send_body(403, server.challenge_page)
+        elif start // 10 >= server.max_pages:
+            server.count('empty')
+            self.send_body(200, server.empty_page)
+        else:
+            server.count('pages')
+            self.send_body(200, server.search_page(query, location, start))
+
+    def send_body(self, status, body):
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # One line per request would drown the scrape output
+
+def start_server(port=0, **options):
+    """Serve from a background thread - returns the server (shutdown() to stop)"""
+    server = MockIndeedServer(('127.0.0.1', port), **options)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def main():
+    parser = argparse.ArgumentParser(description='Local stand-in for Indeed search pages')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0.3)
+    parser.add_argument('--jitter', type=float, default=0.2)
+    parser.add_argument('--challenge-rate', type=float, default=0.1)
+    parser.add_argument('--forbidden-rate', type=float, default=0.05)
+    parser.add_argument('--max-pages', type=int, default=10)
+    args = parser.parse_args()
+
+    server = MockIndeedServer(('127.0.0.1', args.port), latency=args.latency, jitter=args.jitter,
+                              challenge_rate=args.challenge_rate, forbidden_rate=args.forbidden_rate,
+                              max_pages=args.max_pages)
+    print(f'Serving Indeed search pages on {server.base_url}/jobs - Ctrl+C to stop')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f'Served: {server.counts}')
+
+if __name__ == '__main__':
+    main()
@@ -1,24 +1,128 @@
+import json
+import time
+import logging
 import redis
-import asyncio
 from celery import Celery
+from celery.signals import worker_init, worker_process_init, setup_logging as setup_logging_signal
 
 from app.core.config import settings
+from app.core.celery_client import RUN_SCRAPE_TASK, RUN_CRAWL_PLAN_TASK, FLUSH_EMAIL_OUTBOX_TASK, FLUSH_EMAIL_DIGESTS_TASK, \
+    SCHEDULE_SCRAPES_TASK, QUEUE_MANUAL_SCRAPE_TASK, FLUSH_MANUAL_SCRAPES_TASK, TASK_ROUTES, EMAIL_QUEUE, SCRAPE_QUEUE
 from app.services import email_service
 from app.schemas.messages import ScrapeUpdateMessage, Status
+from app.core.telemetry import setup_tracing, start_metrics_server, observe, traced
+from app.core.logs import setup_logging
 
 # For production Upstash (SSL):
 # connection_link = f"rediss://:{settings.upstash_redis_rest_token}@{settings.upstash_redis_rest_url[8:]}:{settings.upstash_redis_port}?ssl_cert_reqs=required"
 
 celery_app = Celery('jobflow', broker=settings.redis_url, backend=settings.redis_url)
 
+# Scrape task limits: the scraper service kills the spider at scrape_timeout
+# (plus scrape_shutdown_grace once it has reported), the soft limit leaves time
+# to report that, the hard limit is the backstop
+SCRAPE_SOFT_TIME_LIMIT = settings.scrape_timeout + settings.scrape_shutdown_grace + 60
+SCRAPE_TIME_LIMIT = settings.scrape_timeout + settings.scrape_shutdown_grace + 120
+
+celery_app.conf.update(
+    task_routes=TASK_ROUTES,
+
+    # A scrape runs for minutes: reserve one at a time so queued scrapes go to
+    # whichever worker frees up first instead of waiting behind a busy one
+    worker_prefetch_multiplier=1,
+
+    # Ack after the task finishes, and requeue it if the worker dies mid-scrape
+    task_acks_late=True,
+    task_reject_on_worker_lost=True,
+
+    # Unacked tasks are redelivered after the visibility timeout - keep it
+    # well above the longest scrape or a running scrape gets started twice
+    broker_transport_options={'visibility_timeout': SCRAPE_TIME_LIMIT * 3},
+
+    # Recycle pool children so memory held after a crawl (supabase/redis
+    # clients, fragmentation) is returned to the OS
+    worker_max_tasks_per_child=20,
+    worker_max_memory_per_child=400_000,  # KiB, checked after each task
+)
+
+# Run celery beat alongside the workers to drive periodic tasks
+beat_schedule = {}
+if settings.email_digest_enabled:
+    beat_schedule['flush-email-digests'] = {
+        'task': FLUSH_EMAIL_DIGESTS_TASK,
+        'schedule': settings.email_digest_window,
+        # A flush that missed its window is replaced by the next one
+        'options': {'queue': EMAIL_QUEUE, 'expires': settings.email_digest_window},
+    }
+if settings.scheduled_scrapes_enabled:
+    beat_schedule['schedule-scrapes'] = {
+        'task': SCHEDULE_SCRAPES_TASK,
+        'schedule': settings.scheduler_tick,
+        'options': {'queue': EMAIL_QUEUE, 'expires': settings.scheduler_tick},
+    }
+celery_app.conf.beat_schedule = beat_schedule
+
+@setup_logging_signal.connect
+def init_logging(loglevel=None, **kwargs):
+    # Replaces Celery's own handlers with the queued JSON pipeline (app/core/logs.py);
+    # prints still arrive through Celery's stdout redirect. Pool children restart
+    # the writer thread after fork
+    if isinstance(loglevel, int):
+        loglevel = logging.getLevelName(loglevel)
+    setup_logging('jobflow-worker', loglevel)
+
+@worker_init.connect
+def serve_metrics(**kwargs):
+    # Main worker process - with PROMETHEUS_MULTIPROC_DIR set this also
+    # exports the pool children's samples
+    start_metrics_server(settings.metrics_port)
+
+@worker_process_init.connect
+def init_tracing(**kwargs):
+    # Per pool child - tracer providers don't survive fork
+    setup_tracing('jobflow-worker', settings.trace_exporter)
+
+def record_queue_wait(task):
+    """Time between dispatch (enqueued_at header) and a worker starting the task, None without the header"""
+    enqueued_at = task.request.get('enqueued_at') or (task.request.get('headers') or {}).get('enqueued_at')
+    if not enqueued_at:
+        return None
+    queue_wait = time.time() - float(enqueued_at)
+    observe('task.queue_wait', queue_wait)
+    return queue_wait
+
 def publish_update(message: ScrapeUpdateMessage):
     #r = redis.from_url(connection_link)
     r = redis.from_url(settings.redis_url)
     r.publish(settings.scrape_update_channel, message.model_dump_json())
     r.close()
-    
-@celery_app.task
+
+# Notifications sent per SMTP batch
+EMAIL_BATCH_SIZE = 50
+
+def queue_scrape_email(user_id: str, update: ScrapeUpdateMessage, preferences: dict):
+    """
+    Add the notification to the email outbox and make sure a flush is queued
+    The scrape slot frees up right away; scrapes finishing together are sent
+    as one batch by whichever flush task runs first. In digest mode it waits
+    for the user's next digest instead
+    """
+    notification = {'user_id': user_id, 'update': update.model_dump(mode='json'), 'preferences': preferences}
+    r = redis.from_url(settings.redis_url)
+    try:
+        if settings.email_digest_enabled:
+            # Sent with the user's other outcomes by the next digest flush
+            email_service.add_to_digest(r, notification)
+            return
+        r.rpush(settings.email_outbox_key, json.dumps(notification))
+    finally:
+        r.close()
+    flush_email_outbox.apply_async(queue=EMAIL_QUEUE)
+
+@celery_app.task(name=RUN_SCRAPE_TASK, soft_time_limit=SCRAPE_SOFT_TIME_LIMIT, time_limit=SCRAPE_TIME_LIMIT)
+@traced('task.run_scrape')
 def run_scrape(user_id: str, preferences: dict):
+    queue_wait = record_queue_wait(run_scrape)
     try:
         # Add the backend directory to Python path for imports
         import sys
@@ -30,23 +134,121 @@ def run_scrape(user_id: str, preferences: dict):
         from scraper.scraper_service import run_scraper_with_preferences
 
         # Run the integrated scraper service (uses scrape_length from preferences)
-        update = run_scraper_with_preferences(user_id, preferences)
+        update = run_scraper_with_preferences(user_id, preferences, queue_wait)
 
         # Send email notification based on result
-        if update.status == Status.COMPLETED:
-            asyncio.run(email_service.send_scrape_complete_email(user_id, update.jobs_found, preferences))
-        else:
-            asyncio.run(email_service.send_scrape_failed_email(user_id, update, preferences))
+        queue_scrape_email(user_id, update, preferences)
 
         return update.model_dump()
 
     except Exception as e:
+        # Includes SoftTimeLimitExceeded - the scraper service has already
+        # killed the spider subprocess on its way out
         error_msg = str(e) if str(e) else "Unknown error"
         print(f"Scrape task failed: {error_msg}")
 
         update = ScrapeUpdateMessage(user_id=user_id, status=Status.FAILED, jobs_found=0, error_message=error_msg)
         publish_update(update)
 
-        asyncio.run(email_service.send_scrape_failed_email(user_id, update, preferences))
+        queue_scrape_email(user_id, update, preferences)
+
+        return update.model_dump()
 
-        return update.model_dump()
\ No newline at end of file
+@celery_app.task(name=RUN_CRAWL_PLAN_TASK, soft_time_limit=SCRAPE_SOFT_TIME_LIMIT, time_limit=SCRAPE_TIME_LIMIT)
+@traced('task.run_crawl_plan')
+def run_crawl_plan(plan: dict):
+    queue_wait = record_queue_wait(run_crawl_plan)
+    # One crawl for every subscriber of the plan - see scraper/crawl_planner.py
+    preferences_by_user = {subscriber['user_id']: subscriber['preferences'] for subscriber in plan['subscribers']}
+    try:
+        from scraper.scraper_service import run_crawl_plan as run_planned_crawl
+
+        updates = run_planned_crawl(plan, queue_wait)
+
+    except Exception as e:
+        # Includes SoftTimeLimitExceeded - the spider subprocess is already killed
+        error_msg = str(e) if str(e) else "Unknown error"
+        print(f"Planned crawl failed: {error_msg}")
+
+        updates = [ScrapeUpdateMessage(user_id=user_id, status=Status.FAILED, jobs_found=0, error_message=error_msg)
+                   for user_id in preferences_by_user]
+        for update in updates:
+            publish_update(update)
+
+    # Each subscriber gets their own notification
+    for update in updates:
+        queue_scrape_email(update.user_id, update, preferences_by_user[update.user_id])
+
+    return [update.model_dump() for update in updates]
+
+@celery_app.task(name=QUEUE_MANUAL_SCRAPE_TASK, soft_time_limit=50, time_limit=60)
+def queue_manual_scrape(user_id: str, preferences: dict):
+    """
+    Hold a scrape started from the dashboard for manual_scrape_window seconds,
+    so users starting the same search meanwhile share one crawl (scraper/crawl_planner.py).
+    The first scrape of a window queues its flush
+    """
+    from scraper.crawl_planner import enqueue_scrape, MANUAL_PENDING_KEY, MANUAL_FLUSH_KEY
+
+    r = redis.from_url(settings.redis_url)
+    try:
+        enqueue_scrape(r, user_id, preferences, key=MANUAL_PENDING_KEY)
+        # Expires on its own in case the flush is lost, so later scrapes are not stranded
+        if not r.set(MANUAL_FLUSH_KEY, 1, nx=True, ex=settings.manual_scrape_window + 60):
+            return
+    finally:
+        r.close()
+    flush_manual_scrapes.apply_async(queue=EMAIL_QUEUE, countdown=settings.manual_scrape_window)
+
+@celery_app.task(name=FLUSH_MANUAL_SCRAPES_TASK, soft_time_limit=50, time_limit=60)
+def flush_manual_scrapes():
+    """Plan the window's manual scrapes - one run_crawl_plan per distinct search, dispatched right away"""
+    from scraper.crawl_planner import take_pending, build_plans, MANUAL_PENDING_KEY, MANUAL_FLUSH_KEY
+
+    r = redis.from_url(settings.redis_url)
+    try:
+        # Cleared first - a scrape queued from here on starts the next window,
+        # or is taken now and that window's flush finds nothing
+        r.delete(MANUAL_FLUSH_KEY)
+        plans = build_plans(take_pending(r, key=MANUAL_PENDING_KEY))
+    finally:
+        r.close()
+
+    # Unlike scheduled scrapes, not held back by the token bucket - a user is waiting
+    for plan in plans:
+        run_crawl_plan.apply_async(args=(plan,), queue=SCRAPE_QUEUE, headers={'enqueued_at': time.time()})
+    return len(plans)
+
+@celery_app.task(name=FLUSH_EMAIL_OUTBOX_TASK, soft_time_limit=120, time_limit=180)
+def flush_email_outbox():
+    # Popped notifications are gone from Redis - a crash mid-batch drops
+    # them, which is acceptable for notifications
+    r = redis.from_url(settings.redis_url)
+    sent = 0
+    try:
+        while True:
+            batch = r.lpop(settings.email_outbox_key, EMAIL_BATCH_SIZE)
+            if not batch:
+                break
+            sent += email_service.send_scrape_emails([json.loads(item) for item in batch])
+    finally:
+        r.close()
+    return sent
+
+@celery_app.task(name=FLUSH_EMAIL_DIGESTS_TASK, soft_time_limit=300, time_limit=360)
+def flush_email_digests():
+    r = redis.from_url(settings.redis_url)
+    try:
+        return email_service.send_digest_emails(r)
+    finally:
+        r.close()
+
+@celery_app.task(name=SCHEDULE_SCRAPES_TASK, soft_time_limit=50, time_limit=60)
+def schedule_scrapes():
+    from worker.scheduler import dispatch_due_scrapes
+
+    r = redis.from_url(settings.redis_url)
+    try:
+        return dispatch_due_scrapes(r, run_crawl_plan)
+    finally:
+        r.close()
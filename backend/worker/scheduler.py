@@ -0,0 +1,178 @@
+"""
+Scheduled scrapes
+Runs every user's saved preference search on a fixed cadence, spread out so
+workers and proxies see a steady trickle instead of a burst. Due users go
+through the crawl planner, so users sharing a search share one crawl
+
+State lives in Redis so any number of beat ticks / workers agree:
+    scrape_schedule           sorted set {user_id: next run (unix time)}
+    scrape_schedule:synced    set while the user list is fresh
+    scrape_schedule:bucket    token bucket limiting dispatch rate
+    scrape_schedule:lock      held by the tick currently dispatching
+"""
+
+import time
+import uuid
+import random
+import zlib
+
+from app.core.config import settings
+from app.core.celery_client import SCRAPE_QUEUE
+from app.services.database_service import get_all_preferences, get_preferences_for_users
+from scraper.crawl_planner import enqueue_scrape, take_pending, return_pending, build_plans
+
+SCHEDULE_KEY = "scrape_schedule"
+SYNCED_KEY = f"{SCHEDULE_KEY}:synced"
+BUCKET_KEY = f"{SCHEDULE_KEY}:bucket"
+LOCK_KEY = f"{SCHEDULE_KEY}:lock"
+
+# Re-read the user list from the database at most this often
+SYNC_INTERVAL = 3600
+
+# Atomic token bucket - refills at `rate` tokens/sec up to `burst`, takes one
+# token if available. Shared by every scheduler tick, wherever it runs
+TOKEN_BUCKET_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or burst
+local ts = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+local taken = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    taken = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 60)
+return taken
+"""
+
+# Delete the lock only if this tick still holds it - once it has expired,
+# the next tick may have taken it
+RELEASE_LOCK_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+def initial_offset(user_id: str, interval: int) -> int:
+    """Stable per-user offset into the cadence, so new users don't all start together"""
+    return zlib.crc32(user_id.encode('utf-8')) % interval
+
+def sync_schedule(r, now: float) -> int:
+    """
+    Add users with scrapeable preferences to the schedule, drop the rest
+    Skipped while the previous sync is fresh
+
+    Returns:
+        Number of users newly scheduled
+    """
+    if not r.set(SYNCED_KEY, 1, nx=True, ex=SYNC_INTERVAL):
+        return 0
+
+    interval = settings.scrape_schedule_interval
+    users = {user_id for user_id, _ in get_all_preferences()}
+    scheduled = {member.decode('utf-8') for member in r.zrange(SCHEDULE_KEY, 0, -1)}
+
+    added = {user_id: now + initial_offset(user_id, interval) for user_id in users - scheduled}
+    if added:
+        r.zadd(SCHEDULE_KEY, added)
+    removed = scheduled - users
+    if removed:
+        r.zrem(SCHEDULE_KEY, *removed)
+    return len(added)
+
+def take_token(r, now: float) -> bool:
+    rate = settings.scheduled_scrape_rate
+    burst = settings.scheduled_scrape_burst
+    return bool(r.eval(TOKEN_BUCKET_SCRIPT, 1, BUCKET_KEY, rate, burst, now))
+
+def dispatch_due_scrapes(r, run_crawl_plan) -> int:
+    """
+    Plan and queue crawls for users whose next run has passed
+
+    Due users join the crawl planner's pending list and are merged into one
+    crawl per distinct search. Dispatch stops for this tick when the token
+    bucket is empty or the scrape queue already has a backlog; plans left
+    over go back to pending and are dispatched first next tick.
+
+    Args:
+        r: Sync Redis client
+        run_crawl_plan: The run_crawl_plan Celery task
+
+    Returns:
+        Number of crawls queued
+    """
+    # A slow tick must not overlap the next one and dispatch the same users twice.
+    # The TTL only frees the lock if a tick dies holding it, so it is well past
+    # one tick, and each tick releases only its own token
+    token = uuid.uuid4().hex
+    if not r.set(LOCK_KEY, token, nx=True, ex=settings.scheduler_tick * 10):
+        return 0
+    try:
+        return _dispatch_due_scrapes(r, run_crawl_plan)
+    finally:
+        r.eval(RELEASE_LOCK_SCRIPT, 1, LOCK_KEY, token)
+
+def collect_due_users(r, now: float) -> int:
+    """
+    Move due users into the crawl planner's pending list
+
+    Returns:
+        Number of users queued
+    """
+    due = [member.decode('utf-8') for member in
+           r.zrangebyscore(SCHEDULE_KEY, 0, now, start=0, num=settings.scheduled_scrape_batch)]
+    if not due:
+        return 0
+
+    preferences_by_user = get_preferences_for_users(due)
+    gone = [u for u in due if u not in preferences_by_user]
+    if gone:
+        # Preferences deleted or no longer scrapeable since the last sync
+        r.zrem(SCHEDULE_KEY, *gone)
+
+    for user_id, preferences in preferences_by_user.items():
+        enqueue_scrape(r, user_id, preferences.model_dump())
+
+        # Pending now - jitter the next run too, so users that collided once drift apart
+        jitter = random.uniform(-0.05, 0.05) * settings.scrape_schedule_interval
+        r.zadd(SCHEDULE_KEY, {user_id: now + settings.scrape_schedule_interval + jitter})
+
+    return len(preferences_by_user)
+
+def _dispatch_due_scrapes(r, run_crawl_plan) -> int:
+    now = time.time()
+    sync_schedule(r, now)
+    collect_due_users(r, now)
+
+    # Celery's Redis transport keeps each queue as a list named after it
+    backlog = r.llen(SCRAPE_QUEUE)
+    room = settings.scheduled_scrape_max_backlog - backlog
+    if room <= 0:
+        return 0
+
+    plans = build_plans(take_pending(r))
+    if not plans:
+        return 0
+
+    dispatched = 0
+    for plan in plans:
+        if dispatched >= room or not take_token(r, now):
+            break
+
+        # Jitter spreads the starts within the tick. Countdown tasks are held
+        # by a worker until due, so keep the jitter around one tick
+        countdown = random.uniform(0, settings.scheduled_scrape_jitter)
+        run_crawl_plan.apply_async(args=(plan,),
+                                   queue=SCRAPE_QUEUE,
+                                   countdown=countdown,
+                                   # Queue wait is measured from when the task becomes due
+                                   headers={'enqueued_at': now + countdown})
+        dispatched += 1
+
+    return_pending(r, plans[dispatched:])
+    return dispatched
@@ -153,24 +153,6 @@ export default function JobFlowScraper() {
     'Content-Type': 'application/json',
   });
 
-  // Fetch user preferences from API
-  const fetchUserPreferences = async () => {
-    if (!authToken) return;
-    try {
-      const response = await fetch(`${API_URL}/api/get_preferences`, {
-        headers: getAuthHeaders(),
-      });
-      if (response.ok) {
-        const prefs = await response.json();
-        setDraftPreferences(prefs);
-      } else {
-        console.error('Failed to fetch user preferences:', response.statusText);
-      }
-    } catch (error) {
-      console.error('Error fetching user preferences:', error);
-    }
-  };
-
   // Save user preferences to API
   const saveUserPreferences = async (prefsToSave: UserPreferences) => {
     if (!authToken) return;
@@ -195,38 +177,6 @@ export default function JobFlowScraper() {
     }
   };
 
-  // Load preferences from API when auth is ready
-  useEffect(() => {
-    if (authToken) {
-      fetchUserPreferences();
-    }
-  }, [authToken]);
-
-  // Fetch user statistics
-  const fetchUserStatistics = async () => {
-    if (!authToken) return;
-    try {
-      const response = await fetch(`${API_URL}/api/get_statistics`, {
-        headers: getAuthHeaders(),
-      });
-      if (response.ok) {
-        const stats = await response.json();
-        setUserStats(stats);
-      } else {
-        console.error('Failed to fetch user statistics:', response.statusText);
-      }
-    } catch (error) {
-      console.error('Error fetching user statistics:', error);
-    }
-  };
-
-  // Load user statistics when auth is ready
-  useEffect(() => {
-    if (authToken) {
-      fetchUserStatistics();
-    }
-  }, [authToken]);
-
   // Job API functions
   const fetchJobs = async () => {
     if (!authToken) return;
@@ -245,20 +195,29 @@ export default function JobFlowScraper() {
     }
   };
 
-  const fetchSavedJobs = async () => {
+  // Jobs, saved jobs and statistics (and preferences on first load) in one request
+  const fetchDashboard = async (includePreferences = false) => {
     if (!authToken) return;
     try {
-      const response = await fetch(`${API_URL}/api/get_priority_jobs`, {
+      const response = await fetch(`${API_URL}/api/dashboard`, {
         headers: getAuthHeaders(),
       });
       if (response.ok) {
-        const savedJobsList = await response.json();
-        setSavedJobs(savedJobsList || []);
+        const dashboard = await response.json();
+        const jobsList: Job[] = dashboard.jobs || [];
+        const priorityIds = new Set<number>(dashboard.priority_job_ids || []);
+        setJobs(jobsList);
+        setSavedJobs(jobsList.filter((job) => priorityIds.has(job.id)));
+        setUserStats(dashboard.statistics);
+        // Not on refreshes - it would overwrite preferences being edited
+        if (includePreferences) {
+          setDraftPreferences(dashboard.preferences);
+        }
       } else {
-        console.error('Failed to fetch saved jobs:', response.statusText);
+        console.error('Failed to fetch dashboard:', response.statusText);
       }
     } catch (error) {
-      console.error('Error fetching saved jobs:', error);
+      console.error('Error fetching dashboard:', error);
     }
   };
 
@@ -298,9 +257,7 @@ export default function JobFlowScraper() {
       });
       if (response.ok) {
         // Refresh both job lists
-        fetchJobs();
-        fetchSavedJobs();
-        fetchUserStatistics(); // Update statistics
+        fetchDashboard(); // Jobs, saved jobs and statistics
       } else {
         console.error('Failed to toggle job priority:', response.statusText);
         // Revert the optimistic update on error
@@ -326,9 +283,7 @@ export default function JobFlowScraper() {
       });
       if (response.ok) {
         // Refresh both job lists
-        fetchJobs();
-        fetchSavedJobs();
-        fetchUserStatistics(); // Update statistics
+        fetchDashboard(); // Jobs, saved jobs and statistics
         // Close modal if the deleted job was selected
         if (selectedJob && selectedJob.id === jobId) {
           setSelectedJob(null);
@@ -349,9 +304,7 @@ export default function JobFlowScraper() {
       });
       if (response.ok) {
         // Refresh both job lists
-        fetchJobs();
-        fetchSavedJobs();
-        fetchUserStatistics(); // Update statistics
+        fetchDashboard(); // Jobs, saved jobs and statistics
         // Close modal if the completed job was selected
         if (selectedJob && selectedJob.id === jobId) {
           setSelectedJob(null);
@@ -364,49 +317,68 @@ export default function JobFlowScraper() {
     }
   };
 
-  // Load jobs when auth is ready
+  // Load the dashboard when auth is ready
   useEffect(() => {
     if (authToken) {
-      fetchJobs();
-      fetchSavedJobs();
+      fetchDashboard(true);
     }
   }, [authToken]);
 
   useEffect(() => {
     if (!authToken) return;
 
-    const socket = new WebSocket(`${WS_URL}/ws/scrape?token=${authToken}`);
-    socketRef.current = socket;
-
-    socket.onopen = () => {
-      console.log("WebSocket connected");
-    };
-
-    socket.onmessage = (event) => {
-      try {
-        const data: ScrapeUpdate = JSON.parse(event.data);
-        console.log("Received websocket data:", data);
-        setUpdates((prev) => [...prev, { ...data, timestamp: new Date().toLocaleTimeString() }]);
-
-        // Reset scraper running state when scrape is completed or failed
-        if (data.status === 'completed' || data.status === 'failed') {
-          setIsScraperRunning(false);
-          // Refresh user statistics and jobs after scrape completion
-          if (data.status === 'completed') {
-            fetchUserStatistics();
-            fetchJobs();
-            fetchSavedJobs();
+    // Reconnect with backoff - the API closes sockets with 1001 when a worker
+    // shuts down (deploys, restarts) and another worker picks the client up
+    let closedByUs = false;
+    let attempts = 0;
+    let retryTimer: ReturnType<typeof setTimeout> | undefined;
+
+    const connect = () => {
+      const socket = new WebSocket(`${WS_URL}/ws/scrape?token=${authToken}`);
+      socketRef.current = socket;
+
+      socket.onopen = () => {
+        attempts = 0;
+        console.log("WebSocket connected");
+      };
+
+      socket.onmessage = (event) => {
+        try {
+          const data: ScrapeUpdate = JSON.parse(event.data);
+          console.log("Received websocket data:", data);
+          setUpdates((prev) => [...prev, { ...data, timestamp: new Date().toLocaleTimeString() }]);
+
+          // Reset scraper running state when scrape is completed or failed
+          if (data.status === 'completed' || data.status === 'failed') {
+            setIsScraperRunning(false);
+            // Refresh user statistics and jobs after scrape completion
+            if (data.status === 'completed') {
+              fetchDashboard();
+            }
           }
+        } catch (e) {
+          console.error("Failed to parse message:", event.data);
         }
-      } catch (e) {
-        console.error("Failed to parse message:", event.data);
-      }
+      };
+
+      socket.onclose = (event) => {
+        console.log("WebSocket disconnected", event.code);
+        // 1000 means this socket was replaced by a newer connection (another tab)
+        if (closedByUs || event.code === 1000) return;
+        const delay = Math.min(30000, 1000 * 2 ** attempts);
+        attempts += 1;
+        retryTimer = setTimeout(connect, delay);
+      };
+      socket.onerror = (error) => console.error("WebSocket error:", error);
     };
 
-    socket.onclose = () => console.log("WebSocket disconnected");
-    socket.onerror = (error) => console.error("WebSocket error:", error);
+    connect();
 
-    return () => socket.close();
+    return () => {
+      closedByUs = true;
+      clearTimeout(retryTimer);
+      socketRef.current?.close();
+    };
   }, [authToken]);
 
   // Save preferences